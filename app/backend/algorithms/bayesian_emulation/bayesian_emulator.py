@@ -1,7 +1,11 @@
 import numpy as np
+from scipy.linalg import cho_solve, cholesky, solve_triangular
+from scipy.spatial import cKDTree
+
+from algorithms.bayesian_emulation.kernels import DEFAULT_BLOCK_SIZE, estimate_covariance_memory, neighbour_distances, squared_distances, squared_exponential_covariance
 
 class BayesianEmulator:
-    def __init__(self, beta, sigma, theta, x_train, D, M=None):
+    def __init__(self, beta, sigma, theta, x_train, D, M=None, L=None, nugget=0.0, neighbour_tolerance=None, neighbour_cutoff=None):
         '''
         Creates a Bayesian Emulator for predicting the results of an expensive simulator (such as a Maps API)
 
@@ -29,36 +33,337 @@ class BayesianEmulator:
         M: (array-like)
             Precomputed value of Matrix M = Var[D]^{-1} (D - E[D])
             shape (n_samples, n_samples)
+
+        L: (array-like)
+            Precomputed lower Cholesky factor of Var[D] + nugget I, as returned by a previous factorise or compute_M.
+            Used for the predictive variance and for re-solving against new outputs without refactorising.
+            shape (n_samples, n_samples)
+
+        nugget : float
+            Value added to the diagonal of Var[D] before factorising. Zero keeps the emulator interpolating the known outputs,
+            and it is raised automatically (jitter) if Var[D] is not numerically positive definite.
+
+        neighbour_tolerance : float
+            If given, E_D[f(x)] is summed only over the training points near x, found through a KD-tree over x_train, with
+            the truncation error guaranteed to be at most this (in the units of D). See build_neighbour_index.
+
+        neighbour_cutoff : float
+            Minimum neighbour radius in units of theta, used alone or together with neighbour_tolerance.
         '''
         self.beta = np.array(beta, dtype=np.float64)
         self.sigma = np.array(sigma, dtype=np.float64)
         self.theta = np.array(theta, dtype=np.float64)
-        self.x_train = np.array(x_train, dtype=np.float64)
-        self.D = np.array(D, dtype=np.float64)
-        self.M = np.array(M, dtype=np.float64)
+        # float64 arrays are kept as given rather than copied, so a memory-mapped model artifact is shared, not loaded.
+        # The emulator never writes into them, and replaces them whole when retraining
+        self.x_train = np.asarray(x_train, dtype=np.float64)
+        self.D = np.asarray(D, dtype=np.float64)
+        self.M = None if M is None else np.asarray(M, dtype=np.float64)
+        self.L = None if L is None else np.asarray(L, dtype=np.float64)
+        self.nugget = float(nugget)
 
-    def compute_M(self):
+        # (origins, destinations) when x_train is the full product of origins with destinations, see find_grid_structure
+        self.grid = None
+        # (Q_o, Q_d, eigenvalues of Var[D] + nugget I) when Var[D] was factorised through its Kronecker structure
+        self.kronecker_factors = None
+
+        # KD-tree over x_train for truncated emulation, see build_neighbour_index
+        self.neighbour_tolerance = neighbour_tolerance
+        self.neighbour_cutoff = neighbour_cutoff
+        self.neighbour_tree = None
+        if self.M is not None:
+            self._refresh_neighbour_index()
+
+    def compute_M(self, kronecker=None, block_size=DEFAULT_BLOCK_SIZE, dtype=np.float64, memmap_path=None):
         """
         Computes the matrix M = Var[D]^{-1} (D - E[D])
+
+        Parameters:
+        kronecker (bool): Whether to use the Kronecker-structured solve for origin x destination grids.
+            None detects the grid structure and uses it when present, True requires it and False always uses the dense solve.
+        block_size, dtype, memmap_path: Control the memory used by the dense factorisation, as for factorise.
         """
-        self.x_train = np.array(self.x_train)
-        self.D = np.array(self.D)
-        
-        # Compute pairwise squared (Euclidean) distances, ||x^(j)-x^(k)||^2
-        X = self.x_train
-        sq_dists = np.sum((X[:, np.newaxis, :] - X[np.newaxis, :, :])**2, axis=-1)
-        
-        # Compute covariance matrix K, Var[D] = sigma^2 e^{||x^(j)-x^(k)||^2 / theta^2}
-        K = (self.sigma ** 2) * np.exp(-sq_dists / (self.theta ** 2))
-        
-        # Center the outputs D by subtracting beta, D - E[D]
-        y = self.D - self.beta
-        
-        # Solve for M = K^{-1} y
-        self.M = np.linalg.solve(K, y)
+        self.factorise(kronecker, block_size, dtype, memmap_path)
+
+        # Center the outputs D by subtracting beta, D - E[D], and solve for M = K^{-1} y with the cached factor
+        self.M = self.solve(self.D - self.beta)
+        self._refresh_neighbour_index()
+
+        return self.M
+
+    def compute_M_kronecker(self, origins, destinations):
+        """
+        Computes M = Var[D]^{-1} (D - E[D]) for training data laid out as every origin paired with every destination
+
+        Parameters:
+        origins (array-like): The distinct origins, in the order they appear in x_train, shape (n_origins, n_origin_dimensions)
+        destinations (array-like): The distinct destinations, in the order they appear within each origin's block of x_train,
+            shape (n_destinations, n_destination_dimensions)
+        """
+        self.factorise_kronecker(origins, destinations)
+        self.M = self.solve(self.D - self.beta)
+        self._refresh_neighbour_index()
+
+        return self.M
+
+    def factorise(self, kronecker=None, block_size=DEFAULT_BLOCK_SIZE, dtype=np.float64, memmap_path=None):
+        """
+        Factorises Var[D] + nugget I and caches the factor, so M, new output vectors and predictive variances can all be
+        solved against it without another O(n^3) decomposition
+
+        The dense covariance is assembled in row blocks straight into one preallocated n x n array and factorised in place,
+        so peak memory is that array plus one block (recorded in peak_memory_bytes, see kernels.estimate_covariance_memory).
+
+        Parameters:
+        kronecker (bool): As for compute_M.
+        block_size (int): Number of covariance rows assembled at once.
+        dtype: dtype of the covariance and its factor, np.float32 halves their memory at the cost of precision.
+        memmap_path (str): If given, the covariance and its factor live in a memory-mapped file at this path instead of RAM.
+        """
+        # Only read here, so a memory-mapped x_train and D stay shared rather than copied
+        self.x_train = np.asarray(self.x_train, dtype=np.float64)
+        self.D = np.asarray(self.D, dtype=np.float64)
+
+        self.grid = None
+        self.kronecker_factors = None
+        if kronecker is not False:
+            grid = self.find_grid_structure()
+            if grid is not None:
+                self.factorise_kronecker(*grid)
+                return
+            if kronecker:
+                raise ValueError("x_train is not a full origin x destination grid, cannot use the Kronecker solve.")
         
+        n = len(self.x_train)
+        out = None
+        if memmap_path is not None:
+            out = np.memmap(memmap_path, dtype=dtype, mode="w+", shape=(n, n))
+
+        # Compute covariance matrix K, Var[D] = sigma^2 e^{-||x^(j)-x^(k)||^2 / theta^2}, block by block
+        def build_K():
+            return squared_exponential_covariance(self.x_train, self.sigma, self.theta, block_size, dtype, out)
+
+        # Factorise K + nugget I = L L^T, overwriting K with L
+        self.L, self.nugget = _cholesky_with_jitter(build_K(), self.nugget, rebuild=build_K)
+        self.peak_memory_bytes = estimate_covariance_memory(n, block_size, dtype)
+
+    def factorise_kronecker(self, origins, destinations):
+        """
+        Factorises Var[D] + nugget I for training data laid out as every origin paired with every destination
+
+        The squared-exponential kernel on [x_o, y_o, x_d, y_d] factorises as sigma^2 K_o (x) K_d, where K_o and K_d are the
+        correlation matrices of the origins and the destinations. Working with the eigendecompositions of the two
+        factors costs O(n_o^3 + n_d^3) instead of O((n_o n_d)^3) for the dense factorisation.
+
+        Parameters:
+        origins, destinations (array-like): As for compute_M_kronecker.
+        """
+        origins = np.array(origins, dtype=np.float64, ndmin=2)
+        destinations = np.array(destinations, dtype=np.float64, ndmin=2)
+        n_o, n_d = len(origins), len(destinations)
+        if n_o * n_d != len(self.D):
+            raise ValueError(f"Grid of {n_o} origins x {n_d} destinations does not match the {len(self.D)} known outputs.")
+
+        # Correlation matrices of each factor, exp{-||x^(j)-x^(k)||^2 / theta^2}, and their eigendecompositions
+        K_o = np.exp(-squared_distances(origins, origins) / (self.theta ** 2))
+        K_d = np.exp(-squared_distances(destinations, destinations) / (self.theta ** 2))
+        eig_o, Q_o = np.linalg.eigh(K_o)
+        eig_d, Q_d = np.linalg.eigh(K_d)
+
+        # Eigenvalues of sigma^2 K_o (x) K_d + nugget I, raising the nugget if any are not positive
+        eigenvalues = (self.sigma ** 2) * np.outer(eig_o, eig_d)
+        nugget = self.nugget
+        while np.min(eigenvalues) + nugget <= 0:
+            nugget = _next_jitter(nugget, self.sigma ** 2)
+
+        self.nugget = nugget
+        self.kronecker_factors = (Q_o, Q_d, eigenvalues + nugget)
+        self.grid = (origins, destinations)
+        self.L = None
+
+    def solve(self, y):
+        """
+        Solves (Var[D] + nugget I) v = y using the cached factorisation
+
+        Parameters:
+        y (array-like): Vector to solve against, e.g. the centred outputs D - E[D], shape (n_samples,)
+
+        Returns:
+        np.ndarray: v, shape (n_samples,)
+        """
+        y = np.array(y, dtype=np.float64)
+
+        if self.kronecker_factors is not None:
+            # (Q_o (x) Q_d) diag(1 / eigenvalues) (Q_o (x) Q_d)^T y, applied without forming the Kronecker product
+            Q_o, Q_d, eigenvalues = self.kronecker_factors
+            Y = y.reshape(eigenvalues.shape)
+            return (Q_o @ ((Q_o.T @ Y @ Q_d) / eigenvalues) @ Q_d.T).ravel()
+
+        if self.L is None:
+            raise ValueError("Var[D] has not been factorised. Run factorise or compute_M first, or provide L.")
+
+        return cho_solve((self.L, True), y, check_finite=False)
+
+    def add_observations(self, x_new, d_new):
+        """
+        Adds new known outputs to the emulator without refactorising Var[D] from scratch
+
+        The cached Cholesky factor is extended block-wise,
+            L_new = [[L, 0], [S, L_22]],  S = (L^{-1} Cov[D,D_new])^T,  L_22 L_22^T = Var[D_new] + nugget I - S S^T,
+        which costs O(n^2 k) for k new points instead of O((n+k)^3), and M is then re-solved against the extended factor.
+        An emulator factorised through its Kronecker structure is converted to a dense factor first (once), since the
+        new points break the origin x destination grid.
+
+        Parameters:
+        x_new (array-like): The new active inputs, shape (k_samples, n_dimensions)
+        d_new (array-like): The known outputs for x_new, shape (k_samples,)
+
+        Returns:
+        np.ndarray: The updated M
+        """
+        x_new = np.array(x_new, dtype=np.float64, ndmin=2)
+        d_new = np.array(d_new, dtype=np.float64, ndmin=1)
+        if len(x_new) != len(d_new):
+            raise ValueError(f"Got {len(x_new)} new inputs but {len(d_new)} new outputs.")
+        if len(x_new) == 0:
+            return self.M
+
+        if self.L is None:
+            self.factorise(kronecker=False)
+
+        # Cov[D,D_new] and Var[D_new] + nugget I
+        B = (self.sigma ** 2) * np.exp(-squared_distances(self.x_train, x_new) / (self.theta ** 2))
+        C = (self.sigma ** 2) * np.exp(-squared_distances(x_new, x_new) / (self.theta ** 2)) + self.nugget * np.eye(len(x_new))
+
+        # Extend the factor with the new block row
+        S = solve_triangular(self.L, B, lower=True, check_finite=False).T
+        try:
+            L_22 = cholesky(C - S @ S.T, lower=True, check_finite=False)
+        except np.linalg.LinAlgError:
+            raise np.linalg.LinAlgError(
+                f"New observations are numerically dependent on the existing training points with a nugget of {self.nugget}. "
+                "Refit with compute_M and a larger nugget instead."
+            )
+
+        n, k = len(self.L), len(x_new)
+        L = np.zeros((n + k, n + k), dtype=np.float64)
+        L[:n, :n] = self.L
+        L[n:, :n] = S
+        L[n:, n:] = L_22
+
+        self.L = L
+        self.grid = None
+        self.kronecker_factors = None
+        self.x_train = np.vstack([self.x_train, x_new])
+        self.D = np.concatenate([self.D, d_new])
+        self.M = self.solve(self.D - self.beta)
+        self._refresh_neighbour_index()
+
         return self.M
 
+    def build_neighbour_index(self, tolerance=None, cutoff=None):
+        """
+        Builds a KD-tree over x_train so E_D[f(x)] is summed only over the training points within a radius of x
+
+        Dropping the training points further than r = c theta from x changes E_D[f(x)] by at most
+            sum_j sigma^2 exp{-||x-x^(j)||^2/theta^2} |M_j| <= sigma^2 exp{-c^2} ||M||_1,
+        so for a tolerance the cutoff is chosen as c = sqrt(ln(sigma^2 ||M||_1 / tolerance)), which guarantees the error.
+        The bound is kept in truncation_error_bound. Each prediction then costs O(k) for its k neighbours instead of O(n).
+        Variances are still computed over every training point.
+
+        Parameters:
+        tolerance (float): Largest allowed truncation error in E_D[f(x)], in the units of D.
+        cutoff (float): Minimum radius in units of theta. With a tolerance as well, the larger of the two radii is used.
+        """
+        if self.M is None:
+            raise ValueError("M has not been computed. Run compute_M first or provide M.")
+        if tolerance is None and cutoff is None:
+            raise ValueError("Provide a tolerance or a cutoff for the neighbour index.")
+
+        self.neighbour_tolerance = tolerance
+        self.neighbour_cutoff = cutoff
+
+        total_weight = float((self.sigma ** 2) * np.sum(np.abs(self.M)))
+        c = 0.0 if cutoff is None else float(cutoff)
+        if tolerance is not None and total_weight > tolerance:
+            # The tiny extra margin keeps the bound below the tolerance despite rounding in log and exp
+            c = max(c, np.sqrt(np.log(total_weight / tolerance) + 1e-12))
+
+        self.neighbour_radius = c * float(self.theta)
+        self.truncation_error_bound = total_weight * np.exp(-c ** 2)
+        self.neighbour_tree = cKDTree(self.x_train)
+
+    def _refresh_neighbour_index(self):
+        # M or x_train changed, so the radius needed for the tolerance has too
+        if self.neighbour_tolerance is not None or self.neighbour_cutoff is not None:
+            self.build_neighbour_index(self.neighbour_tolerance, self.neighbour_cutoff)
+
+    def fit_hyperparameters(self, n_starts=8, n_workers=None, seed=0):
+        """
+        Fits beta, sigma and theta to x_train and D by maximising the log marginal likelihood with analytic gradients,
+        using the current values as one of several starting points run on a process pool (see hyperparameters.py)
+
+        The fitted values, and the nugget they were fitted with, replace the current ones and M and the cached factor are
+        cleared, so run compute_M afterwards.
+
+        Parameters:
+        n_starts (int): Number of starting points
+        n_workers (int): Number of processes, None for one per CPU and 1 to run in this process
+        seed (int): Seed for the random starting points
+
+        Returns:
+        dict: The fitted {"beta", "sigma", "theta", "log_marginal_likelihood", "nugget"}
+        """
+        # Imported here as hyperparameters.py builds on this module
+        from algorithms.bayesian_emulation.hyperparameters import fit_hyperparameters
+
+        fitted = fit_hyperparameters(self.x_train, self.D, (self.beta, self.sigma, self.theta), n_starts, n_workers, self.nugget, seed)
+
+        self.beta = np.array(fitted["beta"], dtype=np.float64)
+        self.sigma = np.array(fitted["sigma"], dtype=np.float64)
+        self.theta = np.array(fitted["theta"], dtype=np.float64)
+        self.nugget = fitted["nugget"]
+        self.M = None
+        self.L = None
+        self.grid = None
+        self.kronecker_factors = None
+        self.neighbour_tree = None
+
+        return fitted
+
+    def find_grid_structure(self):
+        """
+        Detects whether x_train is the full product of a set of origins with a set of destinations
+
+        The first half of each input is taken as the origin and the second half as the destination. The rows must be
+        origin-major, i.e. every destination for the first origin, then every destination for the second origin and so on,
+        which is how the training scripts build x_train.
+
+        Returns:
+        tuple or None: (origins, destinations) if x_train is such a grid, otherwise None
+        """
+        X = np.array(self.x_train, dtype=np.float64, ndmin=2)
+        n, d = X.shape
+        if d % 2 != 0 or n == 0:
+            return None
+        half = d // 2
+
+        # The number of destinations is the length of the first run of rows sharing an origin
+        same_origin = np.all(X[:, :half] == X[0, :half], axis=1)
+        n_d = n if same_origin.all() else int(np.argmin(same_origin))
+        if n % n_d != 0:
+            return None
+        n_o = n // n_d
+
+        grid = X.reshape(n_o, n_d, d)
+        origins = grid[:, 0, :half]
+        destinations = grid[0, :, half:]
+        if not np.all(grid[:, :, :half] == origins[:, np.newaxis, :]):
+            return None
+        if not np.all(grid[:, :, half:] == destinations[np.newaxis, :, :]):
+            return None
+
+        return origins, destinations
+
     def emulate(self, x):
         """
         Predicts the emulated value E_D[f(x)] using the precomputed M
@@ -66,16 +371,231 @@ class BayesianEmulator:
         Parameters:
         x (array-like): New input point to emulate, shape (n_dimensions,)
         """
+        x = np.array(x, dtype=np.float64)
+
+        return self.emulate_batch(x[np.newaxis, :])[0]
+
+    def emulate_with_variance(self, x):
+        """
+        Predicts the emulated value E_D[f(x)] and its adjusted variance Var_D[f(x)]
+
+        Parameters:
+        x (array-like): New input point to emulate, shape (n_dimensions,)
+
+        Returns:
+        tuple: (E_D[f(x)], Var_D[f(x)])
+        """
+        x = np.array(x, dtype=np.float64)
+        emulated, variance = self.emulate_batch_with_variance(x[np.newaxis, :])
+
+        return emulated[0], variance[0]
+
+    def emulate_batch(self, X, chunk_size=None):
+        """
+        Predicts the emulated values E_D[f(x)] for many input points at once using the precomputed M
+
+        The covariance between the query points and the training points is built as one matrix product per chunk,
+        so the cost is a handful of BLAS calls rather than one Python-level call per point.
+
+        Parameters:
+        X (array-like): New input points to emulate, shape (m_samples, n_dimensions)
+        chunk_size (int): Maximum number of query points evaluated together. Peak memory is roughly
+            chunk_size * n_samples * 8 bytes. None evaluates every point in a single block.
+
+        Returns:
+        np.ndarray: The emulated values, shape (m_samples,)
+        """
+        emulated, _ = self._emulate(X, chunk_size, with_variance=False)
+
+        return emulated
+
+    def emulate_batch_with_variance(self, X, chunk_size=None):
+        """
+        Predicts E_D[f(x)] and Var_D[f(x)] = sigma^2 - Cov[f(x),D] Var[D]^{-1} Cov[D,f(x)] for many input points at once
+
+        The variance reuses the cached factor of Var[D], so each point costs O(n^2) rather than a fresh O(n^3) solve. An
+        emulator created from a stored M without its factor must be factorised first, which is left to the caller since a
+        shared emulator is read-only.
+
+        Parameters:
+        X (array-like): As for emulate_batch.
+        chunk_size (int): As for emulate_batch.
+
+        Returns:
+        tuple: (emulated values, variances), each shape (m_samples,)
+        """
+        if self.L is None and self.kronecker_factors is None:
+            raise ValueError("Var[D] has not been factorised. Run factorise or compute_M first, or provide L.")
+
+        return self._emulate(X, chunk_size, with_variance=True)
+
+    def emulate_matrix(self, origins, destinations, chunk_size=None):
+        """
+        Predicts E_D[f(x)] for every origin paired with every destination, x = (origin, destination)
+
+        The squared exponential covariance factorises over the two halves of x,
+        Cov[f(x),D]_j = sigma^2 exp{-||o-o^(j)||^2/theta^2} exp{-||d-d^(j)||^2/theta^2}, so the whole matrix is a single
+        (n_origins, n_samples) by (n_samples, n_destinations) product rather than a covariance row for each of the
+        n_origins * n_destinations pairs. A neighbour index is not used, so the result is the untruncated E_D[f(x)].
+
+        Parameters:
+        origins (array-like): shape (n_origins, n_origin_dimensions)
+        destinations (array-like): shape (n_destinations, n_destination_dimensions)
+        chunk_size (int): Maximum number of destinations evaluated together. Peak memory is roughly
+            chunk_size * n_samples * 8 bytes. None evaluates every destination in a single block.
+
+        Returns:
+        np.ndarray: The emulated values, shape (n_origins, n_destinations)
+        """
         if self.M is None:
             raise ValueError("M has not been computed. Run compute_M first or provide M.")
-    
-        x = np.array(x, dtype=np.float64)
-        
-        # Compute squared distances between x and each training point, ||x-x^(j)||^2
-        sq_dists = np.sum((x-self.x_train)**2, axis=1)
-        
-        # Compute covariance vector k, Cov[f(x),D]_j = sigma^2 exp{-||x-x^(j)||^2/theta^2}
-        k = (self.sigma ** 2) * np.exp(-sq_dists / (self.theta ** 2))
-        
-        # Calculate the emulated mean, E_D[f(x)] = E[f(x)] + Cov[f(x),D] Var[D]^-1(D - E[D])
-        return self.beta + np.dot(k, self.M)
\ No newline at end of file
+
+        origins = np.array(origins, dtype=np.float64, ndmin=2)
+        destinations = np.array(destinations, dtype=np.float64, ndmin=2)
+        n_destinations = len(destinations)
+        chunk_size = max(n_destinations, 1) if chunk_size is None else int(chunk_size)
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer.")
+
+        if self.grid is not None:
+            # Sum over the grid as k_o M_grid k_d^T, O(n_o n_d) per origin rather than per pair
+            grid_origins, grid_destinations = self.grid
+            weighted = np.exp(-squared_distances(origins, grid_origins) / (self.theta ** 2)) @ self.M.reshape(len(grid_origins), len(grid_destinations))
+            centres = grid_destinations
+        else:
+            centres = self._matrix_centres()
+            half = origins.shape[1]
+            weighted = np.exp(-squared_distances(origins, centres[:, :half]) / (self.theta ** 2)) * self.M
+            centres = centres[:, half:]
+
+        weighted *= self.sigma ** 2
+        centre_sq_norms = np.einsum("ij,ij->i", centres, centres)
+        emulated = np.empty((len(origins), n_destinations), dtype=np.float64)
+        for start in range(0, n_destinations, chunk_size):
+            chunk = slice(start, start + chunk_size)
+            k_d = np.exp(-squared_distances(destinations[chunk], centres, centre_sq_norms) / (self.theta ** 2))
+            emulated[:, chunk] = self.beta + weighted @ k_d.T
+
+        return emulated
+
+    def _matrix_centres(self):
+        # The points Cov[f(x),.] is taken against, with M their weights
+        return self.x_train
+
+    def _emulate(self, X, chunk_size, with_variance):
+        if self.M is None:
+            raise ValueError("M has not been computed. Run compute_M first or provide M.")
+
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        m = X.shape[0]
+        chunk_size = m if chunk_size is None else int(chunk_size)
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer.")
+
+        if self.neighbour_tree is not None and not with_variance:
+            return self._emulate_neighbours(X, chunk_size), None
+
+        # ||x^(j)||^2 is shared by every chunk
+        train_sq_norms = np.einsum("ij,ij->i", self.x_train, self.x_train)
+
+        emulated = np.empty(m, dtype=np.float64)
+        variance = np.empty(m, dtype=np.float64) if with_variance else None
+        for start in range(0, m, chunk_size):
+            X_chunk = X[start:start + chunk_size]
+            chunk = slice(start, start + chunk_size)
+
+            if self.grid is not None:
+                emulated[chunk], chunk_variance = self._emulate_grid(X_chunk, with_variance)
+                if with_variance:
+                    variance[chunk] = chunk_variance
+                continue
+
+            # Compute squared distances between each x and each training point, ||x-x^(j)||^2 = ||x||^2 + ||x^(j)||^2 - 2 x.x^(j)
+            sq_dists = squared_distances(X_chunk, self.x_train, train_sq_norms)
+
+            # Compute covariance matrix k, Cov[f(x),D]_j = sigma^2 exp{-||x-x^(j)||^2/theta^2}
+            k = (self.sigma ** 2) * np.exp(-sq_dists / (self.theta ** 2))
+
+            # Calculate the emulated means, E_D[f(x)] = E[f(x)] + Cov[f(x),D] Var[D]^-1(D - E[D])
+            emulated[chunk] = self.beta + k @ self.M
+
+            if with_variance:
+                # Var_D[f(x)] = sigma^2 - ||L^{-1} Cov[D,f(x)]||^2
+                V = solve_triangular(self.L, k.T, lower=True, check_finite=False)
+                variance[chunk] = (self.sigma ** 2) - np.sum(V ** 2, axis=0)
+
+        if with_variance:
+            np.maximum(variance, 0.0, out=variance)
+
+        return emulated, variance
+
+    def _emulate_neighbours(self, X, chunk_size):
+        """
+        Emulates summing Cov[f(x),D] M only over the training points within neighbour_radius of each x
+        """
+        emulated = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), chunk_size):
+            X_chunk = X[start:start + chunk_size]
+
+            query, train, dists = neighbour_distances(self.neighbour_tree, X_chunk, self.neighbour_radius)
+            k = (self.sigma ** 2) * np.exp(-dists ** 2 / (self.theta ** 2))
+            emulated[start:start + chunk_size] = self.beta + np.bincount(query, weights=k * self.M[train], minlength=len(X_chunk))
+
+        return emulated
+
+    def _emulate_grid(self, X, with_variance):
+        """
+        Emulates using the origin x destination factorisation of the covariance, Cov[f(x),D] = sigma^2 k_o(x) (x) k_d(x),
+        so each point costs O(n_o n_d) without building a covariance row over every training pair
+        """
+        origins, destinations = self.grid
+        half = origins.shape[1]
+
+        k_o = np.exp(-squared_distances(X[:, :half], origins) / (self.theta ** 2))
+        k_d = np.exp(-squared_distances(X[:, half:], destinations) / (self.theta ** 2))
+        M_grid = self.M.reshape(len(origins), len(destinations))
+
+        emulated = self.beta + (self.sigma ** 2) * np.sum((k_o @ M_grid) * k_d, axis=1)
+        if not with_variance:
+            return emulated, None
+
+        # Cov[f(x),D] Var[D]^{-1} Cov[D,f(x)] = sigma^4 sum_ij (Q_o^T k_o)_i^2 (Q_d^T k_d)_j^2 / eigenvalue_ij
+        Q_o, Q_d, eigenvalues = self.kronecker_factors
+        a_sq = (k_o @ Q_o) ** 2
+        b_sq = (k_d @ Q_d) ** 2
+        explained = (self.sigma ** 4) * np.sum((a_sq @ (1.0 / eigenvalues)) * b_sq, axis=1)
+
+        return emulated, (self.sigma ** 2) - explained
+
+
+def _cholesky_with_jitter(K, nugget=0.0, max_tries=8, rebuild=None):
+    """
+    Lower Cholesky factor of K + nugget I
+
+    If K + nugget I is not numerically positive definite (common for the noise-free squared-exponential kernel with
+    long correlation lengths) the nugget is raised step by step until the factorisation succeeds.
+
+    If rebuild is given the factorisation overwrites K, and rebuild() is called for a fresh K after a failed attempt.
+    Otherwise K is left unchanged and the factor is a new array.
+
+    Returns:
+    tuple: (L, the nugget that was used)
+    """
+    scale = float(np.mean(np.diag(K)))
+    for _ in range(max_tries + 1):
+        try:
+            if rebuild is None:
+                return cholesky(K + nugget * np.eye(len(K)), lower=True, check_finite=False), nugget
+            # K is symmetric, so K.T is the same matrix in Fortran order and LAPACK can factorise it without a copy
+            K[np.diag_indices_from(K)] += nugget
+            return cholesky(K.T, lower=True, overwrite_a=True, check_finite=False), nugget
+        except np.linalg.LinAlgError:
+            if rebuild is not None:
+                K = rebuild()
+            nugget = _next_jitter(nugget, scale)
+
+    raise np.linalg.LinAlgError(f"Var[D] is not positive definite even with a nugget of {nugget}.")
+
+
+def _next_jitter(nugget, scale):
+    return max(nugget * 10, scale * 1e-10)
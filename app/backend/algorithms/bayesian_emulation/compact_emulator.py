@@ -0,0 +1,170 @@
+import numpy as np
+from scipy.sparse import csr_matrix, identity
+from scipy.sparse.linalg import splu
+from scipy.spatial import cKDTree
+
+from algorithms.bayesian_emulation.bayesian_emulator import BayesianEmulator, _next_jitter
+from algorithms.bayesian_emulation.kernels import DEFAULT_BLOCK_SIZE, neighbour_distances, wendland, wendland_covariance
+
+
+class CompactBayesianEmulator(BayesianEmulator):
+    def __init__(self, beta, sigma, theta, x_train, D, M=None, nugget=0.0):
+        '''
+        Creates a Bayesian Emulator with a compactly-supported (Wendland) kernel, so Var[D] is sparse
+
+        Travel times are effectively uncorrelated beyond a few correlation lengths. With a kernel that is exactly zero
+        beyond its support radius, Var[D] only holds the pairs of training points within that radius, it is factorised
+        with a sparse LU, and each prediction only touches the training points within the radius of the query.
+        Training and prediction then scale with the local density of training points rather than with n.
+
+        Parameters:
+        beta, sigma, x_train, D, M, nugget :
+            As for BayesianEmulator.
+
+        theta : float
+            The support radius of the kernel: training points further than theta from x do not affect E_D[f(x)].
+            Cov[f(x),f(x')] = sigma^2 phi(||x-x'|| / theta), with phi from kernels.wendland.
+        '''
+        super().__init__(beta, sigma, theta, x_train, D, M=M, nugget=nugget)
+        self.tree = cKDTree(self.x_train)
+        self.lu = None
+
+    def factorise(self, kronecker=None, block_size=DEFAULT_BLOCK_SIZE, dtype=np.float64, memmap_path=None):
+        """
+        Factorises the sparse Var[D] + nugget I, found with a neighbour search over x_train
+
+        The Wendland kernel does not factorise into origin and destination parts, so there is no Kronecker mode. Only the
+        pairs within the support radius are stored, so there are no dense blocks to assemble (block_size is unused), and the
+        sparse LU is held by SuperLU in float64 and in memory.
+        """
+        if kronecker:
+            raise ValueError("The compactly-supported kernel has no Kronecker structure.")
+        if np.dtype(dtype) != np.float64:
+            raise ValueError("The sparse factorisation is only computed in float64.")
+        if memmap_path is not None:
+            raise ValueError("The sparse factorisation cannot be memory-mapped.")
+
+        K = wendland_covariance(self.x_train, self.sigma, self.theta, self.tree)
+
+        # The Wendland kernel is positive definite, so this only fails for duplicated training points
+        nugget = self.nugget
+        while True:
+            try:
+                self.lu = splu((K + nugget * identity(K.shape[0], format="csc")).tocsc(), permc_spec="MMD_AT_PLUS_A")
+                break
+            except RuntimeError:
+                nugget = _next_jitter(nugget, self.sigma ** 2)
+                if nugget > self.sigma ** 2:
+                    raise np.linalg.LinAlgError(f"Var[D] is singular even with a nugget of {nugget}.")
+
+        self.nugget = nugget
+        # Number of stored entries of Var[D], a measure of how local the kernel is for this training set
+        self.nnz = K.nnz
+
+    def solve(self, y):
+        """
+        Solves (Var[D] + nugget I) v = y using the cached sparse factorisation
+        """
+        if self.lu is None:
+            raise ValueError("Var[D] has not been factorised. Run factorise or compute_M first.")
+
+        return self.lu.solve(np.array(y, dtype=np.float64))
+
+    def compute_M(self, kronecker=None, block_size=DEFAULT_BLOCK_SIZE, dtype=np.float64, memmap_path=None):
+        """
+        Computes the matrix M = Var[D]^{-1} (D - E[D]) with the sparse factorisation
+        """
+        self.factorise(kronecker, block_size, dtype, memmap_path)
+        self.M = self.solve(self.D - self.beta)
+
+        return self.M
+
+    def add_observations(self, x_new, d_new):
+        """
+        Adds new known outputs to the emulator
+
+        A sparse LU cannot be extended in place, so Var[D] + nugget I is refactorised over the combined training points.
+        Each new point only adds the entries for the training points within theta of it, so this costs the same as the
+        original sparse factorisation rather than a dense O((n+k)^3) one.
+
+        Parameters:
+        x_new (array-like): The new active inputs, shape (k_samples, n_dimensions)
+        d_new (array-like): The known outputs for x_new, shape (k_samples,)
+
+        Returns:
+        np.ndarray: The updated M
+        """
+        x_new = np.array(x_new, dtype=np.float64, ndmin=2)
+        d_new = np.array(d_new, dtype=np.float64, ndmin=1)
+        if len(x_new) != len(d_new):
+            raise ValueError(f"Got {len(x_new)} new inputs but {len(d_new)} new outputs.")
+        if len(x_new) == 0:
+            return self.M
+
+        self.x_train = np.vstack([self.x_train, x_new])
+        self.D = np.concatenate([self.D, d_new])
+        self.tree = cKDTree(self.x_train)
+
+        return self.compute_M()
+
+    def emulate_batch_with_variance(self, X, chunk_size=None):
+        if self.lu is None:
+            raise ValueError("Var[D] has not been factorised. Run factorise or compute_M first.")
+
+        return self._emulate(X, chunk_size, with_variance=True)
+
+    def emulate_matrix(self, origins, destinations, chunk_size=None):
+        """
+        As BayesianEmulator.emulate_matrix. The Wendland covariance does not factorise over origin and destination,
+        so every pair is emulated through the KD-tree, chunk_size pairs at a time.
+        """
+        origins = np.array(origins, dtype=np.float64, ndmin=2)
+        destinations = np.array(destinations, dtype=np.float64, ndmin=2)
+        X = np.hstack((np.repeat(origins, len(destinations), axis=0), np.tile(destinations, (len(origins), 1))))
+
+        return self.emulate_batch(X, chunk_size).reshape(len(origins), len(destinations))
+
+    def _emulate(self, X, chunk_size, with_variance):
+        if self.M is None:
+            raise ValueError("M has not been computed. Run compute_M first or provide M.")
+
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        m = X.shape[0]
+        chunk_size = m if chunk_size is None else int(chunk_size)
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer.")
+
+        n, d = self.x_train.shape
+        emulated = np.empty(m, dtype=np.float64)
+        variance = np.empty(m, dtype=np.float64) if with_variance else None
+        for start in range(0, m, chunk_size):
+            X_chunk = X[start:start + chunk_size]
+            chunk = slice(start, start + chunk_size)
+
+            # Cov[f(x),D]_j = sigma^2 phi(||x-x^(j)|| / theta), only for the x^(j) within theta of x
+            query, train, dists = neighbour_distances(self.tree, X_chunk, self.theta)
+            k = (self.sigma ** 2) * wendland(dists / self.theta, d)
+
+            # E_D[f(x)] = E[f(x)] + Cov[f(x),D] M, summed over the neighbours of each x
+            emulated[chunk] = self.beta + np.bincount(query, weights=k * self.M[train], minlength=len(X_chunk))
+
+            if with_variance:
+                # Var_D[f(x)] = sigma^2 - Cov[f(x),D] Var[D]^{-1} Cov[D,f(x)]
+                # One query at a time, so only a single length-n right-hand side is ever dense rather than chunk x n
+                k_rows = csr_matrix((k, (query, train)), shape=(len(X_chunk), n))
+                explained = np.zeros(len(X_chunk), dtype=np.float64)
+                rhs = np.zeros(n, dtype=np.float64)
+                for i in range(len(X_chunk)):
+                    row = slice(k_rows.indptr[i], k_rows.indptr[i + 1])
+                    neighbours, k_i = k_rows.indices[row], k_rows.data[row]
+                    if not len(neighbours):
+                        continue
+                    rhs[neighbours] = k_i
+                    explained[i] = k_i @ self.lu.solve(rhs)[neighbours]
+                    rhs[neighbours] = 0.0
+                variance[chunk] = (self.sigma ** 2) - explained
+
+        if with_variance:
+            np.maximum(variance, 0.0, out=variance)
+
+        return emulated, variance
@@ -1,4 +1,22 @@
-from pyproj import Transformer
+from functools import lru_cache
+import os
+import numpy as np
+
+# Big Ben, the origin of the local coordinates
+BASE_LAT, BASE_LNG = 51.5007, -0.1246
+# The box pubs are searched for in by populate_pubs.py, ((lat_min, lat_max), (lng_min, lng_max))
+LONDON_BOUNDS = ((51.3849401, 51.6723432), (-0.563, 0.278))
+# Which transformer get_coord_transformer returns, see TRANSFORMER_BACKENDS
+COORD_TRANSFORMER_BACKEND = os.getenv("COORD_TRANSFORMER_BACKEND", "pyproj")
+
+
+@lru_cache(maxsize=None)
+def _get_transformer(source_crs, target_crs):
+    # Building a pyproj Transformer looks up the projection database, so build each one once per process.
+    # pyproj is imported here so the local-plane backend never loads it for points inside its bounds
+    from pyproj import Transformer
+    return Transformer.from_crs(source_crs, target_crs)
+
 
 class CoordTransformer:
     def __init__(self):
@@ -6,9 +24,192 @@ class CoordTransformer:
         To make coordinates uniform, we measure every point in Cartesian distance using a standard projection
         We choose a transformer from WGS84 (Lat/Lon) to British National Grid (EPSG:27700)
         Then use this to calculate the distance north/east of each point from Big Ben (51.5007,0.1246)
+
+        Use get_coord_transformer for the shared instance rather than building a new one.
         '''
-        self.transformer = Transformer.from_crs("EPSG:4326", "EPSG:27700")
-        self.x_base, self.y_base, _ = self.transformer.transform(51.5007,-0.1246, 0)
+        self.transformer = _get_transformer("EPSG:4326", "EPSG:27700")
+        self.inverse_transformer = _get_transformer("EPSG:27700", "EPSG:4326")
+        self.x_base, self.y_base, _ = self.transformer.transform(BASE_LAT, BASE_LNG, 0)
+
     def transform(self, lat, lng):
         x, y, _ = self.transformer.transform(lat, lng, 0)
-        return x-self.x_base, y-self.y_base
\ No newline at end of file
+        return x-self.x_base, y-self.y_base
+
+    def transform_many(self, lats, lngs):
+        """
+        Projects arrays of latitudes and longitudes in one call
+
+        Returns:
+        tuple: (x, y) arrays of the same shape as lats, in metres east and north of Big Ben
+        """
+        x, y = self.transformer.transform(np.asarray(lats, dtype=np.float64), np.asarray(lngs, dtype=np.float64))
+        return x - self.x_base, y - self.y_base
+
+    def inverse(self, x, y):
+        """
+        The (lat, lng) of a point x metres east and y metres north of Big Ben, the inverse of transform
+        """
+        lat, lng = self.inverse_transformer.transform(x + self.x_base, y + self.y_base)
+        return lat, lng
+
+    def inverse_many(self, xs, ys):
+        """
+        The inverse of transform_many
+
+        Returns:
+        tuple: (lats, lngs) arrays of the same shape as xs
+        """
+        return self.inverse_transformer.transform(np.asarray(xs, dtype=np.float64) + self.x_base, np.asarray(ys, dtype=np.float64) + self.y_base)
+
+
+def _monomials(u, v, degree):
+    # u^i v^j for i + j <= degree, in the order the local-plane coefficients are stored. Works on arrays or plain floats
+    u_powers = [np.ones_like(u) if isinstance(u, np.ndarray) else 1.0]
+    v_powers = [np.ones_like(v) if isinstance(v, np.ndarray) else 1.0]
+    for _ in range(degree):
+        u_powers.append(u_powers[-1] * u)
+        v_powers.append(v_powers[-1] * v)
+    return [u_powers[i] * v_powers[j] for i in range(degree + 1) for j in range(degree + 1 - i)]
+
+
+def _polynomial(coefficients, u, v, degree):
+    return sum(c * term for c, term in zip(coefficients, _monomials(u, v, degree)))
+
+
+def fit_local_plane(bounds=LONDON_BOUNDS, degree=4, n_grid=41):
+    """
+    Fits polynomials to the pyproj transform over a lat/lng box, in both directions
+
+    The forward fit maps (lat, lng), scaled to [-1, 1] over the box, to metres from Big Ben, and the inverse fit maps
+    the projected box, scaled the same way, back to (lat, lng). Both are least squares over an n_grid x n_grid grid.
+
+    Parameters:
+    bounds (tuple): ((lat_min, lat_max), (lng_min, lng_max))
+    degree (int): Total degree of the polynomials
+    n_grid (int): Grid points along each side of the box
+
+    Returns:
+    dict: The fit, as stored in local_plane_coefficients.py
+    """
+    (lat_min, lat_max), (lng_min, lng_max) = bounds
+    lat_centre, lat_half_range = (lat_min + lat_max) / 2, (lat_max - lat_min) / 2
+    lng_centre, lng_half_range = (lng_min + lng_max) / 2, (lng_max - lng_min) / 2
+
+    grid = np.linspace(-1, 1, n_grid)
+    u, v = (axis.ravel() for axis in np.meshgrid(grid, grid))
+    x, y = CoordTransformer().transform_many(lat_centre + u * lat_half_range, lng_centre + v * lng_half_range)
+
+    x_centre, x_half_range = float(x.max() + x.min()) / 2, float(x.max() - x.min()) / 2
+    y_centre, y_half_range = float(y.max() + y.min()) / 2, float(y.max() - y.min()) / 2
+
+    forward = np.column_stack(_monomials(u, v, degree))
+    inverse = np.column_stack(_monomials((x - x_centre) / x_half_range, (y - y_centre) / y_half_range, degree))
+    return {
+        "DEGREE": degree,
+        "BOUNDS": ((lat_min, lat_max), (lng_min, lng_max)),
+        "LAT_CENTRE": lat_centre, "LAT_HALF_RANGE": lat_half_range,
+        "LNG_CENTRE": lng_centre, "LNG_HALF_RANGE": lng_half_range,
+        "X_CENTRE": x_centre, "X_HALF_RANGE": x_half_range,
+        "Y_CENTRE": y_centre, "Y_HALF_RANGE": y_half_range,
+        "FORWARD_X": tuple(np.linalg.lstsq(forward, x, rcond=None)[0].tolist()),
+        "FORWARD_Y": tuple(np.linalg.lstsq(forward, y, rcond=None)[0].tolist()),
+        "INVERSE_LAT": tuple(np.linalg.lstsq(inverse, u * lat_half_range + lat_centre, rcond=None)[0].tolist()),
+        "INVERSE_LNG": tuple(np.linalg.lstsq(inverse, v * lng_half_range + lng_centre, rcond=None)[0].tolist()),
+    }
+
+
+class LocalPlaneTransformer:
+    def __init__(self, fit=None):
+        '''
+        A pure NumPy stand-in for CoordTransformer inside the pub search area, from polynomials fitted to pyproj
+
+        Inside the fit's bounds (LONDON_BOUNDS by default) the error against CoordTransformer is at most
+        MAX_FORWARD_ERROR_METRES (a few micrometres) projecting and MAX_INVERSE_ERROR_DEGREES (under a millimetre)
+        inverting, see local_plane_coefficients.py. Points outside the bounds fall back to CoordTransformer, so pyproj
+        is only loaded if one is ever seen.
+
+        fit (dict): As returned by fit_local_plane, the precomputed fit in local_plane_coefficients.py if not given
+        '''
+        if fit is None:
+            from algorithms.bayesian_emulation import local_plane_coefficients
+            fit = {name: getattr(local_plane_coefficients, name) for name in dir(local_plane_coefficients) if name.isupper()}
+        self.fit = fit
+        self.degree = fit["DEGREE"]
+        (self.lat_min, self.lat_max), (self.lng_min, self.lng_max) = fit["BOUNDS"]
+
+    def _fallback(self):
+        return get_coord_transformer("pyproj")
+
+    def _inside(self, lats, lngs):
+        return (lats >= self.lat_min) & (lats <= self.lat_max) & (lngs >= self.lng_min) & (lngs <= self.lng_max)
+
+    def transform(self, lat, lng):
+        # Plain float arithmetic, as NumPy's per-call overhead dominates for a single point
+        lat, lng = float(lat), float(lng)
+        if not self._inside(lat, lng):
+            return self._fallback().transform(lat, lng)
+        fit = self.fit
+        u = (lat - fit["LAT_CENTRE"]) / fit["LAT_HALF_RANGE"]
+        v = (lng - fit["LNG_CENTRE"]) / fit["LNG_HALF_RANGE"]
+        return _polynomial(fit["FORWARD_X"], u, v, self.degree), _polynomial(fit["FORWARD_Y"], u, v, self.degree)
+
+    def transform_many(self, lats, lngs):
+        """
+        As CoordTransformer.transform_many
+        """
+        fit = self.fit
+        lats, lngs = np.broadcast_arrays(np.asarray(lats, dtype=np.float64), np.asarray(lngs, dtype=np.float64))
+        u = (lats - fit["LAT_CENTRE"]) / fit["LAT_HALF_RANGE"]
+        v = (lngs - fit["LNG_CENTRE"]) / fit["LNG_HALF_RANGE"]
+        x = _polynomial(fit["FORWARD_X"], u, v, self.degree)
+        y = _polynomial(fit["FORWARD_Y"], u, v, self.degree)
+
+        outside = ~self._inside(lats, lngs)
+        if outside.any():
+            x, y = np.array(x, dtype=np.float64), np.array(y, dtype=np.float64)
+            x[outside], y[outside] = self._fallback().transform_many(lats[outside], lngs[outside])
+        return x, y
+
+    def inverse(self, x, y):
+        fit = self.fit
+        s = (float(x) - fit["X_CENTRE"]) / fit["X_HALF_RANGE"]
+        t = (float(y) - fit["Y_CENTRE"]) / fit["Y_HALF_RANGE"]
+        lat, lng = _polynomial(fit["INVERSE_LAT"], s, t, self.degree), _polynomial(fit["INVERSE_LNG"], s, t, self.degree)
+        if not self._inside(lat, lng):
+            return self._fallback().inverse(x, y)
+        return lat, lng
+
+    def inverse_many(self, xs, ys):
+        """
+        As CoordTransformer.inverse_many
+        """
+        fit = self.fit
+        xs, ys = np.broadcast_arrays(np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64))
+        s = (xs - fit["X_CENTRE"]) / fit["X_HALF_RANGE"]
+        t = (ys - fit["Y_CENTRE"]) / fit["Y_HALF_RANGE"]
+        lats = _polynomial(fit["INVERSE_LAT"], s, t, self.degree)
+        lngs = _polynomial(fit["INVERSE_LNG"], s, t, self.degree)
+
+        # The projected box is not square, so check the result rather than the inputs
+        outside = ~self._inside(lats, lngs)
+        if outside.any():
+            lats, lngs = np.array(lats, dtype=np.float64), np.array(lngs, dtype=np.float64)
+            lats[outside], lngs[outside] = self._fallback().inverse_many(xs[outside], ys[outside])
+        return lats, lngs
+
+
+TRANSFORMER_BACKENDS = {
+    "pyproj": CoordTransformer,
+    "local-plane": LocalPlaneTransformer,
+}
+
+
+@lru_cache(maxsize=None)
+def get_coord_transformer(backend=None):
+    """
+    The transformer shared by the whole process, from COORD_TRANSFORMER_BACKEND unless a backend is given
+    """
+    backend = backend or COORD_TRANSFORMER_BACKEND
+    if backend not in TRANSFORMER_BACKENDS:
+        raise ValueError(f"Unknown coordinate transformer backend {backend}, expected one of {list(TRANSFORMER_BACKENDS)}.")
+    return TRANSFORMER_BACKENDS[backend]()
@@ -10,7 +10,7 @@ from dotenv import load_dotenv
 import os
 import csv
 import numpy as np
-from algorithms.bayesian_emulation.coord_transformer import CoordTransformer
+from algorithms.bayesian_emulation.coord_transformer import get_coord_transformer
 from model_extensions import BayesianModelExtensions
 import matplotlib.pyplot as plt
 from matplotlib.colors import TwoSlopeNorm 
@@ -49,25 +49,9 @@ def to_x_input(origin, destination, transformer):
 
 with app.app_context():    
 
-    transformer = CoordTransformer()
+    transformer = get_coord_transformer()
 
-    model:BayesianModel = BayesianModelExtensions.get_bayesian_model_by_name("initial-set-5")
-    
-    x_train = []
-    row = []
-    row_index = 0
-    for el in model.x_train_elements:
-        if el.row > row_index:
-            x_train.append(row)
-            row = []
-            row_index += 1
-        row.append(el.value)
-    x_train.append(row)
-    
-    D = [el.value for el in model.d_elements]
-    M = [el.value for el in model.m_vector_elements]
-
-    emulator = BayesianEmulator(model.beta, model.sigma, model.theta, x_train, D, M)
+    emulator = BayesianModelExtensions.get_bayesian_emulator_by_name("initial-set-5")
 
     origin = Coords(51.48827, -0.11138) # Kennington
     destination = Coords(51.52118, -0.13946) # BT Tower
@@ -89,12 +73,14 @@ with app.app_context():
     y_values = np.linspace(y1, y2, grid_size)
     X, Y = np.meshgrid(x_values, y_values)
 
-    # Calculate distances from the starting position to each grid point
-    distances = np.zeros_like(X)
-
-    for i in range(grid_size):
-        for j in range(grid_size):
-            distances[i,j] = (emulator.emulate([start_x, start_y, X[i,j], Y[i,j]])) / 3600 # to hrs
+    # Calculate distances from the starting position to each grid point in one batched emulation
+    grid_inputs = np.column_stack([
+        np.full(X.size, start_x),
+        np.full(X.size, start_y),
+        X.ravel(),
+        Y.ravel()
+    ])
+    distances = emulator.emulate_batch(grid_inputs).reshape(X.shape) / 3600 # to hrs
 
     # Set up a diverging colormap (blue for negative, red for positive)
     cmap = plt.get_cmap('RdBu')  # Alternatives: 'coolwarm', 'bwr', 'seismic'
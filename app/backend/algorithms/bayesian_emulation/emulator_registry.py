@@ -0,0 +1,189 @@
+from collections import OrderedDict
+import threading
+
+# Default memory budget for the emulators a registry keeps loaded
+DEFAULT_MEMORY_BUDGET_BYTES = 512 * 1024 ** 2
+
+
+def emulator_nbytes(emulator):
+    """
+    Approximate memory held by an emulator: its training data, M, the factor of Var[D] and any Kronecker factors
+    """
+    arrays = [emulator.x_train, emulator.D, emulator.M, emulator.L, *(emulator.kronecker_factors or ())]
+    return sum(array.nbytes for array in arrays if array is not None)
+
+
+def freeze_emulator(emulator):
+    """
+    Marks an emulator's arrays read-only so one instance can be shared safely between requests and threads
+    """
+    for array in (emulator.x_train, emulator.D, emulator.M, emulator.L, *(emulator.kronecker_factors or ())):
+        if array is not None:
+            array.flags.writeable = False
+    return emulator
+
+
+class EmulatorRegistry:
+    def __init__(self, load, current_versions, memory_budget_bytes=DEFAULT_MEMORY_BUDGET_BYTES):
+        '''
+        Keeps trained emulators loaded once per process and shares them read-only, most recently used first under a memory budget
+
+        A newly stored version of a loaded model is built in the background by refresh (or the watcher) and swapped in with a
+        single assignment, so get never waits on a reload and callers holding the previous emulator can keep using it.
+
+        Parameters:
+        load : callable
+            load(name) -> (version, emulator), or (None, None) if there is no model with that name.
+
+        current_versions : callable
+            current_versions(names) -> {name: version} for the stored models, used to detect retrained models.
+
+        memory_budget_bytes : int
+            Least recently used emulators are dropped once the loaded ones use more than this (see emulator_nbytes).
+            The most recently used emulator is always kept, even if it is larger than the budget.
+        '''
+        self.load = load
+        self.current_versions = current_versions
+        self.memory_budget_bytes = memory_budget_bytes
+
+        # name -> (version, emulator, nbytes), least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per name being loaded, so concurrent misses for a model load it once
+        self._load_locks = {}
+
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+    def get(self, name):
+        """
+        The emulator for a model, loading it on first use
+
+        Returns:
+        BayesianEmulator: Shared and read-only, or None if there is no model with that name
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                self._entries.move_to_end(name)
+                return entry[1]
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None:
+                    self._entries.move_to_end(name)
+                    return entry[1]
+
+            version, emulator = self.load(name)
+            if emulator is not None:
+                self._put(name, version, emulator)
+            return emulator
+
+    def version(self, name):
+        """
+        The version of a loaded model, or None if it is not loaded
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            return None if entry is None else entry[0]
+
+    def loaded(self):
+        """
+        Names of the loaded models, least recently used first
+        """
+        with self._lock:
+            return list(self._entries)
+
+    def nbytes(self):
+        with self._lock:
+            return sum(entry[2] for entry in self._entries.values())
+
+    def preload(self, names):
+        """
+        Loads models ahead of their first request, e.g. while a worker starts
+        """
+        return {name: self.get(name) for name in names}
+
+    def evict(self, name):
+        with self._lock:
+            return self._entries.pop(name, None) is not None
+
+    def refresh(self):
+        """
+        Reloads every loaded model whose stored version has changed, swapping each in once it is built
+
+        Returns:
+        list: Names of the models that were swapped
+        """
+        with self._lock:
+            loaded = {name: entry[0] for name, entry in self._entries.items()}
+        if not loaded:
+            return []
+
+        swapped = []
+        stored = self.current_versions(list(loaded))
+        for name, version in loaded.items():
+            if name not in stored:
+                # Deleted, so stop serving it
+                self.evict(name)
+            elif stored[name] != version:
+                new_version, emulator = self.load(name)
+                if emulator is not None:
+                    self._put(name, new_version, emulator, only_if_loaded=True)
+                    swapped.append(name)
+        return swapped
+
+    def start_watcher(self, poll_seconds, context=None):
+        """
+        Runs refresh every poll_seconds on a daemon thread
+
+        Parameters:
+        poll_seconds (float): Time between checks for retrained models
+        context (callable): Context manager factory entered around each refresh, e.g. app.app_context for database access
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return self._watcher
+
+        def watch():
+            while not self._stop_watching.wait(poll_seconds):
+                try:
+                    if context is None:
+                        self.refresh()
+                    else:
+                        with context():
+                            self.refresh()
+                except Exception as e:
+                    # Keep serving the loaded models, and try again on the next poll
+                    print(f"Failed to refresh emulators: {e}")
+
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=watch, name="emulator-registry-watcher", daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+    def stop_watcher(self):
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _put(self, name, version, emulator, only_if_loaded=False):
+        entry = (version, freeze_emulator(emulator), emulator_nbytes(emulator))
+        with self._lock:
+            if only_if_loaded:
+                # A swap keeps the model's place in the recently used order
+                if name not in self._entries:
+                    return
+                self._entries[name] = entry
+            else:
+                self._entries[name] = entry
+                self._entries.move_to_end(name)
+            self._evict_over_budget()
+
+    def _evict_over_budget(self):
+        total = sum(entry[2] for entry in self._entries.values())
+        while total > self.memory_budget_bytes and len(self._entries) > 1:
+            _, (_, _, nbytes) = self._entries.popitem(last=False)
+            total -= nbytes
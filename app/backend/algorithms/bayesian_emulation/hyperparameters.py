@@ -0,0 +1,133 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy.linalg import cho_solve, cholesky
+from scipy.optimize import minimize
+
+from algorithms.bayesian_emulation.bayesian_emulator import _cholesky_with_jitter
+from algorithms.bayesian_emulation.kernels import squared_distances
+
+# Search range for sigma and theta, relative to the spread of D and of the training inputs
+SCALE_BOUNDS = (1e-3, 1e3)
+
+
+def log_marginal_likelihood(params, sq_dists, D, nugget=0.0):
+    """
+    Log marginal likelihood log p(D | beta, sigma, theta) of the Gaussian Process and its analytic gradient
+
+    With K = sigma^2 C + nugget I, C_jk = exp{-||x^(j)-x^(k)||^2 / theta^2}, y = D - beta and alpha = K^{-1} y,
+        log p = -1/2 y^T alpha - 1/2 log|K| - n/2 log(2 pi)
+        d log p / d p = 1/2 tr((alpha alpha^T - K^{-1}) dK/dp),   d log p / d beta = 1^T alpha
+    Everything comes from one Cholesky factorisation of K. No jitter is added, so every value is for exactly the nugget
+    given, and a K that is not numerically positive definite raises np.linalg.LinAlgError.
+
+    Parameters:
+    params (array-like): [beta, log(sigma), log(theta)]
+    sq_dists (np.ndarray): Pairwise squared distances of the training inputs, shape (n_samples, n_samples)
+    D (np.ndarray): The known outputs, shape (n_samples,)
+    nugget (float): Value added to the diagonal of K
+
+    Returns:
+    tuple: (log p, gradient with respect to params)
+    """
+    beta, log_sigma, log_theta = params
+    sigma_sq = np.exp(2 * log_sigma)
+    theta_sq = np.exp(2 * log_theta)
+    n = len(D)
+
+    C = np.exp(-sq_dists / theta_sq)
+    L = cholesky(sigma_sq * C + nugget * np.eye(n), lower=True, check_finite=False)
+
+    y = D - beta
+    alpha = cho_solve((L, True), y, check_finite=False)
+    K_inv = cho_solve((L, True), np.eye(n), check_finite=False)
+    lml = -0.5 * y @ alpha - np.sum(np.log(np.diag(L))) - 0.5 * n * np.log(2 * np.pi)
+
+    # dK/dlog(sigma) = 2 sigma^2 C and dK/dlog(theta) = sigma^2 C o 2||x^(j)-x^(k)||^2 / theta^2
+    W = np.outer(alpha, alpha) - K_inv
+    dK_dlog_sigma = 2 * sigma_sq * C
+    dK_dlog_theta = sigma_sq * C * (2 * sq_dists / theta_sq)
+    gradient = np.array([
+        np.sum(alpha),
+        0.5 * np.sum(W * dK_dlog_sigma),
+        0.5 * np.sum(W * dK_dlog_theta),
+    ])
+
+    return lml, gradient
+
+
+def fit_hyperparameters(x_train, D, initial=None, n_starts=8, n_workers=None, nugget=0.0, seed=0):
+    """
+    Fits beta, sigma and theta by maximising the log marginal likelihood from several starting points
+
+    Each start is an L-BFGS-B run with analytic gradients. The starts are spread log-uniformly around the spread of D
+    and of the training inputs, and run in parallel on a process pool. Every run uses the same nugget: the one given,
+    raised once if Var[D] at the first start needs jitter to factorise. Parameters that would need more are treated as
+    infeasible, so the likelihood reported is always for the nugget returned.
+
+    Parameters:
+    x_train (array-like): The training inputs, shape (n_samples, n_dimensions)
+    D (array-like): The known outputs, shape (n_samples,)
+    initial (tuple): Optional (beta, sigma, theta) guess, used as the first start
+    n_starts (int): Number of starting points
+    n_workers (int): Number of processes, None for one per CPU and 1 to run in this process
+    nugget (float): Value added to the diagonal of Var[D]
+    seed (int): Seed for the random starting points
+
+    Returns:
+    dict: The best {"beta", "sigma", "theta", "log_marginal_likelihood"} found, and the "nugget" it was found with
+    """
+    x_train = np.array(x_train, dtype=np.float64, ndmin=2)
+    D = np.array(D, dtype=np.float64)
+
+    sq_dists = squared_distances(x_train, x_train)
+    d_scale = max(float(np.std(D)), 1e-12)
+    x_scale = max(float(np.sqrt(np.median(sq_dists[np.triu_indices(len(D), k=1)]))) if len(D) > 1 else 1.0, 1e-12)
+    bounds = [
+        (-np.inf, np.inf),
+        (np.log(d_scale * SCALE_BOUNDS[0]), np.log(d_scale * SCALE_BOUNDS[1])),
+        (np.log(x_scale * SCALE_BOUNDS[0]), np.log(x_scale * SCALE_BOUNDS[1])),
+    ]
+
+    rng = np.random.default_rng(seed)
+    starts = [[np.mean(D), np.log(d_scale), np.log(x_scale)]]
+    if initial is not None:
+        beta, sigma, theta = initial
+        starts.insert(0, [float(beta), np.log(float(sigma)), np.log(float(theta))])
+    while len(starts) < n_starts:
+        starts.append([rng.normal(np.mean(D), d_scale), np.log(d_scale) + rng.uniform(-2, 2), np.log(x_scale) + rng.uniform(-2, 2)])
+    lower, upper = zip(*bounds)
+    starts = [np.clip(start, lower, upper) for start in starts[:max(n_starts, 1)]]
+
+    _, log_sigma, log_theta = starts[0]
+    _, nugget = _cholesky_with_jitter(np.exp(2 * log_sigma) * np.exp(-sq_dists / np.exp(2 * log_theta)), nugget)
+
+    jobs = [(start, sq_dists, D, nugget, bounds) for start in starts]
+    if n_workers == 1:
+        results = [_optimise_from(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(_optimise_from, jobs))
+
+    params, lml = max(results, key=lambda result: result[1])
+    return {
+        "beta": float(params[0]),
+        "sigma": float(np.exp(params[1])),
+        "theta": float(np.exp(params[2])),
+        "log_marginal_likelihood": float(lml),
+        "nugget": float(nugget),
+    }
+
+
+def _optimise_from(job):
+    # Module level so it can be sent to the process pool
+    start, sq_dists, D, nugget, bounds = job
+
+    def objective(params):
+        try:
+            lml, gradient = log_marginal_likelihood(params, sq_dists, D, nugget)
+        except np.linalg.LinAlgError:
+            return np.inf, np.zeros_like(params)
+        return -lml, -gradient
+
+    result = minimize(objective, start, jac=True, method="L-BFGS-B", bounds=bounds)
+    return result.x, -result.fun
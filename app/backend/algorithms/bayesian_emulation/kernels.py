@@ -0,0 +1,130 @@
+import numpy as np
+from scipy.sparse import csc_matrix
+from scipy.spatial import cKDTree
+
+# Default number of rows of the covariance matrix assembled at once
+DEFAULT_BLOCK_SIZE = 1024
+
+
+def squared_distances(A, B, B_sq_norms=None):
+    """
+    Pairwise squared (Euclidean) distances between the rows of A and B, shape (len(A), len(B))
+
+    Uses ||a-b||^2 = ||a||^2 + ||b||^2 - 2 a.b so the work is a single matrix product with no (len(A), len(B), d) intermediate,
+    and the norms are added in place so the result is the only (len(A), len(B)) allocation.
+    Rounding can make the identity slightly negative for coincident points, so the result is clipped at zero.
+    """
+    if B_sq_norms is None:
+        B_sq_norms = np.einsum("ij,ij->i", B, B)
+    A_sq_norms = np.einsum("ij,ij->i", A, A)
+
+    sq_dists = A @ B.T
+    sq_dists *= -2.0
+    sq_dists += A_sq_norms[:, np.newaxis]
+    sq_dists += B_sq_norms[np.newaxis, :]
+    np.maximum(sq_dists, 0.0, out=sq_dists)
+    return sq_dists
+
+
+def squared_exponential_covariance(X, sigma, theta, block_size=DEFAULT_BLOCK_SIZE, dtype=np.float64, out=None):
+    """
+    Assembles Var[D]_jk = sigma^2 exp{-||x^(j)-x^(k)||^2 / theta^2} in row blocks, writing each block straight into out
+
+    Only one (block_size, n) float64 block exists at a time besides the result, so peak memory is
+    n^2 * itemsize(dtype) + block_size * n * 8 bytes, see estimate_covariance_memory.
+
+    Parameters:
+    X (array-like): The training inputs, shape (n_samples, n_dimensions)
+    sigma, theta (float): The Gaussian Process standard deviation and correlation length
+    block_size (int): Number of rows assembled at once
+    dtype: dtype of the result when out is not given, e.g. np.float32 to halve its size
+    out (np.ndarray): Preallocated (n_samples, n_samples) array to fill, e.g. an np.memmap
+
+    Returns:
+    np.ndarray: out, or a new array if out was not given
+    """
+    X = np.array(X, dtype=np.float64, ndmin=2)
+    n = len(X)
+    if block_size < 1:
+        raise ValueError("block_size must be a positive integer.")
+    if out is None:
+        out = np.empty((n, n), dtype=dtype)
+    elif out.shape != (n, n):
+        raise ValueError(f"out has shape {out.shape}, expected {(n, n)}.")
+
+    sq_norms = np.einsum("ij,ij->i", X, X)
+    scale = -1.0 / float(theta) ** 2
+    for start in range(0, n, block_size):
+        block = squared_distances(X[start:start + block_size], X, sq_norms)
+        block *= scale
+        np.exp(block, out=block)
+        block *= float(sigma) ** 2
+        out[start:start + block_size] = block
+
+    return out
+
+
+def estimate_covariance_memory(n, block_size=DEFAULT_BLOCK_SIZE, dtype=np.float64):
+    """
+    Peak bytes needed to assemble and factorise an n x n covariance with squared_exponential_covariance,
+    for sizing training jobs before running them
+
+    The factor overwrites the covariance in place, so this is the covariance itself plus one float64 row block.
+    """
+    return n * n * np.dtype(dtype).itemsize + min(block_size, n) * n * np.dtype(np.float64).itemsize
+
+
+def wendland(r, n_dimensions):
+    """
+    Wendland's compactly-supported correlation, phi(r) = (1-r)^(l+1) ((l+1) r + 1) with l = floor(n_dimensions/2) + 2
+
+    It is positive definite in up to n_dimensions dimensions, twice differentiable, and exactly zero for r >= 1.
+
+    Parameters:
+    r (array-like): Distances divided by the support radius
+    n_dimensions (int): Dimension of the inputs the distances were measured in
+    """
+    l = n_dimensions // 2 + 2
+    r = np.minimum(np.asarray(r, dtype=np.float64), 1.0)
+    return (1.0 - r) ** (l + 1) * ((l + 1) * r + 1.0)
+
+
+def neighbour_distances(tree, X, radius):
+    """
+    Every (query point, training point) pair within radius of each other, found through a KD-tree over the training points
+
+    Parameters:
+    tree (cKDTree): KD-tree over the training points
+    X (array-like): The query points, shape (m_samples, n_dimensions)
+    radius (float): Largest distance to return
+
+    Returns:
+    tuple: (query indices, training indices, distances), each shape (n_pairs,)
+    """
+    pairs = cKDTree(np.array(X, dtype=np.float64, ndmin=2)).sparse_distance_matrix(tree, radius, output_type="ndarray")
+    return pairs["i"], pairs["j"], pairs["v"]
+
+
+def wendland_covariance(X, sigma, radius, tree=None):
+    """
+    Sparse Var[D]_jk = sigma^2 phi(||x^(j)-x^(k)|| / radius) for the Wendland kernel, storing only the pairs within radius
+
+    The pairs come from a KD-tree neighbour search, so the cost is proportional to the number of neighbouring pairs
+    rather than n^2.
+
+    Returns:
+    scipy.sparse.csc_matrix: Var[D], shape (n_samples, n_samples)
+    """
+    X = np.array(X, dtype=np.float64, ndmin=2)
+    n, d = X.shape
+    tree = cKDTree(X) if tree is None else tree
+
+    pairs = tree.query_pairs(radius, output_type="ndarray")
+    j, k = pairs[:, 0], pairs[:, 1]
+    values = float(sigma) ** 2 * wendland(np.linalg.norm(X[j] - X[k], axis=1) / float(radius), d)
+
+    diagonal = np.arange(n)
+    rows = np.concatenate([j, k, diagonal])
+    cols = np.concatenate([k, j, diagonal])
+    data = np.concatenate([values, values, np.full(n, float(sigma) ** 2)])
+    return csc_matrix((data, (rows, cols)), shape=(n, n))
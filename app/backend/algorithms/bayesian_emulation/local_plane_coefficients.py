@@ -0,0 +1,85 @@
+# Generated by training/fit_local_plane.py, do not edit by hand.
+# Degree 4 polynomials fitted to the pyproj EPSG:4326 -> EPSG:27700 transform on a 41 x 41 grid over
+# LONDON_BOUNDS, see LocalPlaneTransformer in coord_transformer.py. The maximum errors were measured against pyproj
+# at 200000 random points in the box, and doubled.
+
+DEGREE = 4
+BOUNDS = ((51.3849401, 51.6723432), (-0.563, 0.278))
+LAT_CENTRE = 51.52864165
+LAT_HALF_RANGE = 0.1437015499999994
+LNG_CENTRE = -0.14249999999999996
+LNG_HALF_RANGE = 0.4205
+X_CENTRE = -1230.519647791516
+X_HALF_RANGE = 29572.715412281686
+Y_CENTRE = 3158.719797322614
+Y_HALF_RANGE = 16720.55310828038
+FORWARD_X = (
+    -1321.2252023899043,
+    29167.164833245264,
+    -0.7820736564215099,
+    -0.05932055237960712,
+    -4.9512653156453256e-05,
+    -405.6881400026454,
+    -91.89542053988662,
+    -0.014537393062033072,
+    -0.0010958462070822378,
+    -0.40880933266964514,
+    -0.09235753470664647,
+    6.611467607941661e-05,
+    0.0004212035253278959,
+    9.562999804608888e-05,
+    2.310833150658299e-07,
+)
+FORWARD_Y = (
+    3075.536841799068,
+    740.4652882198793,
+    83.86413354031227,
+    0.008844686222339956,
+    0.0005000408088426337,
+    15980.185874455594,
+    -0.8569728174569438,
+    -0.09750601991866906,
+    -0.00010850945431293062,
+    0.17645536771756792,
+    -0.009324315287566973,
+    -0.001055272229097822,
+    -6.76506317073776e-05,
+    3.5456026994919467e-06,
+    -3.724737413034428e-07,
+)
+INVERSE_LAT = (
+    51.529368487659035,
+    0.15026231344094965,
+    -2.197381969260948e-06,
+    -2.2309683759562814e-10,
+    7.622986676888014e-14,
+    -0.006751780611451081,
+    -3.612450914284747e-05,
+    -1.1835287390511543e-07,
+    -4.731185872710129e-10,
+    -0.0007733416892276906,
+    -4.132158151715951e-06,
+    -1.3495290893705855e-08,
+    2.3404120336826268e-07,
+    2.473054429856108e-09,
+    1.3360644200046437e-08,
+)
+INVERSE_LNG = (
+    -0.14116270296711203,
+    0.006120358788220544,
+    2.652574758368949e-05,
+    1.012062943374439e-07,
+    3.9677840198896256e-10,
+    0.42607864004198975,
+    0.0014011262474921858,
+    6.062445795992722e-06,
+    2.3072676438549168e-08,
+    -8.297533461944256e-05,
+    -9.497781693589376e-07,
+    -7.4476832610324774e-09,
+    -6.3215868197164886e-06,
+    -7.21764649055474e-08,
+    3.8828030597460885e-09,
+)
+MAX_FORWARD_ERROR_METRES = 3e-06
+MAX_INVERSE_ERROR_DEGREES = 1.8e-10
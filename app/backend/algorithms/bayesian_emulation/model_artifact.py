@@ -0,0 +1,157 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import numpy as np
+
+from algorithms.bayesian_emulation.bayesian_emulator import BayesianEmulator
+
+# Layout: MAGIC, then <format version, header length> as little-endian uint32, then the JSON header padded with spaces so the
+# payload starts on an ALIGNMENT boundary, then the payload: each array as C-ordered little-endian float64 at an aligned offset
+MAGIC = b"PPEMUART"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+ARRAY_NAMES = ("x_train", "D", "M", "L")
+_PREAMBLE = struct.Struct("<8sII")
+_DTYPE = np.dtype("<f8")
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def pack_model_artifact(beta, sigma, theta, x_train, D, M, L=None, nugget=0.0):
+    """
+    Serialises a trained emulator to the binary model artifact format
+
+    Parameters:
+    beta, sigma, theta (float): The Gaussian Process hyperparameters
+    x_train (array-like): The training inputs, shape (n_samples, n_dimensions)
+    D (array-like): The known outputs, shape (n_samples,)
+    M (array-like): M = Var[D]^{-1} (D - E[D])
+    L (array-like): The lower Cholesky factor of Var[D] + nugget I (optional, shape (n_samples, n_samples))
+    nugget (float): The nugget M and L were computed with
+
+    Returns:
+    bytes: The artifact
+    """
+    arrays = {"x_train": np.atleast_2d(x_train), "D": D, "M": M, "L": L}
+    arrays = {name: np.ascontiguousarray(value, dtype=_DTYPE) for name, value in arrays.items() if value is not None}
+
+    # Offsets are relative to the start of the payload
+    layout = {}
+    payload_size = 0
+    for name, array in arrays.items():
+        offset = _aligned(payload_size)
+        layout[name] = {"offset": offset, "shape": list(array.shape)}
+        payload_size = offset + array.nbytes
+
+    payload = bytearray(payload_size)
+    for name, array in arrays.items():
+        offset = layout[name]["offset"]
+        payload[offset:offset + array.nbytes] = array.tobytes()
+
+    header = {
+        "beta": float(beta),
+        "sigma": float(sigma),
+        "theta": float(theta),
+        "nugget": float(nugget),
+        "arrays": layout,
+        "payload_size": payload_size,
+        "checksum": hashlib.sha256(payload).hexdigest(),
+    }
+    header_bytes = json.dumps(header, sort_keys=True).encode("utf-8")
+    header_bytes = header_bytes.ljust(_aligned(_PREAMBLE.size + len(header_bytes)) - _PREAMBLE.size, b" ")
+
+    return _PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)) + header_bytes + bytes(payload)
+
+
+def read_model_artifact(buffer, verify=True):
+    """
+    Reads a binary model artifact without copying its arrays
+
+    The arrays are read-only views into buffer, so a buffer backed by a memory map (see load_model_artifact) is paged in on demand.
+
+    Parameters:
+    buffer (bytes-like): The artifact, e.g. bytes from the database or an mmap.mmap
+    verify (bool): Whether to check the payload against the header's SHA-256 checksum (reads every page once)
+
+    Returns:
+    dict: {"beta", "sigma", "theta", "nugget", "checksum", "x_train", "D", "M", "L"}, with L None if the artifact has no factor
+    """
+    view = memoryview(buffer)
+    if len(view) < _PREAMBLE.size:
+        raise ValueError("Model artifact is truncated.")
+    magic, version, header_length = _PREAMBLE.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("Not a model artifact.")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact version {version}, expected {FORMAT_VERSION}.")
+
+    payload_start = _PREAMBLE.size + header_length
+    header = json.loads(bytes(view[_PREAMBLE.size:payload_start]))
+    payload = view[payload_start:]
+    if len(payload) != header["payload_size"]:
+        raise ValueError(f"Model artifact payload is {len(payload)} bytes, expected {header['payload_size']}.")
+    if verify and hashlib.sha256(payload).hexdigest() != header["checksum"]:
+        raise ValueError("Model artifact checksum does not match its payload.")
+
+    artifact = {key: header[key] for key in ("beta", "sigma", "theta", "nugget", "checksum")}
+    for name in ARRAY_NAMES:
+        entry = header["arrays"].get(name)
+        if entry is None:
+            artifact[name] = None
+            continue
+        count = int(np.prod(entry["shape"]))
+        array = np.frombuffer(buffer, dtype=_DTYPE, count=count, offset=payload_start + entry["offset"])
+        artifact[name] = array.reshape(entry["shape"])
+
+    return artifact
+
+
+def write_model_artifact(path, *args, **kwargs):
+    """
+    Writes a binary model artifact to path, replacing it atomically so readers never see a partial file
+
+    Takes the same arguments as pack_model_artifact after path.
+
+    Returns:
+    str: The artifact's checksum
+    """
+    data = pack_model_artifact(*args, **kwargs)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+    return read_model_artifact(data, verify=False)["checksum"]
+
+
+def load_model_artifact(path, verify=True):
+    """
+    Memory maps a binary model artifact from disk, see read_model_artifact
+
+    The map stays open for as long as any of the returned arrays is referenced.
+    """
+    with open(path, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return read_model_artifact(buffer, verify)
+
+
+def artifact_to_emulator(artifact, neighbour_tolerance=None):
+    """
+    Builds a BayesianEmulator that shares the artifact's arrays
+
+    Parameters:
+    artifact (dict): As returned by read_model_artifact or load_model_artifact
+    neighbour_tolerance (float): If given, build the emulator's neighbour index with this truncation tolerance (optional)
+
+    Returns:
+    BayesianEmulator: The emulator with M, and L if the artifact has one
+    """
+    return BayesianEmulator(
+        artifact["beta"], artifact["sigma"], artifact["theta"], artifact["x_train"], artifact["D"], artifact["M"],
+        L=artifact["L"], nugget=artifact["nugget"], neighbour_tolerance=neighbour_tolerance
+    )
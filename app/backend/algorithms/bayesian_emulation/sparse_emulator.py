@@ -0,0 +1,233 @@
+import numpy as np
+from scipy.linalg import cholesky, solve_triangular
+
+from algorithms.bayesian_emulation.bayesian_emulator import BayesianEmulator, _cholesky_with_jitter
+from algorithms.bayesian_emulation.kernels import DEFAULT_BLOCK_SIZE, squared_distances
+
+APPROXIMATIONS = ("sor", "fitc")
+
+
+class SparseBayesianEmulator(BayesianEmulator):
+    def __init__(self, beta, sigma, theta, x_train, D, approximation="fitc", n_inducing=None, inducing_points=None, nugget=None):
+        '''
+        Creates a Bayesian Emulator that approximates the Gaussian Process through m inducing points, for training sets
+        too large for the exact emulator's O(n^2) memory and O(n^3) time
+
+        Training costs O(n m^2) and O(n m) memory, and each prediction costs O(m) for the mean and O(m^2) for the variance.
+
+        Parameters:
+        beta, sigma, theta, x_train, D :
+            As for BayesianEmulator.
+
+        approximation : str
+            "sor" (subset of regressors) or "fitc" (fully independent training conditional). FITC corrects the variance of
+            each training point that the inducing points do not explain, which keeps the predictive variance honest.
+
+        n_inducing : int
+            Number of inducing points to pick from x_train (greedy farthest-point selection). Ignored if inducing_points is given.
+
+        inducing_points : (array-like)
+            Explicit inducing inputs, shape (m_inducing, n_dimensions)
+
+        nugget : float
+            Value added to the diagonal of the approximated Var[D]. The approximations need a positive nugget to be well
+            conditioned, so None uses sigma^2 * 1e-6.
+        '''
+        if approximation not in APPROXIMATIONS:
+            raise ValueError(f"Approximation {approximation} is not one of {APPROXIMATIONS}.")
+
+        super().__init__(beta, sigma, theta, x_train, D)
+        self.approximation = approximation
+        self.nugget = float((self.sigma ** 2) * 1e-6 if nugget is None else nugget)
+
+        if inducing_points is None:
+            if n_inducing is None:
+                raise ValueError("Provide either n_inducing or inducing_points.")
+            inducing_points = select_inducing_points(self.x_train, n_inducing)
+        self.inducing_points = np.array(inducing_points, dtype=np.float64, ndmin=2)
+
+        # Lower Cholesky factors of Var[u] and of I + Var[u]^{-1/2} Cov[u,D] Lambda^{-1} Cov[D,u] Var[u]^{-1/2}
+        self.L_uu = None
+        self.L_A = None
+
+    def factorise(self, kronecker=None, block_size=DEFAULT_BLOCK_SIZE, dtype=np.float64, memmap_path=None):
+        """
+        Factorises the inducing-point approximation of Var[D] + nugget I in O(n m^2)
+
+        Only m x m matrices are factorised, so there is no n x n covariance to assemble in blocks (block_size is unused),
+        store in a smaller dtype or memory-map.
+        """
+        _check_factorise_options(kronecker, dtype, memmap_path)
+        self.x_train = np.array(self.x_train, dtype=np.float64)
+        self.D = np.array(self.D, dtype=np.float64)
+        Z = self.inducing_points
+
+        # Var[u] = K_uu and Cov[u,D] = K_uf for the inducing outputs u
+        K_uu = (self.sigma ** 2) * np.exp(-squared_distances(Z, Z) / (self.theta ** 2))
+        K_uf = (self.sigma ** 2) * np.exp(-squared_distances(Z, self.x_train) / (self.theta ** 2))
+        self.L_uu, _ = _cholesky_with_jitter(K_uu)
+
+        # V = L_uu^{-1} K_uf so that Q_ff = K_uf^T K_uu^{-1} K_uf = V^T V
+        V = solve_triangular(self.L_uu, K_uf, lower=True, check_finite=False)
+
+        # Lambda, the diagonal correction, diag(K_ff - Q_ff) + nugget for FITC and just the nugget for SoR
+        if self.approximation == "fitc":
+            self._lambda = np.maximum((self.sigma ** 2) - np.sum(V ** 2, axis=0), 0.0) + self.nugget
+        else:
+            self._lambda = np.full(len(self.D), self.nugget)
+
+        # A = I + V Lambda^{-1} V^T
+        V_scaled = V / np.sqrt(self._lambda)
+        A = np.eye(len(Z)) + V_scaled @ V_scaled.T
+        self.L_A = cholesky(A, lower=True, check_finite=False)
+        self._V = V
+
+    def solve(self, y):
+        """
+        Computes the inducing-point weights K_uu^{-1} K_uf (Q_ff + Lambda)^{-1} y = L_uu^{-T} A^{-1} V Lambda^{-1} y
+        """
+        if self.L_A is None:
+            raise ValueError("The approximation has not been factorised. Run factorise or compute_M first.")
+
+        y = np.array(y, dtype=np.float64)
+        b = solve_triangular(self.L_A, self._V @ (y / self._lambda), lower=True, check_finite=False)
+        b = solve_triangular(self.L_A.T, b, lower=False, check_finite=False)
+
+        return solve_triangular(self.L_uu.T, b, lower=False, check_finite=False)
+
+    def compute_M(self, kronecker=None, block_size=DEFAULT_BLOCK_SIZE, dtype=np.float64, memmap_path=None):
+        """
+        Computes M, the weights on the inducing points, so E_D[f(x)] = E[f(x)] + Cov[f(x),u] M
+        """
+        self.factorise(kronecker, block_size, dtype, memmap_path)
+        self.M = self.solve(self.D - self.beta)
+
+        return self.M
+
+    def add_observations(self, x_new, d_new):
+        """
+        Adds new known outputs to the emulator, keeping the inducing points
+
+        Each new point adds a column v = L_uu^{-1} Cov[u,D_new] to V and its own entry to Lambda, so only the m x m system
+        changes, A_new = A + V_new Lambda_new^{-1} V_new^T. It is refactorised in O(m^3 + m^2 k) for k new points rather
+        than O(n m^2), and M is then re-solved in O(n m).
+
+        Parameters:
+        x_new (array-like): The new active inputs, shape (k_samples, n_dimensions)
+        d_new (array-like): The known outputs for x_new, shape (k_samples,)
+
+        Returns:
+        np.ndarray: The updated M
+        """
+        x_new = np.array(x_new, dtype=np.float64, ndmin=2)
+        d_new = np.array(d_new, dtype=np.float64, ndmin=1)
+        if len(x_new) != len(d_new):
+            raise ValueError(f"Got {len(x_new)} new inputs but {len(d_new)} new outputs.")
+        if len(x_new) == 0:
+            return self.M
+
+        if self.L_A is None:
+            self.factorise()
+
+        K_un = (self.sigma ** 2) * np.exp(-squared_distances(self.inducing_points, x_new) / (self.theta ** 2))
+        V_new = solve_triangular(self.L_uu, K_un, lower=True, check_finite=False)
+        if self.approximation == "fitc":
+            lambda_new = np.maximum((self.sigma ** 2) - np.sum(V_new ** 2, axis=0), 0.0) + self.nugget
+        else:
+            lambda_new = np.full(len(d_new), self.nugget)
+
+        V_scaled = V_new / np.sqrt(lambda_new)
+        self.L_A = cholesky(self.L_A @ self.L_A.T + V_scaled @ V_scaled.T, lower=True, check_finite=False)
+        self._V = np.hstack([self._V, V_new])
+        self._lambda = np.concatenate([self._lambda, lambda_new])
+        self.x_train = np.vstack([self.x_train, x_new])
+        self.D = np.concatenate([self.D, d_new])
+        self.M = self.solve(self.D - self.beta)
+
+        return self.M
+
+    def emulate_batch_with_variance(self, X, chunk_size=None):
+        if self.L_A is None:
+            raise ValueError("The approximation has not been factorised. Run factorise or compute_M first.")
+
+        return self._emulate(X, chunk_size, with_variance=True)
+
+    def _matrix_centres(self):
+        # M weights the inducing points rather than the training points
+        return self.inducing_points
+
+    def build_neighbour_index(self, tolerance=None, cutoff=None):
+        """
+        Not supported. The inherited index is over x_train while M weights the inducing points, so its truncation bound
+        would not hold, and each prediction already costs only O(m).
+        """
+        raise ValueError("The inducing-point approximation has no neighbour index.")
+
+    def _emulate(self, X, chunk_size, with_variance):
+        if self.M is None:
+            raise ValueError("M has not been computed. Run compute_M first.")
+
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        m = X.shape[0]
+        chunk_size = m if chunk_size is None else int(chunk_size)
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer.")
+
+        Z = self.inducing_points
+        inducing_sq_norms = np.einsum("ij,ij->i", Z, Z)
+
+        emulated = np.empty(m, dtype=np.float64)
+        variance = np.empty(m, dtype=np.float64) if with_variance else None
+        for start in range(0, m, chunk_size):
+            chunk = slice(start, start + chunk_size)
+
+            # Cov[f(x),u]_j = sigma^2 exp{-||x-z^(j)||^2/theta^2}
+            k = (self.sigma ** 2) * np.exp(-squared_distances(X[chunk], Z, inducing_sq_norms) / (self.theta ** 2))
+            emulated[chunk] = self.beta + k @ self.M
+
+            if with_variance:
+                # ||L_A^{-1} L_uu^{-1} k||^2 is explained by the data; FITC also keeps sigma^2 - Q(x,x) as prior variance
+                W = solve_triangular(self.L_uu, k.T, lower=True, check_finite=False)
+                explained = np.sum(solve_triangular(self.L_A, W, lower=True, check_finite=False) ** 2, axis=0)
+                prior = (self.sigma ** 2) - np.sum(W ** 2, axis=0) if self.approximation == "fitc" else 0.0
+                variance[chunk] = prior + explained
+
+        if with_variance:
+            np.maximum(variance, 0.0, out=variance)
+
+        return emulated, variance
+
+
+def _check_factorise_options(kronecker, dtype, memmap_path):
+    # Options of BayesianEmulator.factorise that only apply to the dense n x n covariance
+    if kronecker:
+        raise ValueError("The inducing-point approximation has no Kronecker structure.")
+    if np.dtype(dtype) != np.float64:
+        raise ValueError("The inducing-point approximation is only computed in float64.")
+    if memmap_path is not None:
+        raise ValueError("The inducing-point approximation has no n x n covariance to memory-map.")
+
+
+def select_inducing_points(x_train, n_inducing):
+    """
+    Greedy farthest-point selection of inducing points from x_train, O(n m) distance evaluations
+
+    Starts from the training point closest to the centroid and repeatedly adds the point farthest from those chosen so far,
+    which spreads the inducing points evenly over the training inputs.
+
+    Returns:
+    np.ndarray: The chosen inducing points, shape (min(n_inducing, n_samples), n_dimensions)
+    """
+    X = np.array(x_train, dtype=np.float64, ndmin=2)
+    n_inducing = min(int(n_inducing), len(X))
+    if n_inducing < 1:
+        raise ValueError("n_inducing must be a positive integer.")
+
+    chosen = [int(np.argmin(np.sum((X - X.mean(axis=0)) ** 2, axis=1)))]
+    min_sq_dists = np.sum((X - X[chosen[0]]) ** 2, axis=1)
+    for _ in range(n_inducing - 1):
+        index = int(np.argmax(min_sq_dists))
+        chosen.append(index)
+        np.minimum(min_sq_dists, np.sum((X - X[index]) ** 2, axis=1), out=min_sq_dists)
+
+    return X[chosen]
@@ -1,4 +1,3 @@
-from decimal import Decimal
 import sys
 from flask import Flask 
 from algorithms.bayesian_emulation.bayesian_emulator import BayesianEmulator
@@ -7,7 +6,7 @@ from dotenv import load_dotenv
 import os
 import csv
 import numpy as np
-from algorithms.bayesian_emulation.coord_transformer import CoordTransformer
+from algorithms.bayesian_emulation.coord_transformer import get_coord_transformer
 from model_extensions import BayesianModelExtensions
 
 if "/app" not in sys.path:
@@ -23,6 +22,7 @@ DB_NAME = os.getenv("MYSQL_DATABASE", "DB_NAME")
 API_KEY = os.getenv("API_KEY", "api_key")
 DATABASE_URI = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
 TEST_FUNCTIONALITY_MODE = os.getenv("TEST_FUNCTIONALITY_MODE", "false").lower() == "true"
+BAYESIAN_MODEL_ARTIFACT_DIR = os.getenv("BAYESIAN_MODEL_ARTIFACT_DIR") or None # Store the model artifact on disk rather than in the database
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -46,16 +46,6 @@ def get_distance(origin, destination):
             
         return distance_entry.seconds
 
-def to_x_input(origin, destination, transformer):
-    x_origin, y_origin = transformer.transform(origin.lat, origin.lng)
-    x_dest, y_dest = transformer.transform(destination.lat, destination.lng)
-    return [
-        Decimal(str(x_origin)),  # Convert via string to avoid floating-point inaccuracies
-        Decimal(str(y_origin)),
-        Decimal(str(x_dest)),
-        Decimal(str(y_dest))
-    ]
-
 with app.app_context():    
     current_dir = os.path.dirname(os.path.abspath(__file__))
     csv_file_path = os.path.join(current_dir, 'data', 'starting_locations.csv')
@@ -76,15 +66,16 @@ with app.app_context():
 
             locations.append(location)
 
-    transformer = CoordTransformer()
+    # Project every location once, then pair them up
+    x, y = get_coord_transformer().transform_many([location.lat for location in locations], [location.lng for location in locations])
+    points = np.column_stack([x, y])
+
     x_train = [] # Training Points, X_A
     D = [] # Known outputs, f(X_A)
-    for origin in locations:
-        for destination in locations:
-            x_j = to_x_input(origin, destination, transformer)
-            d_j = get_distance(origin, destination)
-            x_train.append(x_j)
-            D.append(d_j)
+    for i, origin in enumerate(locations):
+        for j, destination in enumerate(locations):
+            x_train.append([*points[i], *points[j]])
+            D.append(get_distance(origin, destination))
 
     Beta = 45 # Beta = E[f(x)] : "everywhere in London is 45 minutes away" - someone, probably
     sigma = 1 # sigma = standard deviation : estimate
@@ -92,16 +83,22 @@ with app.app_context():
 
     bayesianEmulator = BayesianEmulator(Beta, sigma, theta, x_train, D)
 
+    # Refine the guesses by maximising the marginal likelihood of the training data
+    fitted = bayesianEmulator.fit_hyperparameters()
+    print(f"Fitted beta={fitted['beta']:.2f}, sigma={fitted['sigma']:.2f}, theta={fitted['theta']:.2f} (log marginal likelihood {fitted['log_marginal_likelihood']:.2f})")
+
+    # x_train pairs every location with every location (origin-major), so compute_M detects the grid and uses the Kronecker solve
     M = bayesianEmulator.compute_M()
+    if bayesianEmulator.L is not None:
+        print(f"Peak covariance memory: {bayesianEmulator.peak_memory_bytes / 1e6:.1f} MB")
 
-    for origin in locations:
-        for destination in locations:
-            emulated = bayesianEmulator.emulate(to_x_input(origin, destination, transformer))
-            d_j = float(get_distance(origin, destination))
+    emulated = bayesianEmulator.emulate_batch(np.array(x_train, dtype=np.float64))
+    pairs = [(origin, destination) for origin in locations for destination in locations]
 
-            diff = emulated - d_j
+    for (origin, destination), emulated_j, d_j in zip(pairs, emulated, D):
+        diff = emulated_j - float(d_j)
 
-            if diff > 10:
-                raise f"Error in training Bayesian Emulator - predictions of distance for training data over 10 seconds different from provided values. {origin.name}-{destination.name} returned difference of {diff}"
+        if diff > 10:
+            raise Exception(f"Error in training Bayesian Emulator - predictions of distance for training data over 10 seconds different from provided values. {origin.name}-{destination.name} returned difference of {diff}")
                 
-    BayesianModelExtensions.insert_bayesian_model("initial-set-5", M, x_train, D, Beta, sigma, theta)
\ No newline at end of file
+    BayesianModelExtensions.insert_bayesian_model("initial-set-5", M, x_train, D, bayesianEmulator.beta, bayesianEmulator.sigma, bayesianEmulator.theta, l_factor=bayesianEmulator.L, nugget=bayesianEmulator.nugget, artifact_dir=BAYESIAN_MODEL_ARTIFACT_DIR)
\ No newline at end of file
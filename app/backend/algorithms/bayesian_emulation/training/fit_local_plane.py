@@ -0,0 +1,49 @@
+import os
+import numpy as np
+from algorithms.bayesian_emulation.coord_transformer import LONDON_BOUNDS, CoordTransformer, LocalPlaneTransformer, fit_local_plane
+
+# Regenerates local_plane_coefficients.py, the precomputed fit used by the local-plane coordinate transformer
+DEGREE = 4
+N_GRID = 41
+N_CHECK = 200000 # Random points in the box the maximum errors are measured on
+
+fit = fit_local_plane(LONDON_BOUNDS, DEGREE, N_GRID)
+
+# Measure the errors against pyproj away from the grid the fit was made on
+(lat_min, lat_max), (lng_min, lng_max) = LONDON_BOUNDS
+rng = np.random.default_rng(0)
+lats = rng.uniform(lat_min, lat_max, N_CHECK)
+lngs = rng.uniform(lng_min, lng_max, N_CHECK)
+
+exact = CoordTransformer()
+local_plane = LocalPlaneTransformer(fit)
+x, y = exact.transform_many(lats, lngs)
+x_fit, y_fit = local_plane.transform_many(lats, lngs)
+lats_fit, lngs_fit = local_plane.inverse_many(x, y)
+
+# Stored bounds are rounded up a little, to a value the tests can assert against
+max_forward_error = float(np.hypot(x_fit - x, y_fit - y).max())
+max_inverse_error = float(max(np.abs(lats_fit - lats).max(), np.abs(lngs_fit - lngs).max()))
+fit["MAX_FORWARD_ERROR_METRES"] = float(f"{max_forward_error * 2:.1e}")
+fit["MAX_INVERSE_ERROR_DEGREES"] = float(f"{max_inverse_error * 2:.1e}")
+print(f"Max error projecting {max_forward_error:.3e} m, inverting {max_inverse_error:.3e} degrees")
+
+lines = [
+    "# Generated by training/fit_local_plane.py, do not edit by hand.",
+    f"# Degree {DEGREE} polynomials fitted to the pyproj EPSG:4326 -> EPSG:27700 transform on a {N_GRID} x {N_GRID} grid over",
+    "# LONDON_BOUNDS, see LocalPlaneTransformer in coord_transformer.py. The maximum errors were measured against pyproj",
+    f"# at {N_CHECK} random points in the box, and doubled.",
+    "",
+]
+for name, value in fit.items():
+    if name.startswith(("FORWARD", "INVERSE")):
+        lines.append(f"{name} = (")
+        lines.extend(f"    {c!r}," for c in value)
+        lines.append(")")
+    else:
+        lines.append(f"{name} = {value!r}")
+
+path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "local_plane_coefficients.py")
+with open(path, "w") as file:
+    file.write("\n".join(lines) + "\n")
+print(f"Wrote {path}")
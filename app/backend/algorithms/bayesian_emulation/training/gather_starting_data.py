@@ -8,7 +8,10 @@ import os
 from sqlalchemy.exc import IntegrityError
 from api.clients.maps.map_clients import GoogleRoutesApi
 from api.clients.maps.routes_request import RoutesRequest
+from algorithms.bayesian_emulation.coord_transformer import get_coord_transformer
+from model_extensions import BayesianModelExtensions
 import csv
+import numpy as np
 
 if "/app" not in sys.path:
     print("Ensure you set the PYTHONPATH to ensure relative imports work correctly.")
@@ -23,6 +26,8 @@ DB_NAME = os.getenv("MYSQL_DATABASE", "DB_NAME")
 API_KEY = os.getenv("API_KEY", "api_key")
 DATABASE_URI = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
 TEST_FUNCTIONALITY_MODE = os.getenv("TEST_FUNCTIONALITY_MODE", "false").lower() == "true"
+# Existing emulator to extend with every newly gathered distance, if set
+BAYESIAN_MODEL_NAME = os.getenv("BAYESIAN_MODEL_NAME")
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -74,6 +79,7 @@ with app.app_context():
         print(f"Error committing locations: {e}")
         raise
     
+    new_observations = [] # (origin, destination, seconds) written by this run
     for origin in locations:
         for destination in locations:
             try:
@@ -103,6 +109,7 @@ with app.app_context():
                     # Commit the distance update
                     db.session.commit()
                     print(f"Successfully wrote distance: {distance_entry.origin_id} -> {distance_entry.destination_id} = {distance_entry.seconds}s")
+                    new_observations.append((origin, destination, float(distance_entry.seconds)))
                     
                     # Verify write
                     stored_distance = Distance.query.filter_by(
@@ -115,3 +122,20 @@ with app.app_context():
             except Exception as e:
                 db.session.rollback()
                 print(f"Error processing distance: {e}")
+
+    # Extend the live emulator with the new distances rather than retraining it from scratch
+    if BAYESIAN_MODEL_NAME and new_observations:
+        emulator = BayesianModelExtensions.get_bayesian_emulator_by_name(BAYESIAN_MODEL_NAME)
+        if not emulator:
+            raise Exception(f"Cannot find Bayesian model {BAYESIAN_MODEL_NAME}")
+
+        transformer = get_coord_transformer()
+        origins, destinations, d_new = zip(*new_observations)
+        x_origin, y_origin = transformer.transform_many([origin.lat for origin in origins], [origin.lng for origin in origins])
+        x_dest, y_dest = transformer.transform_many([destination.lat for destination in destinations], [destination.lng for destination in destinations])
+        x_new = np.column_stack([x_origin, y_origin, x_dest, y_dest])
+        d_new = list(d_new)
+
+        M = emulator.add_observations(x_new, d_new)
+        BayesianModelExtensions.add_bayesian_model_observations(BAYESIAN_MODEL_NAME, x_new, d_new, M, l_factor=emulator.L, nugget=emulator.nugget)
+        print(f"Added {len(d_new)} observations to Bayesian model {BAYESIAN_MODEL_NAME}")
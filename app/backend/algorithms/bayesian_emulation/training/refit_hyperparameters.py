@@ -0,0 +1,49 @@
+import sys
+from flask import Flask 
+from models import db
+from dotenv import load_dotenv
+import os
+from model_extensions import BayesianModelExtensions
+
+if "/app" not in sys.path:
+    print("Ensure you set the PYTHONPATH to ensure relative imports work correctly.")
+
+load_dotenv(dotenv_path="/app/.env")
+
+### Env variables
+DB_USER = os.getenv("MYSQL_USER", "user")
+DB_PASSWORD = os.getenv("MYSQL_PASSWORD", "password")
+DB_HOST = os.getenv("MYSQL_HOST", "mysql")
+DB_NAME = os.getenv("MYSQL_DATABASE", "DB_NAME")
+DATABASE_URI = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+BAYESIAN_MODEL_NAME = os.getenv("BAYESIAN_MODEL_NAME", "initial-set-5")
+N_STARTS = int(os.getenv("HYPERPARAMETER_STARTS", "8"))
+
+# Initialize Flask app
+app = Flask(__name__)
+app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URI
+app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+
+# Initialize database
+db.init_app(app)
+
+# Refits beta, sigma and theta of a stored model by maximising the marginal likelihood, then retrains and stores it
+with app.app_context():
+    emulator = BayesianModelExtensions.get_bayesian_emulator_by_name(BAYESIAN_MODEL_NAME)
+    if not emulator:
+        raise Exception(f"Cannot find Bayesian model {BAYESIAN_MODEL_NAME}")
+
+    print(f"Current beta={float(emulator.beta):.2f}, sigma={float(emulator.sigma):.2f}, theta={float(emulator.theta):.2f}")
+    fitted = emulator.fit_hyperparameters(n_starts=N_STARTS)
+    print(f"Fitted beta={fitted['beta']:.2f}, sigma={fitted['sigma']:.2f}, theta={fitted['theta']:.2f} (log marginal likelihood {fitted['log_marginal_likelihood']:.2f})")
+
+    M = emulator.compute_M()
+    BayesianModelExtensions.update_bayesian_model(
+        BAYESIAN_MODEL_NAME,
+        m_vector=M,
+        beta=fitted["beta"],
+        sigma=fitted["sigma"],
+        theta=fitted["theta"],
+        l_factor=emulator.L,
+        nugget=emulator.nugget
+    )
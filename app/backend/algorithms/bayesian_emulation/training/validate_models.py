@@ -0,0 +1,125 @@
+import sys
+from flask import Flask 
+from algorithms.bayesian_emulation.bayesian_emulator import BayesianEmulator
+from algorithms.bayesian_emulation.compact_emulator import CompactBayesianEmulator
+from algorithms.bayesian_emulation.sparse_emulator import SparseBayesianEmulator
+from algorithms.bayesian_emulation.validation import cheapest_within_budget, format_reports, validate
+from models import db, Location, Distance
+from dotenv import load_dotenv
+import os
+import csv
+import time
+import numpy as np
+from algorithms.bayesian_emulation.coord_transformer import get_coord_transformer
+from model_extensions import BayesianModelExtensions
+
+if "/app" not in sys.path:
+    print("Ensure you set the PYTHONPATH to ensure relative imports work correctly.")
+
+load_dotenv(dotenv_path="/app/.env")
+
+### Env variables
+DB_USER = os.getenv("MYSQL_USER", "user")
+DB_PASSWORD = os.getenv("MYSQL_PASSWORD", "password")
+DB_HOST = os.getenv("MYSQL_HOST", "mysql")
+DB_NAME = os.getenv("MYSQL_DATABASE", "DB_NAME")
+DATABASE_URI = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+BAYESIAN_MODEL_NAME = os.getenv("BAYESIAN_MODEL_NAME", "initial-set-5")
+RMSE_BUDGET_SECONDS = float(os.getenv("RMSE_BUDGET_SECONDS", "300")) # Accuracy budget for choosing a configuration
+N_INDUCING = [50, 100, 200, 400] # Inducing point counts to compare against the exact emulator
+COMPACT_SUPPORT = [2, 3, 4] # Wendland support radii, in multiples of theta
+NEIGHBOUR_TOLERANCE = [1, 10] # Truncation tolerances for the neighbour index, in seconds
+
+# Initialize Flask app
+app = Flask(__name__)
+app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URI
+app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+
+# Initialize database
+db.init_app(app)
+
+def read_locations(csv_file_path):
+    # test_locations.csv pads its fields with tabs, so strip every key and value
+    with open(csv_file_path, mode='r', newline='', encoding='utf-8') as file:
+        reader = csv.DictReader(file)
+        return [{key.strip(): value.strip() for key, value in row.items()} for row in reader]
+
+def get_location(name):
+    location = Location.query.filter(
+        db.func.lower(Location.name) == name.lower()
+    ).first()
+
+    if not location:
+        raise Exception(f"Cannot find location {name}")
+
+    return location
+
+def get_held_out_pairs(test_locations, all_locations):
+    # Every journey to or from a test location that has a known distance
+    pairs = []
+    d_test = []
+    for test_location in test_locations:
+        for other in all_locations:
+            if other.id == test_location.id:
+                continue
+            for origin, destination in ((test_location, other), (other, test_location)):
+                distance_entry = Distance.query.filter_by(origin_id=origin.id, destination_id=destination.id).first()
+                if not distance_entry or not distance_entry.seconds:
+                    continue
+                pairs.append((origin, destination))
+                d_test.append(distance_entry.seconds)
+
+    if not pairs:
+        return np.empty((0, 4)), np.empty(0)
+
+    transformer = get_coord_transformer()
+    x_origin, y_origin = transformer.transform_many([origin.lat for origin, _ in pairs], [origin.lng for origin, _ in pairs])
+    x_dest, y_dest = transformer.transform_many([destination.lat for _, destination in pairs], [destination.lng for _, destination in pairs])
+    return np.column_stack([x_origin, y_origin, x_dest, y_dest]), np.array(d_test, dtype=np.float64)
+
+with app.app_context():    
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    starting_rows = read_locations(os.path.join(current_dir, 'data', 'starting_locations.csv'))
+    test_rows = read_locations(os.path.join(current_dir, 'data', 'test_locations.csv'))
+
+    test_locations = [get_location(row['Name']) for row in test_rows]
+    all_locations = {location.id: location for location in test_locations + [get_location(row['Name']) for row in starting_rows]}
+
+    x_test, d_test = get_held_out_pairs(test_locations, list(all_locations.values()))
+    if len(d_test) == 0:
+        print("No known distances for the test locations, reporting leave-one-out scores only")
+
+    stored = BayesianModelExtensions.get_bayesian_emulator_by_name(BAYESIAN_MODEL_NAME)
+    if not stored:
+        raise Exception(f"Cannot find Bayesian model {BAYESIAN_MODEL_NAME}")
+    beta, sigma, theta, x_train, D = stored.beta, stored.sigma, stored.theta, stored.x_train, stored.D
+
+    reports = [validate("exact", BayesianEmulator(beta, sigma, theta, x_train, D), x_test, d_test)]
+
+    # validate trains with the default solve, which takes the Kronecker path on a full grid
+    dense = BayesianEmulator(beta, sigma, theta, x_train, D)
+    start = time.perf_counter()
+    dense.compute_M(kronecker=False)
+    dense_seconds = time.perf_counter() - start
+    dense_report = validate("exact dense", dense, x_test, d_test, train=False)
+    dense_report["train_seconds"] = dense_seconds
+    reports.append(dense_report)
+
+    for tolerance in NEIGHBOUR_TOLERANCE:
+        indexed = BayesianEmulator(beta, sigma, theta, x_train, D, neighbour_tolerance=tolerance)
+        reports.append(validate(f"neighbours tol={tolerance}s", indexed, x_test, d_test))
+    for n_inducing in N_INDUCING:
+        for approximation in ("sor", "fitc"):
+            sparse = SparseBayesianEmulator(beta, sigma, theta, x_train, D, approximation=approximation, n_inducing=n_inducing)
+            reports.append(validate(f"{approximation} m={len(sparse.inducing_points)}", sparse, x_test, d_test))
+    for support in COMPACT_SUPPORT:
+        reports.append(validate(f"wendland r={support}theta", CompactBayesianEmulator(beta, sigma, support * theta, x_train, D), x_test, d_test))
+
+    print(f"Validating on {len(d_test)} held-out journeys, {len(D)} training journeys")
+    print(format_reports(reports))
+
+    chosen = cheapest_within_budget(reports, RMSE_BUDGET_SECONDS)
+    if chosen:
+        print(f"Cheapest configuration within {RMSE_BUDGET_SECONDS}s RMSE: {chosen['label']}")
+    else:
+        print(f"No configuration is within {RMSE_BUDGET_SECONDS}s RMSE")
@@ -0,0 +1,145 @@
+import time
+import numpy as np
+from scipy.linalg import solve_triangular
+
+from algorithms.bayesian_emulation.bayesian_emulator import BayesianEmulator
+
+
+def leave_one_out(emulator: BayesianEmulator):
+    """
+    All n leave-one-out predictions of an exact emulator in one pass, without refitting n times
+
+    For the emulator trained without point i,
+        E_{D-i}[f(x^(i))] = D_i - M_i / [Var[D]^{-1}]_ii,   Var_{D-i}[f(x^(i))] = 1 / [Var[D]^{-1}]_ii,
+    so only M and the diagonal of the cached inverse are needed. The diagonal costs O(n^3) from the Cholesky factor,
+    or O(n_o^2 n_d + n_o n_d^2) from the Kronecker factors.
+
+    Parameters:
+    emulator (BayesianEmulator): An exact emulator with M computed. If it has no cached factor it is factorised first,
+        and should that raise the nugget, M is recomputed under the new one
+
+    Returns:
+    tuple: (leave-one-out means, leave-one-out variances), each shape (n_samples,)
+    """
+    if type(emulator) is not BayesianEmulator:
+        raise ValueError("Closed-form leave-one-out is only exact for the BayesianEmulator.")
+    if emulator.M is None:
+        raise ValueError("M has not been computed. Run compute_M first or provide M.")
+    if emulator.L is None and emulator.kronecker_factors is None:
+        nugget = emulator.nugget
+        emulator.factorise()
+        if emulator.nugget != nugget:
+            # Jitter raised the nugget, so M is recomputed to match the factor the diagonal is taken from
+            emulator.M = emulator.solve(emulator.D - emulator.beta)
+            emulator._refresh_neighbour_index()
+
+    if emulator.kronecker_factors is not None:
+        # diag((Q_o (x) Q_d) diag(1 / eigenvalues) (Q_o (x) Q_d)^T)_(ij) = sum_ab Q_o[i,a]^2 Q_d[j,b]^2 / eigenvalues[a,b]
+        Q_o, Q_d, eigenvalues = emulator.kronecker_factors
+        inverse_diagonal = ((Q_o ** 2) @ (1.0 / eigenvalues) @ (Q_d ** 2).T).ravel()
+    else:
+        # Var[D]^{-1} = L^{-T} L^{-1}, so its diagonal is the column sums of (L^{-1})^2
+        L_inv = solve_triangular(emulator.L, np.eye(len(emulator.L)), lower=True, check_finite=False)
+        inverse_diagonal = np.sum(L_inv ** 2, axis=0)
+
+    means = emulator.D - emulator.M / inverse_diagonal
+    variances = 1.0 / inverse_diagonal
+
+    return means, variances
+
+
+def score(emulated, variance, observed):
+    """
+    Accuracy and calibration of predictions against observed values
+
+    Returns:
+    dict: rmse and max_abs_error (units of D), coverage_2sd (fraction of observations within two standard deviations,
+        about 0.95 when calibrated) and mean_sq_z (mean squared standardised error, about 1 when calibrated)
+    """
+    emulated = np.asarray(emulated, dtype=np.float64)
+    observed = np.asarray(observed, dtype=np.float64)
+    errors = emulated - observed
+
+    scores = {
+        "rmse": float(np.sqrt(np.mean(errors ** 2))),
+        "max_abs_error": float(np.max(np.abs(errors))),
+        "coverage_2sd": None,
+        "mean_sq_z": None,
+    }
+    if variance is not None:
+        sd = np.sqrt(np.maximum(np.asarray(variance, dtype=np.float64), 1e-300))
+        scores["coverage_2sd"] = float(np.mean(np.abs(errors) <= 2 * sd))
+        scores["mean_sq_z"] = float(np.mean((errors / sd) ** 2))
+
+    return scores
+
+
+def validate(label, emulator, x_test=None, d_test=None, train=True):
+    """
+    Trains an emulator (optionally), then scores it by leave-one-out where that is exact and on held-out points,
+    timing each stage
+
+    Parameters:
+    label (str): Name of the configuration in the report
+    emulator (BayesianEmulator): Any emulator, e.g. SparseBayesianEmulator or CompactBayesianEmulator
+    x_test, d_test (array-like): Held-out inputs and their known outputs (optional)
+    train (bool): Whether to run compute_M first
+
+    Returns:
+    dict: {"label", "n_train", "train_seconds", "loo", "held_out", "predict_seconds_per_point"}
+    """
+    report = {"label": label, "n_train": len(emulator.D), "train_seconds": None, "loo": None, "held_out": None, "predict_seconds_per_point": None}
+
+    if train:
+        start = time.perf_counter()
+        emulator.compute_M()
+        report["train_seconds"] = time.perf_counter() - start
+
+    if type(emulator) is BayesianEmulator:
+        report["loo"] = score(*leave_one_out(emulator), emulator.D)
+
+    if x_test is not None and len(x_test) > 0:
+        start = time.perf_counter()
+        emulated = emulator.emulate_batch(x_test)
+        report["predict_seconds_per_point"] = (time.perf_counter() - start) / len(x_test)
+
+        _, variance = emulator.emulate_batch_with_variance(x_test)
+        report["held_out"] = score(emulated, variance, d_test)
+
+    return report
+
+
+def format_reports(reports):
+    """
+    Formats validate reports as a fixed-width table, one row per configuration
+    """
+    def cell(value, fmt):
+        return f"{value:{fmt}}" if value is not None else f"{'-':>{fmt.split('.')[0]}}"
+
+    lines = [f"{'configuration':<24}{'n':>7}{'train ms':>11}{'loo rmse':>11}{'loo cov':>9}{'test rmse':>11}{'test cov':>10}{'us/point':>10}"]
+    for report in reports:
+        loo = report["loo"] or {}
+        held_out = report["held_out"] or {}
+        train_ms = report["train_seconds"] * 1000 if report["train_seconds"] is not None else None
+        predict_us = report["predict_seconds_per_point"] * 1e6 if report["predict_seconds_per_point"] is not None else None
+        lines.append(
+            f"{report['label']:<24}{report['n_train']:>7}{cell(train_ms, '11.1f')}{cell(loo.get('rmse'), '11.2f')}"
+            f"{cell(loo.get('coverage_2sd'), '9.2f')}{cell(held_out.get('rmse'), '11.2f')}{cell(held_out.get('coverage_2sd'), '10.2f')}{cell(predict_us, '10.2f')}"
+        )
+
+    return "\n".join(lines)
+
+
+def cheapest_within_budget(reports, rmse_budget):
+    """
+    The report with the lowest prediction cost whose held-out (or else leave-one-out) RMSE is within rmse_budget, or None
+    """
+    def rmse(report):
+        scores = report["held_out"] or report["loo"]
+        return scores["rmse"] if scores else np.inf
+
+    candidates = [report for report in reports if rmse(report) <= rmse_budget]
+    if not candidates:
+        return None
+
+    return min(candidates, key=lambda report: (report["predict_seconds_per_point"] or np.inf, report["train_seconds"] or np.inf))
@@ -0,0 +1,109 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import numpy as np
+
+# Steps each chain takes while cooling
+ANNEALING_STEPS = int(os.getenv("ANNEALING_STEPS", "2000"))
+# Independent chains, the first starts at the pub nearest the middle of the group and the rest at random pubs
+ANNEALING_RESTARTS = int(os.getenv("ANNEALING_RESTARTS", "8"))
+# Processes the chains are split between, 1 runs them in this process and 0 uses one per CPU. Kept at 1 when serving: a
+# pool is started for each call and sent the times matrix, which costs more than the chains themselves (see
+# benchmark_suggest_pub.py), and gunicorn already runs a worker process per CPU. More suit long offline runs.
+ANNEALING_WORKERS = int(os.getenv("ANNEALING_WORKERS", "1"))
+# Moves are to one of this many nearest pubs
+ANNEALING_NEIGHBOURS = 8
+# The final temperature as a fraction of the first
+FINAL_TEMPERATURE_RATIO = 1e-3
+
+# (times, neighbours) in each pool process, sent once per process by _set_problem rather than with every job
+_problem = {}
+
+
+def anneal(times, neighbours, starts, objective="sum", n_steps=ANNEALING_STEPS, n_workers=ANNEALING_WORKERS, seed=0):
+    """
+    Simulated annealing over the pubs for the one minimising an objective of the members' journey times
+
+    Every chain moves between spatially adjacent pubs, and the chains advance together so each step scores one proposal
+    per chain with a single reduction over a precomputed times matrix, never calling the emulator. Chains are split
+    between processes when n_workers is not 1.
+
+    Parameters:
+    times (np.ndarray): Journey time of each member to each pub, shape (n_members, n_pubs)
+    neighbours (np.ndarray): Rows of the pubs adjacent to each pub, shape (n_pubs, k)
+    starts (array-like): Starting row of each chain
+    objective (str): Key of suggest_pub.OBJECTIVES
+    n_steps (int): Steps each chain takes while cooling
+    n_workers (int): Number of processes, 0 for one per CPU and 1 to run in this process. A pool is started for each
+        call, so only worth it when the chains are long, see ANNEALING_WORKERS
+    seed (int): Seed for the moves
+
+    Returns:
+    dict: {"row", "score", "steps_to_best"} of the best pub any chain visited, steps_to_best being the step it was first
+        reached, and "ranked", the distinct (row, score) each chain finished on as its best, best first
+    """
+    starts = np.asarray(starts, dtype=np.intp)
+    n_workers = os.cpu_count() if n_workers == 0 else max(int(n_workers), 1)
+
+    jobs = [(batch, seed + i, n_steps, objective) for i, batch in enumerate(np.array_split(starts, min(n_workers, len(starts)))) if len(batch)]
+    if len(jobs) == 1:
+        results = [_anneal_chains(jobs[0], times, neighbours)]
+    else:
+        with ProcessPoolExecutor(max_workers=len(jobs), initializer=_set_problem, initargs=(times, neighbours)) as executor:
+            results = list(executor.map(_anneal_in_worker, jobs))
+
+    best = min(results, key=lambda result: (result["score"], result["steps_to_best"]))
+    ranked = {}
+    for row, score in sorted((chain for result in results for chain in result["chains"]), key=lambda chain: (chain[1], chain[0])):
+        ranked.setdefault(row, score)
+    return {"row": best["row"], "score": best["score"], "steps_to_best": best["steps_to_best"], "ranked": list(ranked.items())}
+
+
+def _set_problem(times, neighbours):
+    _problem["times"], _problem["neighbours"] = times, neighbours
+
+
+def _anneal_in_worker(job):
+    # Module level so it can be sent to the process pool
+    return _anneal_chains(job, _problem["times"], _problem["neighbours"])
+
+
+def _anneal_chains(job, times, neighbours):
+    # Imported here as suggest_pub.py builds on this module
+    from algorithms.pub_finder.suggest_pub import OBJECTIVES
+
+    starts, seed, n_steps, objective = job
+    reduce = OBJECTIVES[objective]
+    rng = np.random.default_rng(seed)
+    n_chains, k = len(starts), neighbours.shape[1]
+
+    current = starts.copy()
+    current_scores = reduce(times[:, current])
+    best, best_scores = current.copy(), current_scores.copy()
+    steps_to_best = np.zeros(n_chains, dtype=np.intp)
+
+    # Start hot enough that a typical uphill move to a neighbour is accepted half the time, and cool geometrically
+    neighbour_scores = reduce(times[:, neighbours[current].ravel()]).reshape(n_chains, k)
+    typical_rise = np.median(np.abs(neighbour_scores - current_scores[:, np.newaxis]))
+    temperature = max(float(typical_rise) / np.log(2), 1e-12)
+    cooling = FINAL_TEMPERATURE_RATIO ** (1 / max(n_steps, 1))
+
+    for step in range(1, n_steps + 1):
+        proposal = neighbours[current, rng.integers(k, size=n_chains)]
+        proposal_scores = reduce(times[:, proposal])
+
+        rise = proposal_scores - current_scores
+        accept = (rise <= 0) | (rng.random(n_chains) < np.exp(-np.maximum(rise, 0) / temperature))
+        current = np.where(accept, proposal, current)
+        current_scores = np.where(accept, proposal_scores, current_scores)
+
+        improved = current_scores < best_scores
+        best[improved], best_scores[improved], steps_to_best[improved] = current[improved], current_scores[improved], step
+        temperature *= cooling
+
+    chain = int(np.argmin(best_scores))
+    return {
+        "row": int(best[chain]),
+        "score": float(best_scores[chain]),
+        "steps_to_best": int(steps_to_best[chain]),
+        "chains": list(zip(best.tolist(), best_scores.tolist())),
+    }
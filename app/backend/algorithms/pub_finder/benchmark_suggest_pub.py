@@ -0,0 +1,108 @@
+import os
+import time
+import numpy as np
+from algorithms.pub_finder.annealing import ANNEALING_NEIGHBOURS, anneal
+from algorithms.pub_finder.centre import geometric_median
+from algorithms.pub_finder.pruning import branch_and_bound, journey_time_bound
+from algorithms.pub_finder.pub_catalog import PubCatalog
+from algorithms.pub_finder.suggest_pub import OBJECTIVES, suggest_pub, travel_time_matrix
+from algorithms.pub_finder.synthetic import make_emulator
+
+# Benchmarks candidate pruning and simulated annealing against exhaustive search on synthetic groups and pubs spread over London,
+# with journey times from an emulator trained on a straight-line travel time.
+# Run from app/backend: python -m algorithms.pub_finder.benchmark_suggest_pub
+N_PUBS = int(os.getenv("BENCHMARK_N_PUBS", "10000"))
+GROUP_SIZES = (5, 50)
+# Pubs suggested by the top-k line
+TOP_K = 10
+N_GROUPS = int(os.getenv("BENCHMARK_N_GROUPS", "10"))
+# Width in metres of the square each group's members are spread over, placed at random within 40 km across London
+GROUP_SPREAD = float(os.getenv("BENCHMARK_GROUP_SPREAD", "40000"))
+N_TRAINING = 500
+WORKERS = (1, 4)
+# Budget for one nearest-pub lookup once the spatial index is built
+NEAREST_BUDGET_SECONDS = 1e-3
+# Budget for geo-centre with the largest groups against a catalog of every pub in London
+GEO_CENTRE_BUDGET_SECONDS = 2e-3
+# As above for the travel time algorithms, emulating every pub
+TRAVEL_TIME_BUDGET_SECONDS = 0.25
+
+
+def make_catalog(rng):
+    return PubCatalog.from_xy(rng.uniform(-25000, 25000, size=(N_PUBS, 2)))
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    emulator = make_emulator(rng, N_TRAINING)
+    pubs = make_catalog(rng)
+    neighbours = pubs.neighbours(ANNEALING_NEIGHBOURS)
+    bound = journey_time_bound(emulator)
+
+    print(f"{N_PUBS} pubs, {N_TRAINING} training journeys, {N_GROUPS} groups per size spread over {GROUP_SPREAD / 1000:g} km")
+
+    pubs.spatial_index.nearest(0.0, 0.0, k=5)
+    nearest_seconds = [timed(pubs.spatial_index.nearest, *rng.uniform(-20000, 20000, size=2), k=5)[1] for _ in range(200)]
+    print(f"  nearest 5 pubs          {np.median(nearest_seconds) * 1e3:8.3f} ms  (budget {NEAREST_BUDGET_SECONDS * 1e3:g} ms)")
+    for group_size in GROUP_SIZES:
+        groups = [rng.uniform(-GROUP_SPREAD / 2, GROUP_SPREAD / 2, size=(group_size, 2)) for _ in range(50)]
+        geo_centre_seconds = [timed(suggest_pub, users, pubs, "geo-centre")[1] for users in groups]
+        print(f"  geo-centre, {group_size:<3} members {np.median(geo_centre_seconds) * 1e3:8.3f} ms  (budget {GEO_CENTRE_BUDGET_SECONDS * 1e3:g} ms)")
+    for objective in ("sum", "max"):
+        for group_size in GROUP_SIZES:
+            matrix_seconds, exhaustive_seconds = [], []
+            pruning = {"seconds": [], "pruned": [], "exact": []}
+            top_k = {"seconds": [], "pruned": [], "exact": []}
+            annealing = {workers: {"seconds": [], "gap": [], "steps": []} for workers in WORKERS}
+            for _ in range(N_GROUPS):
+                offset = rng.uniform(-1, 1, size=2) * max(20000 - GROUP_SPREAD / 2, 0)
+                users = offset + rng.uniform(-GROUP_SPREAD / 2, GROUP_SPREAD / 2, size=(group_size, 2))
+                times, seconds = timed(travel_time_matrix, users, pubs.xy, emulator, bound)
+                matrix_seconds.append(seconds)
+
+                scores, seconds = timed(OBJECTIVES[objective], times)
+                exhaustive_seconds.append(seconds)
+                optimum = scores.min()
+
+                score = lambda rows: travel_time_matrix(users, pubs.xy[rows], emulator, bound)
+                found, seconds = timed(branch_and_bound, users, pubs, score, OBJECTIVES[objective], bound, geometric_median(users))
+                pruning["seconds"].append(seconds)
+                pruning["pruned"].append(found["pruned"] / N_PUBS)
+                pruning["exact"].append(found["ranked"][0]["row"] == int(np.argmin(scores)))
+
+                found, seconds = timed(branch_and_bound, users, pubs, score, OBJECTIVES[objective], bound, geometric_median(users), k=TOP_K)
+                top_k["seconds"].append(seconds)
+                top_k["pruned"].append(found["pruned"] / N_PUBS)
+                top_k["exact"].append(np.allclose([best["score"] for best in found["ranked"]], np.sort(scores)[:TOP_K]))
+
+                starts = rng.integers(N_PUBS, size=8)
+                for workers in WORKERS:
+                    best, seconds = timed(anneal, times, neighbours, starts, objective, n_workers=workers)
+                    annealing[workers]["seconds"].append(seconds)
+                    # Scores summed in a different order can differ in the last bit, so clip that to zero
+                    annealing[workers]["gap"].append(max((best["score"] - optimum) / optimum, 0.0))
+                    annealing[workers]["steps"].append(best["steps_to_best"])
+
+            print(f"\nobjective={objective} members={group_size}")
+            print(f"  travel time matrix      {np.median(matrix_seconds) * 1e3:8.2f} ms  (budget {TRAVEL_TIME_BUDGET_SECONDS * 1e3:g} ms)")
+            print(f"  exhaustive reduction    {np.median(exhaustive_seconds) * 1e3:8.2f} ms  (optimal)")
+            print(
+                f"  pruned, bound + emulate {np.median(pruning['seconds']) * 1e3:8.2f} ms"
+                f"  pruned {np.mean(pruning['pruned']) * 100:.1f}% of pubs  optimal {np.mean(pruning['exact']) * 100:.0f}%"
+            )
+            print(
+                f"  pruned, top {TOP_K:<3}         {np.median(top_k['seconds']) * 1e3:8.2f} ms"
+                f"  pruned {np.mean(top_k['pruned']) * 100:.1f}% of pubs  optimal {np.mean(top_k['exact']) * 100:.0f}%"
+            )
+            for workers, result in annealing.items():
+                print(
+                    f"  annealing, {workers} process{'es' if workers > 1 else '  '} {np.median(result['seconds']) * 1e3:8.2f} ms"
+                    f"  mean gap {np.mean(result['gap']) * 100:.3f}%  worst {np.max(result['gap']) * 100:.3f}%"
+                    f"  optimal {np.mean(np.array(result['gap']) <= 1e-12) * 100:.0f}%  median steps to best {int(np.median(result['steps']))}"
+                )
@@ -0,0 +1,50 @@
+import numpy as np
+
+# Weiszfeld stops once an iteration moves the centre less than this many metres
+WEISZFELD_TOLERANCE_METRES = 1.0
+WEISZFELD_MAX_ITERATIONS = 100
+
+
+def centroid(points):
+    """
+    The mean of points, the point minimising the sum of squared distances to them
+
+    Parameters:
+    points (array-like): Shape (m, 2), metres east and north of Big Ben
+
+    Returns:
+    np.ndarray: Shape (2,)
+    """
+    return np.asarray(points, dtype=np.float64).reshape(-1, 2).mean(axis=0)
+
+
+def geometric_median(points, tolerance=WEISZFELD_TOLERANCE_METRES, max_iterations=WEISZFELD_MAX_ITERATIONS):
+    """
+    The point minimising the sum of straight-line distances to points, by Weiszfeld's algorithm from the centroid
+
+    Unlike the centroid it is not dragged towards one member who lives far from the rest of the group.
+
+    Parameters:
+    points (array-like): Shape (m, 2), metres east and north of Big Ben
+    tolerance (float): Stop once an iteration moves the centre less than this many metres
+    max_iterations (int): Stop after this many iterations regardless
+
+    Returns:
+    np.ndarray: Shape (2,)
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    centre = points.mean(axis=0)
+    if len(points) < 3:
+        # Any point between two members is a median, and the midpoint is the fairest
+        return centre
+
+    for _ in range(max_iterations):
+        distances = np.hypot(points[:, 0] - centre[0], points[:, 1] - centre[1])
+        # An iterate landing on a member would divide by zero, so treat it as a tolerance away
+        weights = 1 / np.maximum(distances, tolerance)
+        new_centre = weights @ points / weights.sum()
+        moved = np.hypot(*(new_centre - centre))
+        centre = new_centre
+        if moved < tolerance:
+            break
+    return centre
@@ -0,0 +1,66 @@
+import math
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Precision stored on pubs, cells of roughly 5m x 5m
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_METRES = 6371000
+
+
+def encode(lat, lng, precision=GEOHASH_PRECISION):
+    """
+    The geohash of a point, interleaving longitude and latitude bits (longitude first) 5 bits to a character
+    """
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, n_bits, is_lng = [], 0, 0, True
+    while len(chars) < precision:
+        value, interval = (lng, lng_range) if is_lng else (lat, lat_range)
+        mid = (interval[0] + interval[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            interval[0] = mid
+        else:
+            bits <<= 1
+            interval[1] = mid
+        is_lng = not is_lng
+        n_bits += 1
+        if n_bits == 5:
+            chars.append(BASE32[bits])
+            bits, n_bits = 0, 0
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """
+    Height and width of a cell in degrees, (lat, lng)
+    """
+    n_bits = 5 * precision
+    return 180 / 2 ** (n_bits // 2), 360 / 2 ** ((n_bits + 1) // 2)
+
+
+def cells_within(lat, lng, radius_metres, max_precision=GEOHASH_PRECISION):
+    """
+    Geohash prefixes whose cells together cover a circle, for prefiltering rows with LIKE 'prefix%'
+
+    Picks the finest precision whose cells are at least radius_metres on each side, so the cell holding the centre and its
+    eight neighbours cover the circle.
+
+    Returns:
+    list: Distinct prefixes, at most nine
+    """
+    metres_per_degree_lat = math.pi * EARTH_RADIUS_METRES / 180
+    metres_per_degree_lng = metres_per_degree_lat * math.cos(math.radians(lat))
+
+    precision = max_precision
+    while precision > 1:
+        height, width = cell_size(precision)
+        if height * metres_per_degree_lat >= radius_metres and width * metres_per_degree_lng >= radius_metres:
+            break
+        precision -= 1
+
+    height, width = cell_size(precision)
+    cells = {
+        encode(min(max(lat + d_lat * height, -90.0), 90.0), (lng + d_lng * width + 180) % 360 - 180, precision)
+        for d_lat in (-1, 0, 1)
+        for d_lng in (-1, 0, 1)
+    }
+    return sorted(cells)
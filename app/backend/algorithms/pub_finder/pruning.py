@@ -0,0 +1,155 @@
+import heapq
+import os
+import numpy as np
+from algorithms.bayesian_emulation.kernels import squared_distances
+
+# Fastest average speed, in metres per second as the crow flies, any journey can manage. If unset it is taken from the
+# emulator's training journeys, see journey_time_bound
+MAX_NETWORK_SPEED_MPS = os.getenv("MAX_NETWORK_SPEED_MPS")
+# Headroom on the fastest training journey, so the bound stays under real journeys faster than any the emulator was trained on
+SPEED_SAFETY_FACTOR = float(os.getenv("SPEED_SAFETY_FACTOR", "1.2"))
+# Pubs in the first ring streamed from the spatial index, and in the first batch scored, doubling with each batch after
+FIRST_BATCH_SIZE = 64
+
+
+def journey_time_bound(emulator):
+    """
+    A lower bound on journey time, overhead + straight-line distance / speed, under every training journey of the emulator
+
+    speed is MAX_NETWORK_SPEED_MPS, or else the fastest training journey's straight-line speed with SPEED_SAFETY_FACTOR.
+    overhead is the most time every training journey takes beyond its distance at that speed, e.g. getting going and parking.
+    Training inputs are (x_o, y_o, x_d, y_d) in metres and outputs journey times in seconds.
+
+    Returns:
+    tuple: (overhead in seconds, speed in metres per second)
+    """
+    x_train, D = emulator.x_train, emulator.D
+    distances = np.hypot(x_train[:, 0] - x_train[:, 2], x_train[:, 1] - x_train[:, 3])
+
+    if MAX_NETWORK_SPEED_MPS:
+        speed = float(MAX_NETWORK_SPEED_MPS)
+    else:
+        moving = D > 0
+        if not moving.any():
+            raise ValueError("No training journeys to bound speed from, set MAX_NETWORK_SPEED_MPS.")
+        speed = float(np.max(distances[moving] / D[moving])) * SPEED_SAFETY_FACTOR
+
+    overhead = max(float(np.min(D - distances / speed)), 0.0) if len(D) else 0.0
+    return overhead, speed
+
+
+def lower_bound_times(users, pubs_xy, speed, overhead=0.0):
+    """
+    Journey times no real journey can beat, overhead plus the straight-line distance at speed, shape (n_members, n_pubs)
+    """
+    return overhead + np.sqrt(squared_distances(users, pubs_xy)) / speed
+
+
+def stream_by_distance(spatial_index, centre, first_batch_size=FIRST_BATCH_SIZE):
+    """
+    Yields (rows, distances) of the pubs in a PubIndex by distance from centre, nearest first, in rings
+
+    The first ring holds the first_batch_size nearest pubs, and each ring after reaches twice as far. Only the rings that
+    are consumed are ever looked up, so a caller that stops early never touches the rest of the catalog.
+    """
+    n_pubs = len(spatial_index)
+    if not n_pubs:
+        return
+
+    _, distances = spatial_index.nearest(centre[0], centre[1], k=first_batch_size)
+    inner, outer, streamed = 0.0, max(np.nextafter(distances[-1], np.inf), 1.0), 0
+    while streamed < n_pubs:
+        rows, distances = spatial_index.between(centre[0], centre[1], inner, outer)
+        if len(rows):
+            streamed += len(rows)
+            yield rows, distances
+        inner, outer = outer, outer * 2
+
+
+def branch_and_bound(users, pubs, score, reduce, bound, centre, k=1, first_batch_size=FIRST_BATCH_SIZE):
+    """
+    The k pubs minimising reduce of the members' journey times, scoring only pubs whose lower bound can beat the k-th best so far
+
+    Pubs are streamed from the catalog's spatial index by distance from centre (see stream_by_distance) and wait in a pool
+    until scored in order of their straight-line bound, in doubling batches. By the triangle inequality a member u is at
+    least |c - p| - |c - u| from a pub p, so no pub beyond a ring can have a bound below the ring's, and a pub is only
+    scored once its bound is no worse than that of any pub not yet streamed. The search stops once neither the pool nor
+    the next ring can beat the k-th best score in the bounded heap, so the work grows with k and the radius the bound
+    allows, not with the size of the catalog. The result is exact whenever the bound holds. reduce must not decrease when
+    any member's time increases, which holds for a sum, a max or a percentile.
+
+    Parameters:
+    users (np.ndarray): shape (n_members, 2), metres east and north of Big Ben
+    pubs (PubCatalog): The candidates
+    score (callable): score(rows) -> journey times of every member to the pubs at rows, shape (n_members, len(rows)),
+        e.g. from the emulator or the Routes API
+    reduce (callable): Objective over the members axis, as in suggest_pub.OBJECTIVES
+    bound (tuple): (overhead, speed) of the lower bound on journey times, see journey_time_bound
+    centre (array-like): Where to stream pubs from, best near the middle of the group
+    k (int): Number of pubs to return
+
+    Returns:
+    dict: {"ranked", "evaluated", "pruned"}, ranked being {"row", "score", "member_times"} for up to k pubs, best first,
+        with the number of pubs scored and pruned
+    """
+    overhead, speed = bound
+    centre = np.asarray(centre, dtype=np.float64)
+    member_radii = np.hypot(users[:, 0] - centre[0], users[:, 1] - centre[1])
+
+    rings = stream_by_distance(pubs.spatial_index, centre, first_batch_size)
+    # Lowest bound of any pub not yet streamed
+    frontier = reduce(np.full((len(users), 1), overhead))[0]
+    pool_rows, pool_bounds = np.empty(0, dtype=np.intp), np.empty(0)
+    # Max-heap of the k best as (-score, row, member_times)
+    heap = []
+    evaluated, batch_size = 0, first_batch_size
+    while True:
+        threshold = -heap[0][0] if len(heap) == k else np.inf
+        ready = pool_bounds <= min(frontier, np.nextafter(threshold, -np.inf))
+
+        if not ready.any():
+            if frontier >= threshold:
+                break
+            ring = next(rings, None)
+            if ring is None:
+                frontier = np.inf
+                continue
+            rows, distances = ring
+            frontier = reduce(overhead + np.maximum(distances[-1] - member_radii[:, np.newaxis], 0) / speed)[0]
+            bounds = reduce(lower_bound_times(users, pubs.xy[rows], speed, overhead))
+            keep = bounds < threshold
+            pool_rows, pool_bounds = np.concatenate((pool_rows, rows[keep])), np.concatenate((pool_bounds, bounds[keep]))
+            continue
+
+        # Score the lowest bounds first, leaving the rest in the pool
+        ready = np.flatnonzero(ready)
+        if len(ready) > batch_size:
+            ready = ready[np.argpartition(pool_bounds[ready], batch_size - 1)[:batch_size]]
+        rows = pool_rows[ready]
+        pool_rows, pool_bounds = np.delete(pool_rows, ready), np.delete(pool_bounds, ready)
+        batch_size *= 2
+
+        times = score(rows)
+        scores = reduce(times)
+        evaluated += len(rows)
+
+        # Only the batch's k best can enter the heap
+        for i in np.argsort(scores, kind="stable")[:k]:
+            entry = (-float(scores[i]), int(rows[i]), times[:, i].copy())
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry[0] > heap[0][0]:
+                heapq.heapreplace(heap, entry)
+            else:
+                break
+
+        # Pubs that can no longer beat the k-th best are dropped from the pool
+        if len(heap) == k:
+            keep = pool_bounds < -heap[0][0]
+            pool_rows, pool_bounds = pool_rows[keep], pool_bounds[keep]
+
+    ranked = [
+        {"row": row, "score": -negative_score, "member_times": member_times}
+        for negative_score, row, member_times in sorted(heap, key=lambda entry: (-entry[0], entry[1]))
+    ]
+    return {"ranked": ranked, "evaluated": evaluated, "pruned": len(pubs) - evaluated}
@@ -0,0 +1,141 @@
+from functools import cached_property
+import numpy as np
+from algorithms.pub_finder.pub_index import PubIndex
+
+
+def _frozen(array):
+    array.flags.writeable = False
+    return array
+
+
+class PubCatalog:
+    def __init__(self, ids, names, lat_lng, xy, watermark=None):
+        '''
+        A read-only, columnar snapshot of the pubs that can be suggested, so algorithms work on arrays rather than ORM objects
+
+        Row i of every array is the same pub. A snapshot is never modified; updated and without return a new one. It can
+        then be shared between requests and threads, and a caller can keep using the snapshot it was given.
+
+        Parameters:
+        ids : array-like of str, shape (n,)
+            Pub ids.
+
+        names : array-like of str, shape (n,)
+            Pub names.
+
+        lat_lng : array-like, shape (n, 2)
+            Latitude and longitude of each pub.
+
+        xy : array-like, shape (n, 2)
+            Metres east and north of Big Ben (see CoordTransformer), x and y are views of its columns.
+
+        watermark : datetime
+            The latest updated_at of the rows the snapshot was built from, rows changed since then are not included.
+        '''
+        self.ids = _frozen(np.array(ids, dtype=np.str_).reshape(-1))
+        self.names = _frozen(np.array(names, dtype=np.str_).reshape(-1))
+        self.lat_lng = _frozen(np.ascontiguousarray(lat_lng, dtype=np.float64).reshape(-1, 2))
+        self.xy = _frozen(np.ascontiguousarray(xy, dtype=np.float64).reshape(-1, 2))
+        self.x, self.y = self.xy[:, 0], self.xy[:, 1]
+        self.watermark = watermark
+        self._index = {pub_id: i for i, pub_id in enumerate(self.ids.tolist())}
+        # k -> neighbours(k), filled on first use
+        self._neighbours = {}
+
+    @classmethod
+    def from_rows(cls, rows, watermark=None):
+        """
+        Builds a snapshot from (id, name, lat, lng, x, y) rows. Rows without projected coordinates are left out.
+        """
+        rows = [row for row in rows if row[4] is not None and row[5] is not None]
+        if not rows:
+            return cls.empty(watermark)
+
+        ids, names, lats, lngs, xs, ys = zip(*rows)
+        return cls(ids, names, np.column_stack((lats, lngs)).astype(np.float64), np.column_stack((xs, ys)).astype(np.float64), watermark)
+
+    @classmethod
+    def from_xy(cls, xy):
+        """
+        Builds a snapshot of pubs known only by their projected coordinates, e.g. synthetic pubs for tests and benchmarks.
+        Row i is named "Pub i" with id "pub-i", and lat_lng is left at zero.
+        """
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        n = len(xy)
+        return cls([f"pub-{i}" for i in range(n)], [f"Pub {i}" for i in range(n)], np.zeros((n, 2)), xy)
+
+    @classmethod
+    def empty(cls, watermark=None):
+        return cls(np.empty(0, dtype=np.str_), np.empty(0, dtype=np.str_), np.empty((0, 2)), np.empty((0, 2)), watermark)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, pub_id):
+        return pub_id in self._index
+
+    def index_of(self, pub_id):
+        """
+        The row of a pub, or None if it is not in the snapshot
+        """
+        return self._index.get(pub_id)
+
+    def updated(self, rows, watermark=None):
+        """
+        A new snapshot with rows added or replaced by (id, name, lat, lng, x, y). A row without projected coordinates
+        removes that pub, as it can no longer be scored.
+        """
+        rows = list(rows)
+        if not rows:
+            return self if watermark is None else self._with_watermark(watermark)
+
+        changed = {row[0] for row in rows}
+        keep = np.array([pub_id not in changed for pub_id in self.ids.tolist()], dtype=bool)
+        added = PubCatalog.from_rows(rows)
+        return PubCatalog(
+            np.concatenate((self.ids[keep], added.ids)),
+            np.concatenate((self.names[keep], added.names)),
+            np.concatenate((self.lat_lng[keep], added.lat_lng)),
+            np.concatenate((self.xy[keep], added.xy)),
+            watermark if watermark is not None else self.watermark,
+        )
+
+    def without(self, pub_ids):
+        """
+        A new snapshot without the given pubs
+        """
+        pub_ids = set(pub_ids)
+        keep = np.array([pub_id not in pub_ids for pub_id in self.ids.tolist()], dtype=bool)
+        if keep.all():
+            return self
+        return PubCatalog(self.ids[keep], self.names[keep], self.lat_lng[keep], self.xy[keep], self.watermark)
+
+    @cached_property
+    def spatial_index(self):
+        """
+        A PubIndex over this snapshot's pubs, built on first use and shared by every caller of the snapshot
+        """
+        return PubIndex(self.xy)
+
+    def neighbours(self, k):
+        """
+        The rows of the k pubs nearest each pub, excluding itself, shape (n, k). Built once per snapshot for each k.
+        """
+        k = min(int(k), len(self) - 1)
+        if k not in self._neighbours:
+            if k <= 0:
+                neighbours = np.empty((len(self), 0), dtype=np.intp)
+            else:
+                # Each pub is its own nearest, so ask for one more and drop the first column
+                neighbours = np.ascontiguousarray(self.spatial_index.nearest_many(self.xy, k + 1)[0][:, 1:])
+            self._neighbours[k] = _frozen(neighbours)
+        return self._neighbours[k]
+
+    def nbytes(self):
+        return sum(array.nbytes for array in (self.ids, self.names, self.lat_lng, self.xy))
+
+    def _with_watermark(self, watermark):
+        catalog = PubCatalog.__new__(PubCatalog)
+        catalog.__dict__.update(self.__dict__)
+        catalog.watermark = watermark
+        return catalog
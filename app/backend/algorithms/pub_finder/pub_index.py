@@ -0,0 +1,93 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class PubIndex:
+    def __init__(self, xy):
+        '''
+        A KD-tree over the projected coordinates of the pubs in a PubCatalog, for k-nearest and within-radius lookups
+
+        Use PubCatalog.spatial_index, which builds one per snapshot on first use, rather than building one directly.
+
+        Parameters:
+        xy : array-like, shape (n, 2)
+            Metres east and north of Big Ben, row i is row i of the catalog.
+        '''
+        self.xy = np.asarray(xy, dtype=np.float64)
+        self.tree = cKDTree(self.xy) if len(self.xy) else None
+
+    def __len__(self):
+        return len(self.xy)
+
+    def nearest(self, x, y, k=1, max_distance=np.inf):
+        """
+        The k pubs closest to a point, nearest first
+
+        Parameters:
+        x, y (float): Metres east and north of Big Ben
+        k (int): Number of pubs, fewer are returned if there are not enough within max_distance
+        max_distance (float): Ignore pubs further than this many metres
+
+        Returns:
+        tuple: (rows, distances), arrays of catalog rows and distances in metres
+        """
+        k = min(int(k), len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+
+        distances, rows = self.tree.query((x, y), k=k, distance_upper_bound=max_distance)
+        distances, rows = np.atleast_1d(distances), np.atleast_1d(rows)
+        # Missing neighbours come back as an infinite distance
+        found = np.isfinite(distances)
+        return rows[found].astype(np.intp), distances[found]
+
+    def nearest_many(self, points, k=1):
+        """
+        The k pubs closest to each of several points, in one call
+
+        Parameters:
+        points (array-like): Shape (m, 2), metres east and north of Big Ben
+        k (int): Number of pubs per point, at most the number in the catalog
+
+        Returns:
+        tuple: (rows, distances), each of shape (m, k), nearest first along each row
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        k = min(int(k), len(self))
+        if k <= 0:
+            return np.empty((len(points), 0), dtype=np.intp), np.empty((len(points), 0))
+
+        distances, rows = self.tree.query(points, k=k)
+        return rows.reshape(len(points), k).astype(np.intp), distances.reshape(len(points), k)
+
+    def within(self, x, y, radius):
+        """
+        Every pub within radius metres of a point, nearest first
+
+        Returns:
+        tuple: (rows, distances), arrays of catalog rows and distances in metres
+        """
+        if not len(self):
+            return np.empty(0, dtype=np.intp), np.empty(0)
+
+        rows = np.asarray(self.tree.query_ball_point((x, y), radius), dtype=np.intp)
+        distances = np.hypot(self.xy[rows, 0] - x, self.xy[rows, 1] - y)
+        order = np.argsort(distances, kind="stable")
+        return rows[order], distances[order]
+
+    def between(self, x, y, inner, outer):
+        """
+        Every pub at least inner and less than outer metres from a point, nearest first, so adjacent rings never overlap
+
+        Returns:
+        tuple: (rows, distances), arrays of catalog rows and distances in metres
+        """
+        if not len(self):
+            return np.empty(0, dtype=np.intp), np.empty(0)
+
+        rows = np.asarray(self.tree.query_ball_point((x, y), outer, return_sorted=False), dtype=np.intp)
+        distances = np.hypot(self.xy[rows, 0] - x, self.xy[rows, 1] - y)
+        ring = (distances >= inner) & (distances < outer)
+        rows, distances = rows[ring], distances[ring]
+        order = np.argsort(distances, kind="stable")
+        return rows[order], distances[order]
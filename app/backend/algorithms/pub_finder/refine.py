@@ -0,0 +1,77 @@
+import os
+import numpy as np
+from algorithms.pub_finder.suggest_pub import OBJECTIVES, PubSuggestion, best_by_travel_time
+
+# Pubs sent for real journey times, the rest of the ranking is left to the emulator
+REFINE_FINALISTS = int(os.getenv("REFINE_FINALISTS", "5"))
+# Standard deviations below the emulated times a pub might really be, when choosing finalists. 0 ranks on the emulated times alone
+REFINE_CONFIDENCE_Z = float(os.getenv("REFINE_CONFIDENCE_Z", "1.0"))
+# Pubs ranked by the emulator for each finalist, from which the finalists are chosen
+SHORTLIST_FACTOR = 3
+
+
+def shortlist(users, pubs, emulator, objective, n_finalists=REFINE_FINALISTS, confidence_z=REFINE_CONFIDENCE_Z):
+    """
+    The pubs worth real journey times, the emulator's best by an objective (see OBJECTIVES) allowing for its uncertainty
+
+    The emulator's SHORTLIST_FACTOR * n_finalists best pubs are re-ranked on optimistic journey times, the emulated times
+    less confidence_z predictive standard deviations. A pub the emulator is unsure of can then make the final cut ahead
+    of one it is confident is a little better.
+
+    Parameters:
+    users (np.ndarray): shape (n_members, 2), metres east and north of Big Ben
+    pubs (PubCatalog): The candidates
+    emulator (BayesianEmulator): Any emulator with emulate_batch_with_variance
+    objective (str): Key of OBJECTIVES
+    n_finalists (int): Number of pubs to return
+    confidence_z (float): Standard deviations to allow for, 0 to ignore the predictive variance
+
+    Returns:
+    list: Up to n_finalists PubSuggestions with emulated member_times and score, by optimistic score, best first
+    """
+    candidates = best_by_travel_time(users, pubs, emulator, objective, k=n_finalists * SHORTLIST_FACTOR if confidence_z > 0 else n_finalists)
+    if len(candidates) <= n_finalists:
+        return candidates
+
+    users = np.asarray(users, dtype=np.float64).reshape(-1, 2)
+    pubs_xy = pubs.xy[[candidate.row for candidate in candidates]]
+    pairs = np.hstack((np.repeat(users, len(pubs_xy), axis=0), np.tile(pubs_xy, (len(users), 1))))
+    _, variances = emulator.emulate_batch_with_variance(pairs)
+    deviations = np.sqrt(np.maximum(variances, 0)).reshape(len(users), len(pubs_xy))
+
+    times = np.column_stack([candidate.member_times for candidate in candidates])
+    optimistic = OBJECTIVES[objective](np.maximum(times - confidence_z * deviations, 0))
+    return [candidates[i] for i in np.argsort(optimistic, kind="stable")[:n_finalists]]
+
+
+def rerank(finalists, route_times, objective, k=1):
+    """
+    The k best finalists on real journey times
+
+    Parameters:
+    finalists (list): PubSuggestions with emulated member_times, as from shortlist
+    route_times (np.ndarray): Real journey time in seconds of each member to each finalist, shape (n_members, n_finalists),
+        NaN where unknown, in which case the emulated time stands in
+    objective (str): Key of OBJECTIVES
+    k (int): Number of pubs to return
+
+    Returns:
+    list: Up to k PubSuggestions scored on the real times, best first, each keeping the emulator's score as emulated_score
+    """
+    if not finalists:
+        return []
+
+    emulated = np.column_stack([finalist.member_times for finalist in finalists])
+    times = np.where(np.isnan(route_times), emulated, route_times)
+    scores = OBJECTIVES[objective](times)
+    return [
+        PubSuggestion(
+            finalists[i].row,
+            member_times=times[:, i].copy(),
+            score=float(scores[i]),
+            evaluated=finalists[i].evaluated,
+            pruned=finalists[i].pruned,
+            emulated_score=finalists[i].score,
+        )
+        for i in np.argsort(scores, kind="stable")[:k]
+    ]
@@ -1,40 +1,262 @@
 # Chosen to make this modular. Means testing will be easier to carry out. Ensure this module does not depend on anything Flask related. This will make it easier to test in a standalone way.
 # Take all inputs as arguments
 
-# Currently takes a list of all users and all pubs as input. Down the line, this can be changed to take a group_id and query pubs from the database based upon say lat and lng, which will make the function ultimately more modular and easier to test, and also more efficient.
+# Takes the group members' projected coordinates, shape (m, 2) in metres from Big Ben, and a PubCatalog (see pub_catalog.py), the pubs as read-only arrays.
+# Algorithms take k and return up to k PubSuggestions best first, each the row of a pub in the catalog and anything learned choosing it.
+from concurrent.futures import ThreadPoolExecutor
+import os
+import numpy as np
+from algorithms.pub_finder.annealing import ANNEALING_NEIGHBOURS, ANNEALING_RESTARTS, anneal
+from algorithms.pub_finder.centre import centroid, geometric_median
+from algorithms.pub_finder.pruning import branch_and_bound, journey_time_bound, lower_bound_times
+
+# How geo-centre finds the middle of a group, see CENTRES
+GEO_CENTRE_METHOD = os.getenv("GEO_CENTRE_METHOD", "geometric-median")
+# Percentile of member journey times minimised by percentile-time
+TRAVEL_TIME_PERCENTILE = float(os.getenv("TRAVEL_TIME_PERCENTILE", "90"))
+# Pubs emulated together when building a travel time matrix, bounds memory at roughly this * training points * 8 bytes
+TRAVEL_TIME_CHUNK_SIZE = 2048
+# Score only the pubs whose lower bound can beat the k-th best found so far, see pruning.py
+PRUNE_CANDIDATES = os.getenv("PRUNE_CANDIDATES", "true").lower() == "true"
+# Objective simulated_annealing minimises, see OBJECTIVES
+ANNEALING_OBJECTIVE = os.getenv("ANNEALING_OBJECTIVE", "sum")
+# suggest_pubs shares one travel time matrix between at least this many groups, fewer are each searched with pruning
+BATCH_SHARED_MATRIX_MIN_GROUPS = int(os.getenv("BATCH_SHARED_MATRIX_MIN_GROUPS", "16"))
+# Most members in one shared travel time matrix, bounds its memory at roughly this * pubs * 8 bytes
+BATCH_MAX_MEMBERS = int(os.getenv("BATCH_MAX_MEMBERS", "1024"))
+# Threads suggest_pubs spreads the groups over
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+
+CENTRES = {
+    "centroid": centroid,
+    "geometric-median": geometric_median,
+}
+
+# Reductions over the members axis of a (members, pubs) travel time matrix, giving a score per pub to minimise
+OBJECTIVES = {
+    "sum": lambda times: times.sum(axis=0),
+    "max": lambda times: times.max(axis=0),
+    "percentile": lambda times: np.percentile(times, TRAVEL_TIME_PERCENTILE, axis=0),
+}
 
 # Dictionary to hold available algorithms
 ALGORITHMS = {}
+# Algorithms that predict journey times, and so are passed the emulator
+EMULATED_ALGORITHMS = set()
+# Objective (see OBJECTIVES) each algorithm minimises exactly over every pub, so its finalists can be refined (see refine.py)
+ALGORITHM_OBJECTIVES = {}
+
 
+class PubSuggestion:
+    def __init__(self, row, member_times=None, score=None, evaluated=None, pruned=None, emulated_score=None):
+        """
+        row: Row of the chosen pub in the PubCatalog
+        member_times: Predicted journey time in seconds for each member, in the order the members were given, if known
+        score: The value of the objective the pub was chosen by, if any
+        evaluated, pruned: Number of pubs whose journey times were predicted, and skipped on a lower bound, if counted
+        emulated_score: The emulator's score, if member_times and score were refined on real journey times
+        """
+        self.row = row
+        self.member_times = member_times
+        self.score = score
+        self.evaluated = evaluated
+        self.pruned = pruned
+        self.emulated_score = emulated_score
 
-def register_algorithm(name):
+
+def register_algorithm(name, uses_emulator=False, objective=None):
     def decorator(func):
         ALGORITHMS[name] = func
+        if uses_emulator:
+            EMULATED_ALGORITHMS.add(name)
+        if objective:
+            ALGORITHM_OBJECTIVES[name] = objective
         return func
 
     return decorator
 
 
+def _as_points(users):
+    users = np.asarray(users, dtype=np.float64).reshape(-1, 2)
+    if len(users) == 0:
+        raise ValueError("No group members have a location.")
+    return users
+
+
+def travel_time_matrix(users, pubs_xy, emulator, bound=None):
+    """
+    Predicted journey time in seconds from each member to each pub, from one batched emulator evaluation
+
+    The emulated times are raised to the lower bound of journey_time_bound wherever they fall below it, e.g. for short
+    trips or far from the training data, where the emulator reverts to its mean. Every time scored then respects the
+    bound, so pruning on it (see pruning.branch_and_bound) never discards the best pub.
+
+    bound: (overhead, speed) from journey_time_bound(emulator), if already known
+
+    Returns:
+    np.ndarray: shape (n_members, n_pubs)
+    """
+    overhead, speed = journey_time_bound(emulator) if bound is None else bound
+    times = emulator.emulate_matrix(users, pubs_xy, chunk_size=TRAVEL_TIME_CHUNK_SIZE)
+    return np.maximum(times, lower_bound_times(users, pubs_xy, speed, overhead), out=times)
+
+
+def best_by_travel_time(users, pubs, emulator, objective, k=1, times=None):
+    """
+    The k pubs minimising an objective (see OBJECTIVES) of the members' predicted journey times, best first
+
+    With PRUNE_CANDIDATES pubs are emulated nearest the middle of the group first, and only while they could still beat
+    the k-th best on a straight-line lower bound. The times scored are clamped to that bound (see travel_time_matrix), so
+    the result is the same as scoring every pub. Given times, every pub is scored from them instead.
+    """
+    users = _as_points(users)
+    if len(pubs) == 0:
+        return []
+
+    if PRUNE_CANDIDATES and times is None:
+        bound = journey_time_bound(emulator)
+        score = lambda rows: travel_time_matrix(users, pubs.xy[rows], emulator, bound)
+        found = branch_and_bound(users, pubs, score, OBJECTIVES[objective], bound, geometric_median(users), k=k)
+        return [
+            PubSuggestion(best["row"], member_times=best["member_times"], score=best["score"], evaluated=found["evaluated"], pruned=found["pruned"])
+            for best in found["ranked"]
+        ]
+
+    times = travel_time_matrix(users, pubs.xy, emulator) if times is None else times
+    scores = OBJECTIVES[objective](times)
+    rows = _k_smallest(scores, k)
+    return [PubSuggestion(int(row), member_times=times[:, row].copy(), score=float(scores[row]), evaluated=len(pubs), pruned=0) for row in rows]
+
+
+def _k_smallest(scores, k):
+    # Rows of the k lowest scores, lowest first, without sorting every score
+    k = min(int(k), len(scores))
+    rows = np.argpartition(scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+    return rows[np.lexsort((rows, scores[rows]))]
+
+
 @register_algorithm("geo-centre")
-def geographical_centre(users, pubs):
-    # print(users)
-    # print(pubs)
-    print("Geo centre pub DEFAULT")
+def geographical_centre(users, pubs, k=1, method=None):
+    """
+    The k pubs nearest the middle of the group as the crow flies, nearest first, scored by their distance in metres
+    """
+    users = _as_points(users)
+    centre = CENTRES[method or GEO_CENTRE_METHOD](users)
+    rows, distances = pubs.spatial_index.nearest(centre[0], centre[1], k=k)
+    return [PubSuggestion(int(row), score=float(distance)) for row, distance in zip(rows, distances)]
 
 
-@register_algorithm("simulated_annealing")
-def simulated_annealing(users, pubs):
-    # Your simulated annealing algorithm implementation here
-    pass
+@register_algorithm("min-total-time", uses_emulator=True, objective="sum")
+def min_total_time(users, pubs, emulator, k=1, times=None):
+    """
+    The pubs with the least total journey time over the group
+    """
+    return best_by_travel_time(users, pubs, emulator, "sum", k, times)
+
+
+@register_algorithm("minimax-time", uses_emulator=True, objective="max")
+def minimax_time(users, pubs, emulator, k=1, times=None):
+    """
+    The pubs with the shortest longest journey, so no one member travels far
+    """
+    return best_by_travel_time(users, pubs, emulator, "max", k, times)
+
+
+@register_algorithm("percentile-time", uses_emulator=True, objective="percentile")
+def percentile_time(users, pubs, emulator, k=1, times=None):
+    """
+    The pubs with the shortest TRAVEL_TIME_PERCENTILE percentile journey, minimax without letting one outlier decide
+    """
+    return best_by_travel_time(users, pubs, emulator, "percentile", k, times)
+
+
+@register_algorithm("simulated_annealing", uses_emulator=True)
+def simulated_annealing(users, pubs, emulator, k=1, times=None, objective=None, seed=0):
+    """
+    The pubs found by simulated annealing over adjacent pubs, scored from one precomputed travel time matrix (see annealing.py)
+
+    Each chain contributes the best pub it found, so fewer than k are returned when chains agree or k exceeds ANNEALING_RESTARTS.
+    """
+    users = _as_points(users)
+    if len(pubs) == 0:
+        return []
+
+    objective = objective or ANNEALING_OBJECTIVE
+    times = travel_time_matrix(users, pubs.xy, emulator) if times is None else times
+    if len(pubs) == 1:
+        return [PubSuggestion(0, member_times=times[:, 0].copy(), score=float(OBJECTIVES[objective](times[:, :1])[0]))]
+
+    # One chain from the pub nearest the middle of the group, the rest from random pubs
+    rng = np.random.default_rng(seed)
+    middle = geographical_centre(users, pubs)[0].row
+    starts = np.concatenate(([middle], rng.integers(len(pubs), size=max(ANNEALING_RESTARTS - 1, 0))))
+
+    found = anneal(times, pubs.neighbours(ANNEALING_NEIGHBOURS), starts, objective, seed=seed)
+    return [PubSuggestion(row, member_times=times[:, row].copy(), score=score) for row, score in found["ranked"][:k]]
 
 
 # TODO(@TS): Decide upon where I should put the default algorithm value. Maybe just at os.getenv() level.
-def suggest_pub(users, pubs, algorithm="geo-centre"):
+def suggest_pub(users, pubs, algorithm="geo-centre", emulator=None, k=1, times=None):
     """
     Function to find optimal pub based on user locations using the specified algorithm.
-    Returns: Pub object
+    emulator: The travel time emulator, required by the algorithms in EMULATED_ALGORITHMS
+    k: Number of pubs to suggest
+    times: travel_time_matrix(users, pubs.xy, emulator) if already known, used by EMULATED_ALGORITHMS rather than emulating
+    Returns: list of up to k PubSuggestions, best first, empty if there are no pubs
     """
+    if k < 1:
+        raise ValueError("k must be at least 1.")
     if algorithm not in ALGORITHMS:
         raise ValueError(f"Algorithm {algorithm} is not registered.")
 
-    return ALGORITHMS[algorithm](users, pubs)
+    if algorithm in EMULATED_ALGORITHMS:
+        if emulator is None:
+            raise ValueError(f"Algorithm {algorithm} needs a travel time emulator.")
+        return ALGORITHMS[algorithm](users, pubs, emulator, k=k, times=times)
+    return ALGORITHMS[algorithm](users, pubs, k=k)
+
+
+def suggest_pubs(groups, pubs, algorithm="geo-centre", emulator=None, k=1, n_workers=BATCH_WORKERS, max_members=BATCH_MAX_MEMBERS):
+    """
+    suggest_pub for many groups in one pass, the groups spread over n_workers threads
+
+    With at least BATCH_SHARED_MATRIX_MIN_GROUPS groups, the EMULATED_ALGORITHMS score every group from one travel time
+    matrix per wave of up to max_members members. The emulator's work on the pubs' side of the matrix is then done
+    once for the wave rather than once per group, and a member of several groups is emulated once.
+
+    groups: list of the members' coordinates of each group, as users in suggest_pub
+    Returns: list of suggest_pub's result for each group, in the order given
+    """
+    if k < 1:
+        raise ValueError("k must be at least 1.")
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Algorithm {algorithm} is not registered.")
+    if algorithm in EMULATED_ALGORITHMS and emulator is None:
+        raise ValueError(f"Algorithm {algorithm} needs a travel time emulator.")
+    groups = [_as_points(users) for users in groups]
+
+    with ThreadPoolExecutor(max_workers=max(int(n_workers), 1)) as executor:
+        if algorithm not in EMULATED_ALGORITHMS or len(pubs) == 0 or len(groups) < BATCH_SHARED_MATRIX_MIN_GROUPS:
+            return list(executor.map(lambda users: suggest_pub(users, pubs, algorithm, emulator, k), groups))
+
+        results = []
+        for wave in _waves(groups, max_members):
+            points, members = np.unique(np.vstack(wave), axis=0, return_inverse=True)
+            times = travel_time_matrix(points, pubs.xy, emulator)
+            ends = np.cumsum([len(users) for users in wave])
+            member_rows = np.split(members.reshape(-1), ends[:-1])
+            results.extend(executor.map(lambda i: suggest_pub(wave[i], pubs, algorithm, emulator, k, times=times[member_rows[i]]), range(len(wave))))
+        return results
+
+
+def _waves(groups, max_members):
+    # Consecutive groups with at most max_members members between them, or a single larger group
+    wave, n_members = [], 0
+    for users in groups:
+        if wave and n_members + len(users) > max_members:
+            yield wave
+            wave, n_members = [], 0
+        wave.append(users)
+        n_members += len(users)
+    if wave:
+        yield wave
@@ -5,10 +5,10 @@ class ApiClient:
         self.base_url = base_url
         self.api_key = api_key
 
-    def call_api(self, endpoint, method, headers, data):
+    def call_api(self, endpoint, method, headers, data, timeout=None):
         url = f"{self.base_url}/{endpoint}"
         headers = headers or {}
-        response = requests.request(method, url, headers=headers, json=data)
+        response = requests.request(method, url, headers=headers, json=data, timeout=timeout)
         if response.status_code == 200:
             return response.json()
         else:
@@ -22,8 +22,8 @@ class ApiClient:
     def get(self, endpoint, headers=None, data=None):
         return self.call_api(endpoint, "GET", headers, data)
     
-    def post(self, endpoint, headers=None, data=None):
-        return self.call_api(endpoint, "POST", headers, data)
+    def post(self, endpoint, headers=None, data=None, timeout=None):
+        return self.call_api(endpoint, "POST", headers, data, timeout)
     
     def put(self, endpoint, headers=None, data=None):
         return self.call_api(endpoint, "PUT", headers, data)
@@ -32,7 +32,7 @@ class GooglePlacesApi(IPlacesApi):
         headers = {
             "Content-Type": "application/json",
             "X-Goog-Api-Key": self.api.api_key,
-            "X-Goog-FieldMask": "places.displayName,places.formattedAddress,nextPageToken",
+            "X-Goog-FieldMask": "places.displayName,places.formattedAddress,places.location,nextPageToken",
         }
         data = {
             "textQuery": query,
@@ -48,13 +48,13 @@ class GoogleRoutesApi(IRoutesApi):
     def __init__(self, api_key):
         super().__init__("https://routes.googleapis.com", api_key)
 
-    def matrix(self, routes_rqst:RoutesRequest):
+    def matrix(self, routes_rqst:RoutesRequest, timeout=None):
         endpoint = "distanceMatrix/v2:computeRouteMatrix"
         headers = {
             "Content-Type": "application/json",
             "X-Goog-Api-Key": self.api.api_key,
-            "X-Goog-FieldMask": "status,condition,distanceMeters,staticDuration",
+            "X-Goog-FieldMask": "originIndex,destinationIndex,status,condition,distanceMeters,staticDuration",
         }
         data = routes_rqst.to_json()
 
-        return self.api.post(endpoint, headers, data)    
\ No newline at end of file
+        return self.api.post(endpoint, headers, data, timeout)    
\ No newline at end of file
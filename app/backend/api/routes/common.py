@@ -74,6 +74,33 @@ def paginate_query(query, args, url_stem):
     return paginated_items, meta, links
 
 
+# Accepted range of each coordinate in a request body
+LAT_LNG_RANGES = {"lat": (-90.0, 90.0), "lng": (-180.0, 180.0)}
+
+
+def validate_lat_lng(data, in_query=False):
+    """An INVALID_FIELD error for the first lat or lng in the request body (or query string if in_query) that is not a number in range, None if both are valid or absent"""
+    for field, (low, high) in LAT_LNG_RANGES.items():
+        if field not in data:
+            continue
+        value = data[field]
+        try:
+            valid = not isinstance(value, bool) and low <= float(value) <= high
+        except (TypeError, ValueError):
+            valid = False
+        if not valid:
+            source = {"parameter": field} if in_query else {"pointer": f"/data/attributes/{field}"}
+            return create_error("INVALID_FIELD", f"{field} must be a number between {low:g} and {high:g}", source)
+    return None
+
+
+def get_lat_lng(data, address):
+    """Coordinates for a new or changed address: lat and lng from the request body if both are given, otherwise geocoded. None if geocoding fails"""
+    if "lat" in data and "lng" in data:
+        return float(data["lat"]), float(data["lng"])
+    return geocode_address(address)
+
+
 def geocode_address(address):
     """Utility function to geocode addresses using Google Maps API"""
     API_KEY = os.getenv("API_KEY", "api_key")
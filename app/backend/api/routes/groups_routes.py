@@ -3,13 +3,15 @@ from models import db, Group, User, UserGroupQuery
 from http import HTTPStatus
 from .common import create_success_response, paginate_query, create_error_response, create_error
 from uuid import uuid4
-from services.pub_service import suggest_pub_for_group
+from services.pub_service import suggest_pub_for_group, suggest_pubs_for_groups
 from dotenv import load_dotenv
 import os
 
 ALGORITHM_NAME = os.getenv("ALGORITHM_NAME", "geo-centre")
 API_VERSION = os.getenv("API_VERSION", "vX")
 api_url_prefix = f"/api/{API_VERSION}"
+SUGGESTION_MAX_K = int(os.getenv("SUGGESTION_MAX_K", "10"))
+BATCH_SUGGESTION_MAX_GROUPS = int(os.getenv("BATCH_SUGGESTION_MAX_GROUPS", "1000"))
 
 groups_routes = Blueprint("groups_routes", __name__)
 
@@ -217,20 +219,142 @@ def get_group_users(group_id):
     )
 
 
+def _suggestion_meta(suggestion, user_ids):
+    meta = {}
+    if suggestion.score is not None:
+        meta["score"] = suggestion.score
+    if suggestion.member_times is not None:
+        meta["member_times_seconds"] = {user_id: round(float(seconds), 1) for user_id, seconds in zip(user_ids, suggestion.member_times)}
+    if suggestion.emulated_score is not None:
+        # score and member_times_seconds are then real journey times where the Routes API knew them
+        meta["emulated_score"] = suggestion.emulated_score
+    return meta
+
+
 @groups_routes.route("/groups/<string:group_id>/suggested-pub", methods=["GET"])
 def get_suggested_pub(group_id):
     algorithm = ALGORITHM_NAME
 
+    # Without k the single best pub is returned as before, with it a ranked list of the k best
+    try:
+        k = int(request.args["k"]) if "k" in request.args else None
+    except ValueError:
+        k = 0
+    if k is not None and not 1 <= k <= SUGGESTION_MAX_K:
+        return (
+            jsonify(create_error_response([create_error("INVALID_QUERY_PARAMETERS", f"k must be an integer between 1 and {SUGGESTION_MAX_K}", {"parameter": "k"})])),
+            HTTPStatus.BAD_REQUEST,
+        )
+
+    # Re-rank the emulator's finalists on real journey times, REFINE_WITH_ROUTES decides if not given
+    refine = request.args.get("refine")
+    if refine is not None and refine.lower() not in ("true", "false"):
+        return (
+            jsonify(create_error_response([create_error("INVALID_QUERY_PARAMETERS", "refine must be true or false", {"parameter": "refine"})])),
+            HTTPStatus.BAD_REQUEST,
+        )
+    refine = None if refine is None else refine.lower() == "true"
+
     try:
-        pub = suggest_pub_for_group(group_id, algorithm)
+        suggested, user_ids = suggest_pub_for_group(group_id, algorithm, k or 1, refine)
+        if not suggested:
+            return jsonify(create_error_response([create_error("RESOURCE_NOT_FOUND", "No pubs to suggest from")])), HTTPStatus.NOT_FOUND
+
+        meta = {"algorithm": algorithm}
+        best = suggested[0][1]
+        if best.pruned is not None:
+            meta["candidates"] = {"evaluated": best.evaluated, "pruned": best.pruned}
+
+        if k is None:
+            pub, suggestion = suggested[0]
+            data = pub.get_as_dict()
+            meta.update(_suggestion_meta(suggestion, user_ids))
+        else:
+            data = [
+                {**pub.get_as_dict(), "meta": {"rank": rank, **_suggestion_meta(suggestion, user_ids)}, "links": {"self": f"{api_url_prefix}/pubs/{pub.id}"}}
+                for rank, (pub, suggestion) in enumerate(suggested, start=1)
+            ]
+            meta["k"] = k
         return (
             jsonify(
                 create_success_response(
-                    data=pub.get_as_dict(),
-                    message="Suggested pub fetched successfully",
+                    data=data,
+                    meta=meta,
+                    message="Suggested pub fetched successfully" if k is None else "Suggested pubs fetched successfully",
                 )
             ),
             HTTPStatus.OK,
         )
+    except ValueError as e:
+        # e.g. no member of the group has a location yet
+        return jsonify(create_error_response([create_error("INVALID_GROUP", str(e))])), HTTPStatus.UNPROCESSABLE_ENTITY
+    except Exception as e:
+        return jsonify(create_error_response([create_error("ERROR", str(e))])), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@groups_routes.route("/groups/suggested-pubs", methods=["POST"])
+def get_suggested_pubs():
+    if not request.is_json:
+        return (
+            jsonify(create_error_response([create_error("INVALID_CONTENT_TYPE", "Content-Type must be application/json", {"header": "Content-Type"})])),
+            HTTPStatus.BAD_REQUEST,
+        )
+
+    data = request.get_json()
+    group_ids = data.get("group_ids") if isinstance(data, dict) else None
+    if not isinstance(group_ids, list) or not group_ids or not all(isinstance(group_id, str) for group_id in group_ids):
+        return (
+            jsonify(create_error_response([create_error("INVALID_FIELD", "group_ids must be a non-empty list of group ids", {"pointer": "/group_ids"})])),
+            HTTPStatus.BAD_REQUEST,
+        )
+    if len(group_ids) > BATCH_SUGGESTION_MAX_GROUPS:
+        return (
+            jsonify(create_error_response([create_error("INVALID_FIELD", f"At most {BATCH_SUGGESTION_MAX_GROUPS} groups per request", {"pointer": "/group_ids"})])),
+            HTTPStatus.BAD_REQUEST,
+        )
+    k = data.get("k", 1)
+    if not isinstance(k, int) or isinstance(k, bool) or not 1 <= k <= SUGGESTION_MAX_K:
+        return (
+            jsonify(create_error_response([create_error("INVALID_FIELD", f"k must be an integer between 1 and {SUGGESTION_MAX_K}", {"pointer": "/k"})])),
+            HTTPStatus.BAD_REQUEST,
+        )
+
+    algorithm = ALGORITHM_NAME
+    try:
+        results = suggest_pubs_for_groups(group_ids, algorithm, k)
     except Exception as e:
         return jsonify(create_error_response([create_error("ERROR", str(e))])), HTTPStatus.INTERNAL_SERVER_ERROR
+
+    # Each group links to its ranked pubs, every suggested pub is included once
+    groups, included = [], {}
+    for group_id, result in results.items():
+        entry = {"id": group_id, "type": "group", "links": {"self": f"{api_url_prefix}/groups/{group_id}"}}
+        if result is None:
+            entry["meta"] = {"errors": [create_error("RESOURCE_NOT_FOUND", f"Group {group_id} not found")]}
+        elif not result[1]:
+            entry["meta"] = {"errors": [create_error("INVALID_GROUP", "No group members have a location.")]}
+        else:
+            suggested, user_ids = result
+            entry["relationships"] = {
+                "suggested_pubs": {
+                    "data": [
+                        {"id": pub.id, "type": "pub", "meta": {"rank": rank, **_suggestion_meta(suggestion, user_ids)}}
+                        for rank, (pub, suggestion) in enumerate(suggested, start=1)
+                    ]
+                }
+            }
+            for pub, _ in suggested:
+                included.setdefault(pub.id, {**pub.get_as_dict(), "links": {"self": f"{api_url_prefix}/pubs/{pub.id}"}})
+        groups.append(entry)
+
+    return (
+        jsonify(
+            create_success_response(
+                data=groups,
+                meta={"algorithm": algorithm, "k": k},
+                message="Suggested pubs fetched successfully",
+                included=list(included.values()),
+            )
+        ),
+        HTTPStatus.OK,
+    )
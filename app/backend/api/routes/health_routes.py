@@ -0,0 +1,26 @@
+from flask import Blueprint, jsonify
+from http import HTTPStatus
+from .common import create_success_response, create_error_response, create_error
+from services.emulator_service import emulator_registry
+from services.warm_up_service import WARM_UP_STEPS, is_ready, warm_state
+import os
+
+health_routes = Blueprint("health_routes", __name__)
+
+
+@health_routes.route("/ready", methods=["GET"])
+def get_ready():
+    if not is_ready():
+        errors = [
+            create_error("NOT_WARM", warm_state.get(name, {}).get("error", "Warm-up has not run"), {"step": name})
+            for name in WARM_UP_STEPS
+            if not warm_state.get(name, {}).get("ready")
+        ]
+        return jsonify(create_error_response(errors)), HTTPStatus.SERVICE_UNAVAILABLE
+
+    data = {
+        "pid": os.getpid(),
+        "steps": warm_state,
+        "emulators": {name: emulator_registry.version(name) for name in emulator_registry.loaded()},
+    }
+    return jsonify(create_success_response(data=data, message="Warm and ready")), HTTPStatus.OK
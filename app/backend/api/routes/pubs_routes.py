@@ -1,13 +1,17 @@
 from flask import Blueprint, request, jsonify
 from models import db, Pub
 from http import HTTPStatus
-from .common import create_success_response, paginate_query, create_error_response, create_error
+from services.pub_catalog_service import invalidate_pub_catalog
+from services.pub_service import find_nearby_pubs
+from .common import create_success_response, paginate_query, create_error_response, create_error, get_lat_lng, validate_lat_lng
 from uuid import uuid4
+import math
 import os
 
 # Relative import not necessary apparently.
 API_VERSION = os.getenv("API_VERSION", "vX")
 api_url_prefix = f"/api/{API_VERSION}"
+NEARBY_MAX_K = int(os.getenv("NEARBY_MAX_K", "50"))
 
 pubs_routes = Blueprint("pubs_routes", __name__)
 
@@ -29,6 +33,55 @@ def get_pubs():
     )
 
 
+@pubs_routes.route("/pubs/nearby", methods=["GET"])
+def get_nearby_pubs():
+    if "lat" not in request.args or "lng" not in request.args:
+        return (
+            jsonify(create_error_response([create_error("INVALID_QUERY_PARAMETERS", "lat and lng are required")])),
+            HTTPStatus.BAD_REQUEST,
+        )
+    lat_lng_error = validate_lat_lng(request.args, in_query=True)
+    if lat_lng_error:
+        return jsonify(create_error_response([lat_lng_error])), HTTPStatus.BAD_REQUEST
+    lat = float(request.args["lat"])
+    lng = float(request.args["lng"])
+
+    radius = request.args.get("radius")
+    if radius is not None:
+        try:
+            radius = float(radius)
+        except ValueError:
+            radius = math.nan
+        if not (math.isfinite(radius) and radius > 0):
+            return (
+                jsonify(create_error_response([create_error("INVALID_FIELD", "radius must be a positive number of metres", {"parameter": "radius"})])),
+                HTTPStatus.BAD_REQUEST,
+            )
+
+    try:
+        k = int(request.args.get("k", 5))
+    except ValueError:
+        k = None
+    if k is None or not 1 <= k <= NEARBY_MAX_K:
+        return (
+            jsonify(create_error_response([create_error("INVALID_QUERY_PARAMETERS", f"k must be an integer between 1 and {NEARBY_MAX_K}", {"parameter": "k"})])),
+            HTTPStatus.BAD_REQUEST,
+        )
+
+    nearby = find_nearby_pubs(lat, lng, k, radius)
+    data = [{**pub.get_as_dict(), "meta": {"distance_m": round(distance, 1)}, "links": {"self": f"{api_url_prefix}/pubs/{pub.id}"}} for pub, distance in nearby]
+    return (
+        jsonify(
+            create_success_response(
+                data=data,
+                meta={"count": len(data)},
+                message="Nearby pubs fetched successfully",
+            )
+        ),
+        HTTPStatus.OK,
+    )
+
+
 @pubs_routes.route("/pubs/<string:pub_id>", methods=["GET"])
 def get_pub(pub_id):
     pub = Pub.query.get_or_404(pub_id).get_as_dict()
@@ -75,10 +128,17 @@ def create_pub():
             HTTPStatus.BAD_REQUEST,
         )
 
+    lat_lng_error = validate_lat_lng(data)
+    if lat_lng_error:
+        return jsonify(create_error_response([lat_lng_error])), HTTPStatus.BAD_REQUEST
+
     try:
-        new_pub = Pub(id=str(uuid4().hex), name=data["name"], address=data["address"])
+        # Locate the pub once here, the projected x/y are filled in from lat/lng when the row is written
+        lat, lng = get_lat_lng(data, data["address"]) or (None, None)
+        new_pub = Pub(id=str(uuid4().hex), name=data["name"], address=data["address"], lat=lat, lng=lng)
         db.session.add(new_pub)
         db.session.commit()
+        invalidate_pub_catalog()
         data = {
             "id": new_pub.id,
             "type": "pub",
@@ -112,6 +172,7 @@ def delete_pub(pub_id):
     try:
         db.session.delete(pub)
         db.session.commit()
+        invalidate_pub_catalog(deleted_ids=[pub_id])
         return jsonify(create_success_response(message="Pub deleted successfull")), HTTPStatus.NO_CONTENT
 
     except Exception as e:
@@ -124,15 +185,22 @@ def patch_pub(pub_id):
     pub_query = Pub.query.get_or_404(pub_id)
     data = request.get_json()
 
+    lat_lng_error = validate_lat_lng(data)
+    if lat_lng_error:
+        return jsonify(create_error_response([lat_lng_error])), HTTPStatus.BAD_REQUEST
+
     # If no correct fields are given may still return a success -> TODO(@TS): Check what .commit() does for unchanged object
 
     if "name" in data:
         pub_query.name = data["name"]
     if "address" in data:
         pub_query.address = data["address"]
+    if "address" in data or ("lat" in data and "lng" in data):
+        pub_query.lat, pub_query.lng = get_lat_lng(data, pub_query.address) or (None, None)
 
     try:
         db.session.commit()
+        invalidate_pub_catalog()
         data = {**pub_query.get_as_dict(), "links": {"self": f"{api_url_prefix}/pubs/{pub_query.id}"}}
 
         return (
@@ -173,11 +241,17 @@ def put_pub(pub_id):
             HTTPStatus.BAD_REQUEST,
         )
 
+    lat_lng_error = validate_lat_lng(data)
+    if lat_lng_error:
+        return jsonify(create_error_response([lat_lng_error])), HTTPStatus.BAD_REQUEST
+
     pub_query.name = data["name"]
     pub_query.address = data["address"]
+    pub_query.lat, pub_query.lng = get_lat_lng(data, data["address"]) or (None, None)
 
     try:
         db.session.commit()
+        invalidate_pub_catalog()
         data = {**pub_query.get_as_dict(), "links": {"self": f"{api_url_prefix}/pubs/{pub_query.id}"}}
         return (
             jsonify(
@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 from models import db, User, Group, UserGroupQuery
 from http import HTTPStatus
-from .common import create_success_response, paginate_query, create_error_response, create_error
+from .common import create_success_response, paginate_query, create_error_response, create_error, get_lat_lng, validate_lat_lng
 from uuid import uuid4
 import os
 
@@ -75,8 +75,14 @@ def create_user():
             HTTPStatus.BAD_REQUEST,
         )
 
+    lat_lng_error = validate_lat_lng(data)
+    if lat_lng_error:
+        return jsonify(create_error_response([lat_lng_error])), HTTPStatus.BAD_REQUEST
+
     try:
-        new_user = User(id=str(uuid4().hex), address=data["address"], first_name=data["first_name"], second_name=data["second_name"])
+        # Locate the user once here, the projected x/y are filled in from lat/lng when the row is written
+        lat, lng = get_lat_lng(data, data["address"]) or (None, None)
+        new_user = User(id=str(uuid4().hex), address=data["address"], first_name=data["first_name"], second_name=data["second_name"], lat=lat, lng=lng)
         db.session.add(new_user)
         db.session.commit()
         data = {
@@ -124,10 +130,16 @@ def patch_user(user_id):
     user_query = User.query.get_or_404(user_id)
     data = request.get_json()
 
+    lat_lng_error = validate_lat_lng(data)
+    if lat_lng_error:
+        return jsonify(create_error_response([lat_lng_error])), HTTPStatus.BAD_REQUEST
+
     # If no correct fields are given may still return a success -> TODO(@TS): Check what .commit() does for unchanged object
 
     if "address" in data:
         user_query.address = data["address"]
+    if "address" in data or ("lat" in data and "lng" in data):
+        user_query.lat, user_query.lng = get_lat_lng(data, user_query.address) or (None, None)
     if "first_name" in data:
         user_query.first_name = data["first_name"]
     if "second_name" in data:
@@ -175,7 +187,12 @@ def put_user(user_id):
             HTTPStatus.BAD_REQUEST,
         )
 
+    lat_lng_error = validate_lat_lng(data)
+    if lat_lng_error:
+        return jsonify(create_error_response([lat_lng_error])), HTTPStatus.BAD_REQUEST
+
     user_query.address = data["address"]
+    user_query.lat, user_query.lng = get_lat_lng(data, data["address"]) or (None, None)
     user_query.first_name = data["first_name"]
     user_query.second_name = data["second_name"]
 
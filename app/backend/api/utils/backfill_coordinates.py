@@ -0,0 +1,84 @@
+import sys
+from flask import Flask
+from sqlalchemy import update
+from models import db, Pub, User, Location
+from dotenv import load_dotenv
+import os
+from api.routes.common import geocode_address
+from algorithms.bayesian_emulation.coord_transformer import get_coord_transformer
+from algorithms.pub_finder import geohash
+
+if "/app" not in sys.path:
+    print("Ensure you set the PYTHONPATH to ensure relative imports work correctly.")
+
+load_dotenv(dotenv_path="/app/.env")
+### Env variables
+# Get database connection details from environment variables
+DB_USER = os.getenv("MYSQL_USER", "user")
+DB_PASSWORD = os.getenv("MYSQL_PASSWORD", "password")
+DB_HOST = os.getenv("MYSQL_HOST", "mysql")  # "mysql" refers to the container name
+DB_NAME = os.getenv("MYSQL_DATABASE", "DB_NAME")
+DATABASE_URI = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+GEOCODE_MISSING = os.getenv("GEOCODE_MISSING", "true").lower() == "true" # Geocode pubs and users with no lat/lng (one Geocoding API call each)
+BATCH_SIZE = 1000 # Rows per UPDATE
+
+
+def bulk_update(model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(update(model), rows[start:start + BATCH_SIZE])
+        db.session.commit()
+
+
+def geocode_missing(model):
+    """
+    Fill in lat/lng from the address for rows that have none
+    """
+    missing = db.session.query(model.id, model.address).filter(model.lat.is_(None)).all()
+    rows = []
+    for id, address in missing:
+        coords = geocode_address(address)
+        if coords:
+            rows.append({"id": id, "lat": round(coords[0], 8), "lng": round(coords[1], 8)})
+
+    bulk_update(model, rows)
+    print(f"{model.__tablename__}: geocoded {len(rows)} of {len(missing)} rows without lat/lng")
+
+
+def project_missing(model):
+    """
+    Fill in x/y for rows that have lat/lng but no projected coordinates, projecting them all in one call
+    """
+    missing = db.session.query(model.id, model.lat, model.lng).filter(model.lat.isnot(None), model.lng.isnot(None), model.x.is_(None)).all()
+    if not missing:
+        print(f"{model.__tablename__}: nothing to project")
+        return
+
+    ids, lats, lngs = zip(*missing)
+    x, y = get_coord_transformer().transform_many([float(lat) for lat in lats], [float(lng) for lng in lngs])
+    bulk_update(model, [{"id": id, "x": float(x_i), "y": float(y_i)} for id, x_i, y_i in zip(ids, x, y)])
+    print(f"{model.__tablename__}: projected {len(missing)} rows")
+
+
+def geohash_missing():
+    """
+    Fill in the geohash of pubs that have lat/lng but no geohash
+    """
+    missing = db.session.query(Pub.id, Pub.lat, Pub.lng).filter(Pub.lat.isnot(None), Pub.lng.isnot(None), Pub.geohash.is_(None)).all()
+    bulk_update(Pub, [{"id": id, "geohash": geohash.encode(float(lat), float(lng))} for id, lat, lng in missing])
+    print(f"pubs: geohashed {len(missing)} rows")
+
+
+if __name__ == "__main__":
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URI
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+
+    with app.app_context():
+        if GEOCODE_MISSING:
+            geocode_missing(Pub)
+            geocode_missing(User)
+
+        for model in (Pub, User, Location):
+            project_missing(model)
+        geohash_missing()
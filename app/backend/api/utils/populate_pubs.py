@@ -96,7 +96,8 @@ def populate_pubs(api: IPlacesApi, top_left, bottom_right, num_lat_divisions, nu
         pub_data = get_place_data_search_nearby(api, top_left, bottom_right)
         if pub_data:
             for place in pub_data["places"]:
-                pub = (place["displayName"]["text"], place["formattedAddress"])
+                location = place.get("location", {})
+                pub = (place["displayName"]["text"], place["formattedAddress"], location.get("latitude"), location.get("longitude"))
                 total_pubs.add(pub)
 
         # TODO(@TS): This should track the number of next page tokens as I think google maps counts this as an additional query.
@@ -109,8 +110,8 @@ def populate_pubs(api: IPlacesApi, top_left, bottom_right, num_lat_divisions, nu
 
     # Save pubs to the database
     duplicates = 0
-    for name, address in total_pubs:
-        pub = Pub(name=name, address=address)
+    for name, address, lat, lng in total_pubs:
+        pub = Pub(name=name, address=address, lat=lat, lng=lng)
         if not TEST_FUNCTIONALITY_MODE:
             continue
         try:
@@ -159,7 +160,8 @@ if __name__ == "__main__":
     # num_lat_divisions = 2
     # num_lng_divisions = 2
     
-    from app import app
+    from app import create_app
+    app = create_app(warm=False, watch_models=False)
     from api.clients.maps.map_clients import GooglePlacesApi, IPlacesApi
     api = GooglePlacesApi(API_KEY)
     with app.app_context():
@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Blueprint, Flask, render_template, request, jsonify
 from requests import Response
 from flask_cors import CORS
 
@@ -17,7 +17,10 @@ from api.routes.pubs_routes import pubs_routes
 from api.routes.users_routes import users_routes
 from api.routes.groups_routes import groups_routes
 from api.routes.user_group_queries_routes import user_group_queries_routes
+from api.routes.health_routes import health_routes
 from api.routes.common import geocode_address
+from services.emulator_service import start_emulator_watcher
+from services.warm_up_service import warm_up
 
 ### Env variables
 load_dotenv(dotenv_path="/app/.env")
@@ -31,26 +34,50 @@ API_KEY = os.getenv("API_KEY", "api_key")
 API_VERSION = os.getenv("API_VERSION", "vX")  # Add this line
 OUTPUT_PUBS_JSON = os.getenv("OUTPUT_JSON", "true").lower() == "true"
 
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = f"mysql+pymysql://{db_user}:{db_password}@{db_host}/{db_name}"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-CORS(app)  # Enables CORS for all routes and origins
-db.init_app(app)
-migrate = Migrate(app, db)
-
-with app.app_context():
-    db.create_all()
-    
 api_url_prefix = f"/api/{API_VERSION}"
 
-# Register the api routes blueprints
-app.register_blueprint(pubs_routes, url_prefix=api_url_prefix)
-app.register_blueprint(users_routes, url_prefix=api_url_prefix)
-app.register_blueprint(groups_routes, url_prefix=api_url_prefix)
-app.register_blueprint(user_group_queries_routes, url_prefix=api_url_prefix)
+migrate = Migrate()
+app_routes = Blueprint("app_routes", __name__)
+
+
+def create_app(warm=True, watch_models=True, config=None):
+    """
+    Build the Flask app
+
+    warm: Load the emulator and other shared state before returning, see services/warm_up_service.py.
+        Under gunicorn this runs once in the master, so forked workers share the loaded pages.
+    watch_models: Start the thread that swaps in retrained models. Threads do not survive a fork,
+        so gunicorn starts it in each worker instead (see gunicorn.conf.py).
+    config: Overrides for app.config, e.g. a different database.
+    """
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"mysql+pymysql://{db_user}:{db_password}@{db_host}/{db_name}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config.update(config or {})
+    CORS(app)  # Enables CORS for all routes and origins
+    db.init_app(app)
+    migrate.init_app(app, db)
+
+    with app.app_context():
+        db.create_all()
+
+    # Register the api routes blueprints
+    app.register_blueprint(pubs_routes, url_prefix=api_url_prefix)
+    app.register_blueprint(users_routes, url_prefix=api_url_prefix)
+    app.register_blueprint(groups_routes, url_prefix=api_url_prefix)
+    app.register_blueprint(user_group_queries_routes, url_prefix=api_url_prefix)
+    app.register_blueprint(health_routes)
+    app.register_blueprint(app_routes)
+
+    if warm:
+        warm_up(app)
+    if watch_models:
+        start_emulator_watcher(app)
+
+    return app
 
 
-@app.route("/test", methods=["GET"])
+@app_routes.route("/test", methods=["GET"])
 def do():
     return "Hello, world!"
 
@@ -75,7 +102,7 @@ def calculate_centre(coordinates):
     return {"lat": center_lat, "lng": center_lng}
 
 
-@app.route(f"{api_url_prefix}/get-centre", methods=["POST"])
+@app_routes.route(f"{api_url_prefix}/get-centre", methods=["POST"])
 def get_centre():
     users = get_table_data(User)
 
@@ -92,7 +119,7 @@ def get_centre():
     return jsonify(centre)
 
 
-@app.route(f"{api_url_prefix}/geocode", methods=["GET"])
+@app_routes.route(f"{api_url_prefix}/geocode", methods=["GET"])
 def get_geocode():
     address = request.args.get("address")
     if not address:
@@ -108,7 +135,7 @@ def get_geocode():
 
 
 # https://developers.google.com/maps/documentation/routes/reference/rest
-@app.route(f"{api_url_prefix}/get-journey-time", methods=["GET"])
+@app_routes.route(f"{api_url_prefix}/get-journey-time", methods=["GET"])
 def get_journey_time():
     origin_lat = request.args.get("origin_lat")
     origin_lng = request.args.get("origin_lng")
@@ -146,7 +173,7 @@ def get_journey_time():
         return jsonify({"error": "Failed to retrieve journey time"}), 500
 
 
-@app.route(f"{api_url_prefix}/get-journey-times", methods=["GET"])
+@app_routes.route(f"{api_url_prefix}/get-journey-times", methods=["GET"])
 def get_journey_times():
     users = get_table_data(User)
     centre_response = get_centre().get_json()
@@ -0,0 +1,37 @@
+# Production serving: gunicorn -c gunicorn.conf.py
+#
+# The app is created and warmed once in the master (preload_app), loading the emulator and other shared state
+# before the workers are forked, so every worker shares those pages copy-on-write instead of loading its own copy.
+import gc
+import multiprocessing
+import os
+
+wsgi_app = "app:create_app(watch_models=False)"
+preload_app = True
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = "gthread"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+accesslog = "-"
+
+
+def when_ready(server):
+    # Runs in the master after the app is preloaded and before any fork. Moving everything loaded so far out of the
+    # garbage collector's generations stops collections in the workers touching, and so copying, the shared pages
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from models import db
+    from services.emulator_service import start_emulator_watcher
+
+    app = worker.app.wsgi()
+    with app.app_context():
+        # Connections opened by the master must not be shared across processes, so drop them without closing
+        db.engine.dispose(close=False)
+
+    # Threads do not survive the fork, so each worker watches for retrained models itself
+    start_emulator_watcher(app)
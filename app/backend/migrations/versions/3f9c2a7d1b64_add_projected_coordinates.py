@@ -0,0 +1,51 @@
+"""Add lat/lng to pubs and users, and projected x/y to pubs, users and locations
+
+Revision ID: 3f9c2a7d1b64
+Revises: 
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a7d1b64'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+NEW_COLUMNS = {
+    "pubs": ["lat", "lng", "x", "y"],
+    "users": ["lat", "lng", "x", "y"],
+    "locations": ["x", "y"],
+}
+
+
+def _column(name):
+    if name in ("lat", "lng"):
+        return sa.Column(name, sa.DECIMAL(11, 8), nullable=True)
+    return sa.Column(name, sa.Double(), nullable=True)
+
+
+def _existing_columns(table):
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    # app.py runs db.create_all, so tables created since the models changed already have these columns
+    for table, columns in NEW_COLUMNS.items():
+        existing = _existing_columns(table)
+        with op.batch_alter_table(table) as batch_op:
+            for name in columns:
+                if name not in existing:
+                    batch_op.add_column(_column(name))
+
+
+def downgrade():
+    for table, columns in NEW_COLUMNS.items():
+        existing = _existing_columns(table)
+        with op.batch_alter_table(table) as batch_op:
+            for name in reversed(columns):
+                if name in existing:
+                    batch_op.drop_column(name)
@@ -0,0 +1,45 @@
+"""Add updated_at to pubs, the watermark for refreshing the pub catalog
+
+Revision ID: 8b1e4c0d9a27
+Revises: 3f9c2a7d1b64
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1e4c0d9a27'
+down_revision = '3f9c2a7d1b64'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "ix_pubs_updated_at"
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def upgrade():
+    # app.py runs db.create_all, so a pubs table created since the model changed already has the column and index
+    inspector = _inspector()
+    existing = {column["name"] for column in inspector.get_columns("pubs")}
+    indexes = {index["name"] for index in inspector.get_indexes("pubs")}
+    with op.batch_alter_table("pubs") as batch_op:
+        if "updated_at" not in existing:
+            batch_op.add_column(sa.Column("updated_at", sa.DateTime(), nullable=True))
+        if INDEX_NAME not in indexes:
+            batch_op.create_index(INDEX_NAME, ["updated_at"])
+
+
+def downgrade():
+    inspector = _inspector()
+    existing = {column["name"] for column in inspector.get_columns("pubs")}
+    indexes = {index["name"] for index in inspector.get_indexes("pubs")}
+    with op.batch_alter_table("pubs") as batch_op:
+        if INDEX_NAME in indexes:
+            batch_op.drop_index(INDEX_NAME)
+        if "updated_at" in existing:
+            batch_op.drop_column("updated_at")
@@ -0,0 +1,45 @@
+"""Add an indexed geohash to pubs, for prefiltering pubs near a point
+
+Revision ID: c5d2a8e61f03
+Revises: 8b1e4c0d9a27
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d2a8e61f03'
+down_revision = '8b1e4c0d9a27'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "ix_pubs_geohash"
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def upgrade():
+    # app.py runs db.create_all, so a pubs table created since the model changed already has the column and index
+    inspector = _inspector()
+    existing = {column["name"] for column in inspector.get_columns("pubs")}
+    indexes = {index["name"] for index in inspector.get_indexes("pubs")}
+    with op.batch_alter_table("pubs") as batch_op:
+        if "geohash" not in existing:
+            batch_op.add_column(sa.Column("geohash", sa.String(12), nullable=True))
+        if INDEX_NAME not in indexes:
+            batch_op.create_index(INDEX_NAME, ["geohash"])
+
+
+def downgrade():
+    inspector = _inspector()
+    existing = {column["name"] for column in inspector.get_columns("pubs")}
+    indexes = {index["name"] for index in inspector.get_indexes("pubs")}
+    with op.batch_alter_table("pubs") as batch_op:
+        if INDEX_NAME in indexes:
+            batch_op.drop_index(INDEX_NAME)
+        if "geohash" in existing:
+            batch_op.drop_column("geohash")
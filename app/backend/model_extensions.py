@@ -1,14 +1,17 @@
 from decimal import Decimal
-from models import BayesianModel, DElement, XTrainElement, MVectorElement, db
-
-from decimal import Decimal
+import os
+import numpy as np
+from algorithms.bayesian_emulation.model_artifact import artifact_to_emulator, load_model_artifact, pack_model_artifact, read_model_artifact, write_model_artifact
+from models import BayesianModel, BayesianModelArtifact, DElement, XTrainElement, MVectorElement, db
 
 class BayesianModelExtensions:
     @staticmethod
-    def insert_bayesian_model(name, m_vector, x_train, d_vector, beta, sigma, theta, commit=True):
+    def insert_bayesian_model(name, m_vector, x_train, d_vector, beta, sigma, theta, commit=True, l_factor=None, nugget=0, artifact_dir=None, export_elements=False):
         """
         Insert a BayesianModel into the database.
-        
+
+        The model is stored as a binary artifact (see model_artifact), in the database or on disk.
+
         Args:
             name (str): Name of the BayesianModel.
             m_vector (list of Decimal or float): The M vector.
@@ -18,61 +21,130 @@ class BayesianModelExtensions:
             sigma (Decimal or float): The sigma value.
             theta (Decimal or float): The theta value.
             commit (bool): Whether to commit the transaction immediately.
-        
+            l_factor (array-like): The cached lower Cholesky factor of Var[D] (optional, n x n).
+            nugget (Decimal or float): The nugget the factor and M were computed with.
+            artifact_dir (str): Directory to write the artifact to (optional). If not given the artifact is stored in the database.
+            export_elements (bool): Whether to also write M, X_train and D as element rows.
+
         Returns:
             BayesianModel: The created BayesianModel object.
         """
-        # Convert inputs to Decimal for precision
-        m_vector = [Decimal(str(v)) for v in m_vector]
-        x_train = [[Decimal(str(v)) for v in row] for row in x_train]
-        d_vector = [Decimal(str(v)) for v in d_vector]
-        beta = Decimal(str(beta))
-        sigma = Decimal(str(sigma))
-        theta = Decimal(str(theta))
-
         # Create the BayesianModel entry
         new_emulation = BayesianModel(
             name=name,
             m_length=len(m_vector),
             d_length=len(d_vector),
-            beta=beta,
-            sigma=sigma,
-            theta=theta
+            beta=Decimal(str(beta)),
+            sigma=Decimal(str(sigma)),
+            theta=Decimal(str(theta))
         )
         db.session.add(new_emulation)
+        db.session.flush()
+
+        BayesianModelExtensions._store_artifact(new_emulation, x_train, d_vector, m_vector, l_factor, nugget, artifact_dir)
+
+        if export_elements:
+            BayesianModelExtensions._write_elements(new_emulation, x_train, d_vector, m_vector)
 
         if commit:
             db.session.commit()
 
-        # Insert M vector elements
+        return new_emulation
+
+    @staticmethod
+    def _store_artifact(emulation, x_train, d_vector, m_vector, l_factor, nugget, artifact_dir=None):
+        """
+        Write the model's artifact from the given arrays and emulation's hyperparameters, replacing any previous one.
+        """
+        artifact = emulation.artifact
+        if artifact is None:
+            artifact = BayesianModelArtifact(bayesian_model_id=emulation.id, version=0)
+            db.session.add(artifact)
+            emulation.artifact = artifact
+        if artifact_dir is None and artifact.path:
+            # Keep rewriting to disk once a model lives there
+            artifact_dir = os.path.dirname(artifact.path)
+
+        args = (emulation.beta, emulation.sigma, emulation.theta, x_train, d_vector, m_vector)
+        artifact.version += 1
+        if artifact_dir is None:
+            data = pack_model_artifact(*args, L=l_factor, nugget=nugget)
+            artifact.data = data
+            artifact.path = None
+            artifact.checksum = read_model_artifact(data, verify=False)["checksum"]
+            artifact.size_bytes = len(data)
+        else:
+            # Each version gets its own file, so processes still mapping the previous one are unaffected
+            path = os.path.abspath(os.path.join(artifact_dir, f"{emulation.name}-v{artifact.version}.emu"))
+            artifact.checksum = write_model_artifact(path, *args, L=l_factor, nugget=nugget)
+            artifact.data = None
+            artifact.path = path
+            artifact.size_bytes = os.path.getsize(path)
+
+    @staticmethod
+    def _load_arrays(emulation, verify=True):
+        """
+        The stored model as a dict like model_artifact.read_model_artifact, from its artifact or from element rows for models saved before artifacts.
+        """
+        artifact = emulation.artifact
+        if artifact is not None:
+            if artifact.path:
+                loaded = load_model_artifact(artifact.path, verify)
+            else:
+                loaded = read_model_artifact(artifact.data, verify)
+            if loaded["checksum"] != artifact.checksum:
+                raise ValueError(f"Artifact for Bayesian model {emulation.name} does not match version {artifact.version}.")
+            return loaded
+
+        # Element rows carry their own position, so reassemble by index rather than by load order
+        m_vector = np.zeros(emulation.m_length)
+        for el in emulation.m_vector_elements:
+            m_vector[el.index] = el.value
+
+        d_vector = np.zeros(emulation.d_length)
+        for el in emulation.d_elements:
+            d_vector[el.index] = el.value
+
+        n_dimensions = max((el.col for el in emulation.x_train_elements), default=-1) + 1
+        x_train = np.zeros((emulation.d_length, n_dimensions))
+        for el in emulation.x_train_elements:
+            x_train[el.row, el.col] = el.value
+
+        return {"beta": float(emulation.beta), "sigma": float(emulation.sigma), "theta": float(emulation.theta), "nugget": 0.0, "checksum": None,
+                "x_train": x_train, "D": d_vector, "M": m_vector, "L": None}
+
+    @staticmethod
+    def _has_elements(emulation):
+        return DElement.query.filter_by(bayesian_model_id=emulation.id).first() is not None
+
+    @staticmethod
+    def _write_elements(emulation, x_train, d_vector, m_vector):
+        """
+        Replace the model's M, X_train and D element rows with the given arrays.
+        """
+        MVectorElement.query.filter_by(bayesian_model_id=emulation.id).delete()
+        XTrainElement.query.filter_by(bayesian_model_id=emulation.id).delete()
+        DElement.query.filter_by(bayesian_model_id=emulation.id).delete()
+
         for i, value in enumerate(m_vector):
-            element = MVectorElement(bayesian_model_id=new_emulation.id, index=i, value=value)
-            db.session.add(element)
+            db.session.add(MVectorElement(bayesian_model_id=emulation.id, index=i, value=Decimal(str(value))))
 
-        # Insert X_train elements
-        for i, row in enumerate(x_train):
+        for i, row in enumerate(np.atleast_2d(x_train)):
             for j, val in enumerate(row):
-                db.session.add(XTrainElement(bayesian_model_id=new_emulation.id,row=i,col=j,value=val))
+                db.session.add(XTrainElement(bayesian_model_id=emulation.id, row=i, col=j, value=Decimal(str(val))))
 
-        # Insert D vector elements
         for i, value in enumerate(d_vector):
-            element = DElement(bayesian_model_id=new_emulation.id, index=i, value=value)
-            db.session.add(element)
-
-        if commit:
-            db.session.commit()
-
-        return new_emulation
+            db.session.add(DElement(bayesian_model_id=emulation.id, index=i, value=Decimal(str(value))))
 
     @staticmethod
     def get_bayesian_model_by_name(name):
         """
         Retrieve a BayesianModel by its name.
-        
+
         Args:
             name (str): Name of the BayesianModel.
             commit (bool): Whether to commit the transaction immediately.
-        
+
         Returns:
             dict: A dictionary containing the BayesianModel data, or None if not found.
         """
@@ -83,10 +155,34 @@ class BayesianModelExtensions:
         return emulation
 
     @staticmethod
-    def update_bayesian_model(name, m_vector=None, x_train=None, d_vector=None, beta=None, sigma=None, theta=None, commit=True):
+    def get_bayesian_emulator_by_name(name, neighbour_tolerance=None, verify=True):
+        """
+        Retrieve a BayesianModel by its name and build a BayesianEmulator from it.
+
+        The emulator's arrays are read-only views into the artifact, memory mapped when it is stored on disk.
+
+        Args:
+            name (str): Name of the BayesianModel.
+            neighbour_tolerance (float): If given, build the emulator's neighbour index with this truncation tolerance (optional).
+            verify (bool): Whether to check the artifact's checksum.
+
+        Returns:
+            BayesianEmulator: The emulator with M, and the cached factor of Var[D] if one was stored, or None if not found.
+        """
+        emulation = BayesianModelExtensions.get_bayesian_model_by_name(name)
+        if not emulation:
+            return None
+
+        return artifact_to_emulator(BayesianModelExtensions._load_arrays(emulation, verify), neighbour_tolerance)
+
+    @staticmethod
+    def update_bayesian_model(name, m_vector=None, x_train=None, d_vector=None, beta=None, sigma=None, theta=None, commit=True, l_factor=None, nugget=None):
         """
         Update a BayesianModel in the database.
-        
+
+        Writes a new version of the artifact. A stored factor of Var[D] is dropped when X_train, D, sigma, theta or the nugget
+        change without a new l_factor, since it would no longer match.
+
         Args:
             name (str): Name of the BayesianModel.
             m_vector (list of Decimal or float): The new M vector (optional).
@@ -96,7 +192,9 @@ class BayesianModelExtensions:
             sigma (Decimal or float): The new sigma value (optional).
             theta (Decimal or float): The new theta value (optional).
             commit (bool): Whether to commit the transaction immediately.
-        
+            l_factor (array-like): The new lower Cholesky factor of Var[D] (optional).
+            nugget (Decimal or float): The nugget the new factor was computed with (optional, required with l_factor).
+
         Returns:
             bool: True if the BayesianModel was updated, False if not found.
         """
@@ -104,6 +202,9 @@ class BayesianModelExtensions:
         if not emulation:
             return False
 
+        stored = BayesianModelExtensions._load_arrays(emulation)
+        factor_unchanged = x_train is None and d_vector is None and sigma is None and theta is None
+
         # Update scalar fields if provided
         if beta is not None:
             emulation.beta = Decimal(str(beta))
@@ -112,31 +213,71 @@ class BayesianModelExtensions:
         if theta is not None:
             emulation.theta = Decimal(str(theta))
 
-        # Update M vector if provided
-        if m_vector is not None:
-            MVectorElement.query.filter_by(bayesian_model_id=emulation.id).delete()
-            m_vector = [Decimal(str(v)) for v in m_vector]
-            emulation.m_length = len(m_vector)
-            for i, value in enumerate(m_vector):
-                element = MVectorElement(bayesian_model_id=emulation.id, index=i, value=value)
-                db.session.add(element)
-
-        # Update X_train if provided
-        if x_train is not None:
-            XTrainElement.query.filter_by(bayesian_model_id=emulation.id).delete()
-            x_train = [Decimal(str(v)) for v in x_train]
-            for i, value in enumerate(x_train):
-                element = XTrainElement(bayesian_model_id=emulation.id, index=i, value=value)
-                db.session.add(element)
-
-        # Update D vector if provided
-        if d_vector is not None:
-            DElement.query.filter_by(bayesian_model_id=emulation.id).delete()
-            d_vector = [Decimal(str(v)) for v in d_vector]
-            emulation.d_length = len(d_vector)
-            for i, value in enumerate(d_vector):
-                element = DElement(bayesian_model_id=emulation.id, index=i, value=value)
-                db.session.add(element)
+        m_vector = stored["M"] if m_vector is None else m_vector
+        x_train = stored["x_train"] if x_train is None else x_train
+        d_vector = stored["D"] if d_vector is None else d_vector
+        emulation.m_length = len(m_vector)
+        emulation.d_length = len(d_vector)
+
+        if l_factor is None and nugget is None and factor_unchanged:
+            l_factor, nugget = stored["L"], stored["nugget"]
+
+        had_elements = BayesianModelExtensions._has_elements(emulation)
+        BayesianModelExtensions._store_artifact(emulation, x_train, d_vector, m_vector, l_factor, nugget or 0)
+
+        # Keep an element export in step with the artifact
+        if had_elements:
+            BayesianModelExtensions._write_elements(emulation, x_train, d_vector, m_vector)
+
+        if commit:
+            db.session.commit()
+
+        return True
+
+    @staticmethod
+    def add_bayesian_model_observations(name, x_new, d_new, m_vector, l_factor=None, nugget=0, commit=True):
+        """
+        Append new observations to a stored BayesianModel, as produced by BayesianEmulator.add_observations.
+
+        Args:
+            name (str): Name of the BayesianModel.
+            x_new (list of Decimal or float): The new X_train rows.
+            d_new (list of Decimal or float): The new D values.
+            m_vector (list of Decimal or float): The updated M vector.
+            l_factor (array-like): The updated lower Cholesky factor of Var[D] (optional).
+            nugget (Decimal or float): The nugget the updated factor was computed with.
+            commit (bool): Whether to commit the transaction immediately.
+
+        Returns:
+            bool: True if the BayesianModel was updated, False if not found.
+        """
+        emulation = BayesianModel.query.filter_by(name=name).first()
+        if not emulation:
+            return False
+
+        stored = BayesianModelExtensions._load_arrays(emulation)
+        x_train = np.vstack([stored["x_train"], np.asarray(x_new, dtype=np.float64).reshape(-1, stored["x_train"].shape[1])])
+        d_vector = np.concatenate([stored["D"], np.asarray(d_new, dtype=np.float64)])
+        return BayesianModelExtensions.update_bayesian_model(name, m_vector, x_train, d_vector, commit=commit, l_factor=l_factor, nugget=nugget)
+
+    @staticmethod
+    def export_bayesian_model_elements(name, commit=True):
+        """
+        Write a BayesianModel's M, X_train and D as element rows, e.g. for inspecting it in SQL. Later updates keep them in step.
+
+        Args:
+            name (str): Name of the BayesianModel.
+            commit (bool): Whether to commit the transaction immediately.
+
+        Returns:
+            bool: True if the elements were written, False if not found.
+        """
+        emulation = BayesianModel.query.filter_by(name=name).first()
+        if not emulation:
+            return False
+
+        stored = BayesianModelExtensions._load_arrays(emulation)
+        BayesianModelExtensions._write_elements(emulation, stored["x_train"], stored["D"], stored["M"])
 
         if commit:
             db.session.commit()
@@ -147,11 +288,13 @@ class BayesianModelExtensions:
     def delete_bayesian_model(name, commit=True):
         """
         Delete a BayesianModel from the database.
-        
+
+        An artifact stored on disk is left in place, since other processes may still have it mapped.
+
         Args:
             name (str): Name of the BayesianModel.
             commit (bool): Whether to commit the transaction immediately.
-        
+
         Returns:
             bool: True if the BayesianModel was deleted, False if not found.
         """
@@ -160,6 +303,7 @@ class BayesianModelExtensions:
             return False
 
         # Delete all associated elements
+        BayesianModelArtifact.query.filter_by(bayesian_model_id=emulation.id).delete()
         MVectorElement.query.filter_by(bayesian_model_id=emulation.id).delete()
         XTrainElement.query.filter_by(bayesian_model_id=emulation.id).delete()
         DElement.query.filter_by(bayesian_model_id=emulation.id).delete()
@@ -170,4 +314,4 @@ class BayesianModelExtensions:
         if commit:
             db.session.commit()
 
-        return True
\ No newline at end of file
+        return True
@@ -4,26 +4,80 @@ from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import UniqueConstraint
 from sqlalchemy.inspection import inspect
 from sqlalchemy import DECIMAL
+from sqlalchemy.dialects.mysql import LONGBLOB
+from sqlalchemy import event
 
 from api.clients.maps.routes_request import Coords
+from algorithms.bayesian_emulation.coord_transformer import get_coord_transformer
+from algorithms.pub_finder import geohash
 
 
 def get_uuid():
     return uuid4().hex
 
 
+def utc_now():
+    # Naive UTC, as DateTime columns are read back without a timezone
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 db = SQLAlchemy()
 
 
-class Pub(db.Model):
+class ProjectedCoordsMixin:
+    # Metres east and north of Big Ben (see CoordTransformer), projected from lat/lng whenever the row is written
+    x = db.Column(db.Double, nullable=True)
+    y = db.Column(db.Double, nullable=True)
+
+
+@event.listens_for(ProjectedCoordsMixin, "before_insert", propagate=True)
+@event.listens_for(ProjectedCoordsMixin, "before_update", propagate=True)
+def project_coords(mapper, connection, target):
+    if target.lat is None or target.lng is None:
+        target.x = target.y = None
+        return
+
+    state = inspect(target)
+    moved = state.attrs.lat.history.has_changes() or state.attrs.lng.history.has_changes()
+    if moved or target.x is None or target.y is None:
+        target.x, target.y = get_coord_transformer().transform(float(target.lat), float(target.lng))
+
+
+class Pub(ProjectedCoordsMixin, db.Model):
     __tablename__ = "pubs"
     id = db.Column(db.String(32), primary_key=True, unique=True, default=get_uuid)
     name = db.Column(db.String(150), unique=True, nullable=False)
     address = db.Column(db.String(250), nullable=False)
+    lat = db.Column(db.DECIMAL(11, 8), nullable=True)
+    lng = db.Column(db.DECIMAL(11, 8), nullable=True)
+    # Lets the database prefilter pubs near a point by prefix, see geohash.cells_within
+    geohash = db.Column(db.String(12), nullable=True, index=True)
+    # Watermark for refreshing the in-memory pub catalog, see services/pub_catalog_service.py
+    updated_at = db.Column(db.DateTime, default=utc_now, onupdate=utc_now, nullable=True, index=True)
 
     def get_as_dict(self):
         return {"id": self.id, "type": "pub", "attributes": {c.key: getattr(self, c.key) for c in inspect(self).mapper.column_attrs if c.key != "id"}}
 
+    @classmethod
+    def query_near(cls, lat, lng, radius_metres):
+        """
+        Pubs in the geohash cells covering a circle, a superset of the pubs within radius_metres
+        """
+        cells = geohash.cells_within(lat, lng, radius_metres)
+        return cls.query.filter(db.or_(*(cls.geohash.startswith(cell) for cell in cells)))
+
+
+@event.listens_for(Pub, "before_insert")
+@event.listens_for(Pub, "before_update")
+def set_geohash(mapper, connection, target):
+    if target.lat is None or target.lng is None:
+        target.geohash = None
+        return
+
+    state = inspect(target)
+    if state.attrs.lat.history.has_changes() or state.attrs.lng.history.has_changes() or target.geohash is None:
+        target.geohash = geohash.encode(float(target.lat), float(target.lng))
+
 
 class Group(db.Model):
     __tablename__ = "groups"
@@ -57,12 +111,14 @@ class UserGroupQuery(db.Model):
         }
 
 
-class User(db.Model):
+class User(ProjectedCoordsMixin, db.Model):
     __tablename__ = "users"
     id = db.Column(db.String(32), primary_key=True, unique=True, default=get_uuid)
     address = db.Column(db.String(250), nullable=False)
     first_name = db.Column(db.String(150), nullable=False)
     second_name = db.Column(db.String(150), nullable=False)
+    lat = db.Column(db.DECIMAL(11, 8), nullable=True)
+    lng = db.Column(db.DECIMAL(11, 8), nullable=True)
 
     def get_as_dict(self):
         return {
@@ -71,7 +127,7 @@ class User(db.Model):
             "attributes": {c.key: getattr(self, c.key) for c in inspect(self).mapper.column_attrs if c.key != "id"},
         }
 
-class Location(db.Model):
+class Location(ProjectedCoordsMixin, db.Model):
     __tablename__ = 'locations'
     __table_args__ = (
         UniqueConstraint('name', 'lat', 'lng', name='uq_location_name_coords'),
@@ -230,4 +286,16 @@ class DElement(db.Model):
     # Ensure that each element in a D is unique
     __table_args__ = (
         UniqueConstraint('bayesian_model_id', 'index', name='uq_x_train_element'),
-    )
\ No newline at end of file
+    )
+
+class BayesianModelArtifact(db.Model):
+    __tablename__ = "bayesian_model_artifacts"
+    id = db.Column(db.Integer, primary_key=True)
+    bayesian_model_id = db.Column(db.Integer, db.ForeignKey("bayesian_model.id"), nullable=False, unique=True)
+    version = db.Column(db.Integer, nullable=False)  # Incremented each time the artifact is rewritten
+    checksum = db.Column(db.String(64), nullable=False)  # SHA-256 of the artifact payload, as in its header
+    size_bytes = db.Column(db.BigInteger, nullable=False)
+    data = db.Column(db.LargeBinary().with_variant(LONGBLOB, "mysql"), nullable=True)  # The artifact itself, null when stored on disk
+    path = db.Column(db.String(500), nullable=True)  # Location of the artifact on disk, null when stored in data
+
+    model = db.relationship("BayesianModel", backref=db.backref("artifact", uselist=False, lazy=True))
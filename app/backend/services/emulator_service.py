@@ -0,0 +1,57 @@
+import os
+from algorithms.bayesian_emulation.emulator_registry import EmulatorRegistry
+from model_extensions import BayesianModelExtensions
+from models import BayesianModel, BayesianModelArtifact, db
+from services.warm_up_service import register_warm_up
+
+BAYESIAN_MODEL_NAME = os.getenv("BAYESIAN_MODEL_NAME", "initial-set-5")
+EMULATOR_MEMORY_BUDGET_MB = float(os.getenv("EMULATOR_MEMORY_BUDGET_MB", "512"))
+EMULATOR_POLL_SECONDS = float(os.getenv("EMULATOR_POLL_SECONDS", "30")) # 0 disables checking for retrained models
+
+
+def _load(name):
+    emulation = BayesianModelExtensions.get_bayesian_model_by_name(name)
+    if not emulation:
+        return None, None
+
+    version = emulation.artifact.version if emulation.artifact else 0
+    emulator = BayesianModelExtensions.get_bayesian_emulator_by_name(name)
+    # Factorise once here, before the registry freezes it, as a shared emulator never changes under a request. Models
+    # stored through the Kronecker solve have no factor saved, and predictive variances need one
+    if emulator is not None and emulator.L is None and emulator.kronecker_factors is None:
+        emulator.factorise()
+    return version, emulator
+
+
+def _current_versions(names):
+    rows = (
+        db.session.query(BayesianModel.name, BayesianModelArtifact.version)
+        .outerjoin(BayesianModelArtifact, BayesianModelArtifact.bayesian_model_id == BayesianModel.id)
+        .filter(BayesianModel.name.in_(names))
+        .all()
+    )
+    return {name: version or 0 for name, version in rows}
+
+
+emulator_registry = EmulatorRegistry(_load, _current_versions, int(EMULATOR_MEMORY_BUDGET_MB * 1024 ** 2))
+
+
+@register_warm_up("emulator")
+def _warm_emulator():
+    if emulator_registry.get(BAYESIAN_MODEL_NAME) is None:
+        raise Exception(f"Bayesian model {BAYESIAN_MODEL_NAME} not found")
+
+
+def start_emulator_watcher(app):
+    """
+    Starts checking for retrained models, so a new version is loaded in the background rather than by a request
+    """
+    if EMULATOR_POLL_SECONDS > 0:
+        emulator_registry.start_watcher(EMULATOR_POLL_SECONDS, context=app.app_context)
+
+
+def get_emulator(name=None):
+    """
+    The shared, read-only emulator for a stored model, the default model if no name is given
+    """
+    return emulator_registry.get(name or BAYESIAN_MODEL_NAME)
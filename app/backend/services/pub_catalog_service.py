@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+from sqlalchemy import func
+from algorithms.pub_finder.pub_catalog import PubCatalog
+from models import Pub, db
+from services.warm_up_service import register_warm_up
+
+PUB_CATALOG_REFRESH_SECONDS = float(os.getenv("PUB_CATALOG_REFRESH_SECONDS", "30")) # Time between checks for changed pubs
+PUB_CATALOG_ID_CHECK_SECONDS = float(os.getenv("PUB_CATALOG_ID_CHECK_SECONDS", "600")) # Time between comparisons of every id with the table
+
+# The shared snapshot, swapped with a single assignment so readers never see a half-built one
+_state = {"catalog": None, "checked_at": 0.0, "ids_checked_at": 0.0, "stale": False}
+_refresh_lock = threading.Lock()
+
+
+def _rows(since=None):
+    query = db.session.query(Pub.id, Pub.name, Pub.lat, Pub.lng, Pub.x, Pub.y)
+    if since is not None:
+        # >= as DateTime may be stored to the second, so rows written in the same second as the watermark are fetched again
+        query = query.filter(Pub.updated_at >= since)
+    return [
+        (pub_id, name, None if lat is None else float(lat), None if lng is None else float(lng), x, y)
+        for pub_id, name, lat, lng, x, y in query.all()
+    ]
+
+
+def _watermark():
+    return db.session.query(func.max(Pub.updated_at)).scalar()
+
+
+def _count():
+    return db.session.query(func.count(Pub.id)).filter(Pub.x.isnot(None), Pub.y.isnot(None)).scalar()
+
+
+def _ids():
+    return {pub_id for pub_id, in db.session.query(Pub.id).filter(Pub.x.isnot(None), Pub.y.isnot(None)).all()}
+
+
+def refresh_pub_catalog(full=False):
+    """
+    Brings the shared catalog up to date with the pubs table
+
+    Only pubs with updated_at at or after the catalog's watermark are read. Deleted pubs leave nothing to read, so the
+    number of located pubs is checked afterwards, and if it differs from the catalog's it is rebuilt in full. A pub deleted
+    and another added behind the watermark, by a process with a slow clock, leave the count unchanged, so every
+    PUB_CATALOG_ID_CHECK_SECONDS the ids themselves are compared instead.
+
+    Parameters:
+    full (bool): Rebuild from every pub rather than just the changed ones
+
+    Returns:
+    PubCatalog: The new snapshot
+    """
+    with _refresh_lock:
+        catalog = _state["catalog"]
+        now = time.monotonic()
+        ids_checked_at = _state["ids_checked_at"]
+        # Read the watermark first, so rows changed while reading are fetched again next time
+        watermark = _watermark()
+        rebuild = full or catalog is None or catalog.watermark is None
+        if not rebuild:
+            catalog = catalog.updated(_rows(since=catalog.watermark), watermark)
+            compare_ids = now - ids_checked_at >= PUB_CATALOG_ID_CHECK_SECONDS
+            if compare_ids:
+                ids_checked_at = now
+            rebuild = _count() != len(catalog) or (compare_ids and _ids() != set(catalog.ids.tolist()))
+        if rebuild:
+            catalog = PubCatalog.from_rows(_rows(), watermark)
+            ids_checked_at = now
+
+        # Build the spatial index before the snapshot is shared, rather than in the first request to use it
+        catalog.spatial_index
+        _state.update(catalog=catalog, checked_at=now, ids_checked_at=ids_checked_at, stale=False)
+        return catalog
+
+
+def invalidate_pub_catalog(deleted_ids=()):
+    """
+    Called by the pubs routes once a change is committed, so this process refreshes before its next suggestion rather than
+    after PUB_CATALOG_REFRESH_SECONDS. Other processes pick the change up from the watermark.
+
+    Waits for a refresh already running, which could otherwise put back the deleted pubs and clear the stale flag.
+    """
+    with _refresh_lock:
+        catalog = _state["catalog"]
+        if catalog is not None and deleted_ids:
+            _state["catalog"] = catalog.without(deleted_ids)
+        _state["stale"] = True
+
+
+def get_pub_catalog(wait=True):
+    """
+    The shared, read-only pub catalog, refreshed first if a pub has changed or it has not been checked recently
+
+    If a refresh is already running, or fails, the current snapshot is returned rather than waiting.
+
+    Parameters:
+    wait (bool): Whether to wait for the first snapshot if another thread is building it, rather than return None
+    """
+    catalog = _state["catalog"]
+    if catalog is not None and not _state["stale"] and time.monotonic() - _state["checked_at"] < PUB_CATALOG_REFRESH_SECONDS:
+        return catalog
+
+    if catalog is None:
+        if not wait and _refresh_lock.locked():
+            return None
+        return refresh_pub_catalog()
+    if _refresh_lock.locked():
+        return catalog
+    try:
+        return refresh_pub_catalog()
+    except Exception as e:
+        print(f"Failed to refresh the pub catalog: {e}")
+        return catalog
+
+
+@register_warm_up("pub-catalog")
+def _warm_pub_catalog():
+    refresh_pub_catalog(full=True)
@@ -1,16 +1,162 @@
-from algorithms.pub_finder.suggest_pub import suggest_pub
-from models import User, Pub, UserGroupQuery
+import math
+import os
+import time
+from algorithms.pub_finder.refine import REFINE_FINALISTS, rerank, shortlist
+from algorithms.pub_finder.suggest_pub import ALGORITHM_OBJECTIVES, EMULATED_ALGORITHMS, suggest_pub, suggest_pubs
+from algorithms.bayesian_emulation.coord_transformer import get_coord_transformer
+from models import Group, User, Pub, UserGroupQuery, db
+from services.emulator_service import BAYESIAN_MODEL_NAME, get_emulator
+from services.pub_catalog_service import get_pub_catalog
+from services.route_matrix_service import ROUTE_MATRIX_MAX_ELEMENTS, get_journey_times
 
+# Re-rank the emulator's finalists on real journey times from the Routes API, unless a request says otherwise
+REFINE_WITH_ROUTES = os.getenv("REFINE_WITH_ROUTES", "false").lower() == "true"
+# Most time refinement may add to a suggestion, past it the emulator's ranking stands for any journeys not yet known
+REFINE_LATENCY_BUDGET_SECONDS = float(os.getenv("REFINE_LATENCY_BUDGET_SECONDS", "3"))
 
-def suggest_pub_for_group(group_id: str, algorithm="geo-centre") -> Pub:
+
+def suggest_pub_for_group(group_id: str, algorithm="geo-centre", k=1, refine=None):
     """
     Service to coordinate optimal pub calculation
+
+    refine: Whether to re-rank the emulator's finalists on real journey times (see refine.py), REFINE_WITH_ROUTES if None.
+        Only algorithms in ALGORITHM_OBJECTIVES are refined.
+
+    Returns:
+    tuple: (list of up to k (Pub, PubSuggestion) tuples best first, ids of the members placed, in the order of
+        PubSuggestion.member_times), the list being empty if there are no pubs
     """
-    # Get users in group
-    users = User.query.join(UserGroupQuery).filter(UserGroupQuery.group_id == group_id).all()
+    # Get the projected coordinates of users in group, members without a location cannot be placed
+    members = (
+        db.session.query(User.id, User.x, User.y, User.lat, User.lng)
+        .select_from(User)
+        .join(UserGroupQuery)
+        .filter(UserGroupQuery.group_id == group_id, User.x.isnot(None), User.y.isnot(None))
+        .all()
+    )
+    user_ids = [user_id for user_id, *_ in members]
+    users = [(x, y) for _, x, y, _, _ in members]
+
+    # Pubs as arrays, shared between requests, rather than loading every row
+    pubs = get_pub_catalog()
+
+    emulator = _emulator_for(algorithm)
+
+    # Find the optimal pubs, then load just those
+    refine = REFINE_WITH_ROUTES if refine is None else refine
+    if refine and algorithm in ALGORITHM_OBJECTIVES:
+        suggestions = _refined_suggestions(members, users, pubs, emulator, algorithm, k)
+    else:
+        suggestions = suggest_pub(users, pubs, algorithm, emulator, k=k)
+    ids = [pubs.ids[suggestion.row].item() for suggestion in suggestions]
+    found = {pub.id: pub for pub in Pub.query.filter(Pub.id.in_(ids)).all()} if ids else {}
+    # A pub deleted since the snapshot was taken is skipped
+    return [(found[pub_id], suggestion) for pub_id, suggestion in zip(ids, suggestions) if pub_id in found], user_ids
+
+
+def suggest_pubs_for_groups(group_ids, algorithm="geo-centre", k=1):
+    """
+    suggest_pub_for_group for many groups at once, sharing one query for their members, one catalog snapshot and the
+    emulator's work across them (see suggest_pub.suggest_pubs)
+
+    Returns:
+    dict: For each group id, as suggest_pub_for_group, or None if there is no such group. A group with no located members
+        has an empty list of member ids and no suggestions.
+    """
+    group_ids = list(dict.fromkeys(group_ids))
+    existing = {group_id for group_id, in db.session.query(Group.id).filter(Group.id.in_(group_ids)).all()}
+
+    # Every membership in one query, members without a location cannot be placed
+    members = {group_id: [] for group_id in existing}
+    rows = (
+        db.session.query(UserGroupQuery.group_id, User.id, User.x, User.y)
+        .select_from(User)
+        .join(UserGroupQuery)
+        .filter(UserGroupQuery.group_id.in_(existing), User.x.isnot(None), User.y.isnot(None))
+        .all()
+    )
+    for group_id, user_id, x, y in rows:
+        members[group_id].append((user_id, x, y))
+
+    pubs = get_pub_catalog()
+    placed = [group_id for group_id in group_ids if members.get(group_id)]
+    suggestions = suggest_pubs([[(x, y) for _, x, y in members[group_id]] for group_id in placed], pubs, algorithm, _emulator_for(algorithm), k)
+
+    # Load every suggested pub in one query
+    ids = {pubs.ids[suggestion.row].item() for ranked in suggestions for suggestion in ranked}
+    found = {pub.id: pub for pub in Pub.query.filter(Pub.id.in_(ids)).all()} if ids else {}
+
+    results = {group_id: None if group_id not in existing else ([], []) for group_id in group_ids}
+    for group_id, ranked in zip(placed, suggestions):
+        # A pub deleted since the snapshot was taken is skipped
+        suggested = [(found[pubs.ids[suggestion.row].item()], suggestion) for suggestion in ranked if pubs.ids[suggestion.row].item() in found]
+        results[group_id] = (suggested, [user_id for user_id, _, _ in members[group_id]])
+    return results
+
+
+def _emulator_for(algorithm):
+    if algorithm not in EMULATED_ALGORITHMS:
+        return None
+    emulator = get_emulator()
+    if emulator is None:
+        raise Exception(f"Bayesian model {BAYESIAN_MODEL_NAME} not found")
+    return emulator
+
+
+def _refined_suggestions(members, users, pubs, emulator, algorithm, k):
+    # Shortlist on the emulator, then one route matrix request for the journeys to the finalists not already cached
+    start = time.perf_counter()
+    objective = ALGORITHM_OBJECTIVES[algorithm]
+    n_routed = ROUTE_MATRIX_MAX_ELEMENTS // max(len(users), 1)
+    if n_routed < 1:
+        # Too many members for even one finalist in a single request
+        return suggest_pub(users, pubs, algorithm, emulator, k=k)
+
+    finalists = shortlist(users, pubs, emulator, objective, max(min(REFINE_FINALISTS, n_routed), k))
+    if not finalists:
+        return []
+    # Finalists past what one request can hold keep their emulated times, and fill the ranks after the refined ones
+    finalists, unrouted = finalists[:n_routed], sorted(finalists[n_routed:], key=lambda finalist: finalist.score)
+
+    origins = [(f"user {user_id}", float(lat), float(lng)) for user_id, _, _, lat, lng in members]
+    destinations = [(f"pub {pubs.ids[finalist.row]}", *pubs.lat_lng[finalist.row].tolist()) for finalist in finalists]
+    # Whatever the shortlist left of the budget is the deadline for the route matrix request. Past it, or once the budget
+    # is spent, only cached journeys are used and the emulated times stand in for the rest
+    timeout = REFINE_LATENCY_BUDGET_SECONDS - (time.perf_counter() - start)
+    route_times = get_journey_times(origins, destinations, timeout=timeout, fetch=timeout > 0)
+    refined = rerank(finalists, route_times, objective, k)
+    return refined + unrouted[:k - len(refined)]
+
+
+def find_nearby_pubs(lat: float, lng: float, k=5, radius_metres=None):
+    """
+    The k pubs closest to a point, optionally only those within radius_metres
+
+    Within a radius, the database prefilters by geohash while the first catalog snapshot is still being built, rather
+    than the request waiting for it.
+
+    Returns:
+    list: (Pub, distance in metres) tuples, nearest first
+    """
+    x, y = get_coord_transformer().transform(lat, lng)
+    pubs = get_pub_catalog(wait=radius_metres is None)
+    if pubs is None:
+        return _nearby_from_database(x, y, lat, lng, k, radius_metres)
+
+    if radius_metres is None:
+        rows, distances = pubs.spatial_index.nearest(x, y, k)
+    else:
+        rows, distances = pubs.spatial_index.nearest(x, y, k, max_distance=radius_metres)
+
+    ids = pubs.ids[rows].tolist()
+    found = {pub.id: pub for pub in Pub.query.filter(Pub.id.in_(ids)).all()} if ids else {}
+    # A pub deleted since the snapshot was taken is skipped
+    return [(found[pub_id], float(distance)) for pub_id, distance in zip(ids, distances) if pub_id in found]
 
-    # Get all pubs
-    pubs = Pub.query.all()
 
-    # Find optimal pub
-    return suggest_pub(users, pubs, algorithm)
+def _nearby_from_database(x, y, lat, lng, k, radius_metres):
+    candidates = Pub.query_near(lat, lng, radius_metres).filter(Pub.x.isnot(None), Pub.y.isnot(None)).all()
+    # The geohash cells cover more than the circle, so distances are checked exactly as the spatial index would
+    nearby = [(pub, math.hypot(pub.x - x, pub.y - y)) for pub in candidates]
+    nearby = sorted((item for item in nearby if item[1] <= radius_metres), key=lambda item: item[1])
+    return nearby[:k]
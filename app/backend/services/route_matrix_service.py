@@ -0,0 +1,102 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import os
+import numpy as np
+import requests
+from api.clients.maps.map_clients import GoogleRoutesApi
+from api.clients.maps.routes_request import RoutesRequest
+from models import Distance, Location, db
+
+API_KEY = os.getenv("API_KEY", "api_key")
+# Origins x destinations one computeRouteMatrix request may hold, 100 when travelling by transit
+ROUTE_MATRIX_MAX_ELEMENTS = int(os.getenv("ROUTE_MATRIX_MAX_ELEMENTS", "100"))
+# Threads making Routes API requests, so a caller can stop waiting at its deadline while the request finishes in the background
+ROUTE_MATRIX_WORKERS = 4
+
+_route_requests = ThreadPoolExecutor(max_workers=ROUTE_MATRIX_WORKERS, thread_name_prefix="route-matrix")
+
+
+def _locations(places):
+    # Repeated places share one Location, as get_or_create does not see the ones it has added but not flushed
+    locations = {}
+    for name, lat, lng in places:
+        key = (name.lower(), round(lat, 8), round(lng, 8))
+        if key not in locations:
+            locations[key] = Location.get_or_create(name, lat, lng)[0]
+    return [locations[(name.lower(), round(lat, 8), round(lng, 8))] for name, lat, lng in places]
+
+
+def get_journey_times(origins, destinations, timeout=None, fetch=True):
+    """
+    Real journey times between places, from the Distance cache where known and otherwise from one computeRouteMatrix request
+
+    Every journey fetched is written back to the Distance cache, with a Location for any place not seen before. Places
+    sharing a Location, such as members at the same address, are requested once and fill every row or column they are in.
+
+    Parameters:
+    origins, destinations (list): (name, lat, lng) of each place, the name and coordinates identifying its Location
+    timeout (float): Most seconds to wait for the Routes API in total, None to wait indefinitely. The request runs on a
+        worker thread and is abandoned, not cancelled, at the deadline, since a requests timeout only bounds each socket
+        operation
+    fetch (bool): Whether to request the journeys not in the cache
+
+    Returns:
+    np.ndarray: Journey time in seconds, shape (len(origins), len(destinations)), NaN where unknown, e.g. when there is
+        no route, there are more than ROUTE_MATRIX_MAX_ELEMENTS journeys or the request failed or timed out
+    """
+    origin_locations = _locations(origins)
+    destination_locations = _locations(destinations)
+    # Gives new locations their ids
+    db.session.flush()
+
+    origin_rows, destination_rows = defaultdict(list), defaultdict(list)
+    for i, location in enumerate(origin_locations):
+        origin_rows[location.id].append(i)
+    for j, location in enumerate(destination_locations):
+        destination_rows[location.id].append(j)
+    # Each distinct Location once, in order of first appearance
+    origin_locations = list({location.id: location for location in origin_locations}.values())
+    destination_locations = list({location.id: location for location in destination_locations}.values())
+    cached = {
+        (distance.origin_id, distance.destination_id): distance
+        for distance in Distance.query.filter(Distance.origin_id.in_(origin_rows), Distance.destination_id.in_(destination_rows)).all()
+    }
+
+    times = np.full((len(origins), len(destinations)), np.nan)
+    for (origin_id, destination_id), distance in cached.items():
+        if distance.seconds and distance.seconds > 0:
+            times[np.ix_(origin_rows[origin_id], destination_rows[destination_id])] = distance.seconds
+
+    if fetch and np.isnan(times).any() and len(origin_locations) * len(destination_locations) <= ROUTE_MATRIX_MAX_ELEMENTS:
+        rqst = RoutesRequest([location.coords for location in origin_locations], [location.coords for location in destination_locations])
+        future = _route_requests.submit(GoogleRoutesApi(API_KEY).matrix, rqst, timeout=timeout)
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            print(f"Route matrix request took longer than {timeout}s, leaving its journeys unknown")
+            result = None
+        except requests.RequestException as e:
+            print(f"Route matrix request failed: {e}")
+            result = None
+
+        for element in result or []:
+            if element.get("condition") != "ROUTE_EXISTS" or "staticDuration" not in element:
+                continue
+            # Fields equal to zero, such as the first index, are left out of the response
+            origin = origin_locations[element.get("originIndex", 0)]
+            destination = destination_locations[element.get("destinationIndex", 0)]
+            seconds = float(element["staticDuration"].rstrip("s"))
+            times[np.ix_(origin_rows[origin.id], destination_rows[destination.id])] = seconds
+
+            distance = cached.get((origin.id, destination.id))
+            if distance is None:
+                distance = Distance(origin_id=origin.id, destination_id=destination.id)
+                db.session.add(distance)
+            distance.update_distance(meters=element.get("distanceMeters", 0), seconds=round(seconds))
+
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error caching journey times: {e}")
+    return times
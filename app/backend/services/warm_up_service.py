@@ -0,0 +1,44 @@
+import time
+from algorithms.bayesian_emulation.coord_transformer import get_coord_transformer
+
+# name -> step, run in order by warm_up within an app context
+WARM_UP_STEPS = {}
+# name -> {"ready", "seconds"} or {"ready", "error"} for each step, filled in by warm_up
+warm_state = {}
+
+
+def register_warm_up(name):
+    """
+    Decorator to register a function that loads shared state ahead of the first request
+    """
+    def decorator(step):
+        WARM_UP_STEPS[name] = step
+        return step
+    return decorator
+
+
+def warm_up(app):
+    """
+    Runs every warm-up step, recording which ones succeeded. A failed step is reported by is_ready rather than raised,
+    so the app still starts and the step's state loads on first use instead.
+    """
+    for name, step in WARM_UP_STEPS.items():
+        start = time.perf_counter()
+        try:
+            with app.app_context():
+                step()
+            warm_state[name] = {"ready": True, "seconds": round(time.perf_counter() - start, 3)}
+        except Exception as e:
+            print(f"Warm-up step {name} failed: {e}")
+            warm_state[name] = {"ready": False, "error": str(e)}
+    return warm_state
+
+
+def is_ready():
+    return len(warm_state) == len(WARM_UP_STEPS) and all(state["ready"] for state in warm_state.values())
+
+
+@register_warm_up("coord-transformer")
+def _warm_coord_transformer():
+    # Build the shared transformer so pyproj loads its projection database before any worker is forked
+    get_coord_transformer()
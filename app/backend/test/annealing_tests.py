@@ -0,0 +1,48 @@
+import unittest
+import numpy as np
+from algorithms.pub_finder.annealing import anneal
+from algorithms.pub_finder.pub_catalog import PubCatalog
+from algorithms.pub_finder.synthetic import journey_time_matrix
+
+def make_problem(n_pubs=2000, n_members=10, seed=0):
+    # Journey times proportional to straight-line distance, so the best pub is near the middle of the group
+    rng = np.random.default_rng(seed)
+    pub_xy = rng.uniform(-20000, 20000, size=(n_pubs, 2))
+    users = rng.uniform(-10000, 10000, size=(n_members, 2))
+    times = journey_time_matrix(users, pub_xy)
+    return times, PubCatalog.from_xy(pub_xy).neighbours(8), rng.integers(n_pubs, size=6)
+
+class TestAnnealing(unittest.TestCase):
+
+    def test_given_objective__when_annealed__then_matches_exhaustive_search(self):
+        times, neighbours, starts = make_problem()
+
+        for objective, scores in (("sum", times.sum(axis=0)), ("max", times.max(axis=0))):
+            best = anneal(times, neighbours, starts, objective, n_steps=1500)
+
+            self.assertEqual(best["row"], int(np.argmin(scores)))
+            self.assertAlmostEqual(best["score"], scores.min(), places=6)
+            self.assertLessEqual(best["steps_to_best"], 1500)
+
+    def test_given_seed__when_annealed_twice__then_same_result(self):
+        times, neighbours, starts = make_problem(seed=1)
+
+        self.assertEqual(anneal(times, neighbours, starts, seed=3), anneal(times, neighbours, starts, seed=3))
+
+    def test_given_several_workers__when_annealed__then_matches_exhaustive_search(self):
+        times, neighbours, starts = make_problem(seed=2)
+
+        best = anneal(times, neighbours, starts, "sum", n_steps=1500, n_workers=2)
+
+        self.assertEqual(best["row"], int(np.argmin(times.sum(axis=0))))
+
+    def test_given_catalog__when_neighbours__then_nearest_other_pubs(self):
+        xy = np.array([[0.0, 0.0], [1.0, 0.0], [3.0, 0.0], [10.0, 0.0]])
+        catalog = PubCatalog.from_xy(xy)
+
+        np.testing.assert_array_equal(catalog.neighbours(2), [[1, 2], [0, 2], [1, 0], [2, 1]])
+        self.assertIs(catalog.neighbours(2), catalog.neighbours(2))
+        self.assertEqual(catalog.neighbours(10).shape, (4, 3))
+
+if __name__ == '__main__':
+    unittest.main()
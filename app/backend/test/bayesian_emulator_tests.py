@@ -1,4 +1,7 @@
+import os
+import tempfile
 import unittest
+import numpy as np
 from algorithms.bayesian_emulation.bayesian_emulator import BayesianEmulator
 
 class TestBayesianEmulator(unittest.TestCase):
@@ -57,5 +60,254 @@ class TestBayesianEmulator(unittest.TestCase):
             true_value = D[i]
             self.assertAlmostEqual(emulated, true_value, places=5, msg=f"Emulated value {emulated} does not match true value {true_value} for input {x_j}")
 
+    def test_given_batch_of_points__when_emulated_in_batch__then_matches_single_point_emulation(self):
+        # Input data
+        x_train = [[1,2,3,4], [2,1,4,3], [1,1,1,1], [3,3,3,3], [4,2,2,1]]
+        D = [2, 2, 1, 5, 3]
+        X = np.random.default_rng(0).uniform(0, 5, size=(37, 4))
+
+        # Initialize BayesianEmulator
+        be = BayesianEmulator(2.5, 1, 2, x_train, D)
+
+        # Compute M
+        be.compute_M()
+
+        # Check batched and chunked emulation against one call per point
+        expected = np.array([be.emulate(x) for x in X])
+        np.testing.assert_allclose(be.emulate_batch(X), expected, rtol=1e-10, atol=1e-10)
+        np.testing.assert_allclose(be.emulate_batch(X, chunk_size=5), expected, rtol=1e-10, atol=1e-10)
+
+    def test_given_no_M__when_emulated_in_batch__then_raises(self):
+        be = BayesianEmulator(2.5, 1, 1, [[1], [2]], [1, 2])
+
+        with self.assertRaises(ValueError):
+            be.emulate_batch([[1.5]])
+
+
+    def test_given_origin_destination_grid__when_M_computed__then_kronecker_solve_matches_dense_solve(self):
+        # Input data, every origin paired with every destination
+        rng = np.random.default_rng(1)
+        locations = rng.uniform(0, 4, size=(6, 2))
+        x_train = [[*origin, *destination] for origin in locations for destination in locations]
+        D = rng.uniform(1, 5, size=len(x_train))
+        X = rng.uniform(0, 4, size=(20, 4))
+
+        dense = BayesianEmulator(2.5, 1.5, 2, x_train, D)
+        dense.compute_M(kronecker=False)
+        kronecker = BayesianEmulator(2.5, 1.5, 2, x_train, D)
+        kronecker.compute_M()
+
+        # Check the grid was detected and both solves agree
+        self.assertIsNotNone(kronecker.grid)
+        np.testing.assert_allclose(kronecker.M, dense.M, rtol=1e-6, atol=1e-6)
+        np.testing.assert_allclose(kronecker.emulate_batch(X), dense.emulate_batch(X), rtol=1e-6, atol=1e-6)
+        np.testing.assert_allclose(kronecker.emulate_batch(x_train), D, atol=1e-5)
+
+    def test_given_shuffled_training_points__when_grid_detected__then_no_grid_found(self):
+        locations = [[0, 0], [1, 2], [3, 1]]
+        x_train = [[*origin, *destination] for origin in locations for destination in locations]
+        x_train[0], x_train[4] = x_train[4], x_train[0]
+
+        be = BayesianEmulator(2.5, 1, 1, x_train, np.arange(len(x_train)))
+
+        self.assertIsNone(be.find_grid_structure())
+        with self.assertRaises(ValueError):
+            be.compute_M(kronecker=True)
+
+
+    def test_given_trained_emulator__when_variance_emulated__then_matches_direct_formula(self):
+        # Input data
+        rng = np.random.default_rng(2)
+        x_train = rng.uniform(0, 5, size=(15, 3))
+        D = rng.uniform(1, 5, size=15)
+        X = np.vstack([rng.uniform(0, 5, size=(10, 3)), [[100, 100, 100]]])
+
+        be = BayesianEmulator(2.5, 1.5, 2, x_train, D)
+        be.compute_M()
+
+        # Var_D[f(x)] = sigma^2 - k^T K^{-1} k, computed without the cached factor
+        K = 1.5 ** 2 * np.exp(-np.sum((x_train[:, None, :] - x_train[None, :, :]) ** 2, axis=-1) / 2 ** 2)
+        k = 1.5 ** 2 * np.exp(-np.sum((X[:, None, :] - x_train[None, :, :]) ** 2, axis=-1) / 2 ** 2)
+        expected = 1.5 ** 2 - np.sum(k * np.linalg.solve(K, k.T).T, axis=1)
+
+        emulated, variance = be.emulate_batch_with_variance(X, chunk_size=4)
+        np.testing.assert_allclose(emulated, be.emulate_batch(X))
+        np.testing.assert_allclose(variance, expected, atol=1e-6)
+        self.assertAlmostEqual(variance[-1], 1.5 ** 2, places=6)
+
+        # Training points are known exactly
+        _, training_variance = be.emulate_with_variance(x_train[0])
+        self.assertAlmostEqual(training_variance, 0, places=5)
+
+    def test_given_origin_destination_grid__when_variance_emulated__then_kronecker_matches_dense(self):
+        rng = np.random.default_rng(3)
+        locations = rng.uniform(0, 4, size=(5, 2))
+        x_train = [[*origin, *destination] for origin in locations for destination in locations]
+        D = rng.uniform(1, 5, size=len(x_train))
+        X = rng.uniform(0, 4, size=(12, 4))
+
+        dense = BayesianEmulator(2.5, 1.5, 2, x_train, D)
+        dense.compute_M(kronecker=False)
+        kronecker = BayesianEmulator(2.5, 1.5, 2, x_train, D)
+        kronecker.compute_M()
+
+        _, dense_variance = dense.emulate_batch_with_variance(X)
+        _, kronecker_variance = kronecker.emulate_batch_with_variance(X)
+        np.testing.assert_allclose(kronecker_variance, dense_variance, atol=1e-6)
+
+    def test_given_stored_M_and_L__when_emulated__then_no_refactorisation_needed(self):
+        rng = np.random.default_rng(4)
+        x_train = rng.uniform(0, 5, size=(10, 2))
+        D = rng.uniform(1, 5, size=10)
+        trained = BayesianEmulator(2.5, 1, 2, x_train, D)
+        trained.compute_M(kronecker=False)
+
+        loaded = BayesianEmulator(2.5, 1, 2, x_train, D, M=trained.M, L=trained.L, nugget=trained.nugget)
+
+        # Re-solving the centred outputs with the stored factor reproduces M
+        np.testing.assert_allclose(loaded.solve(D - 2.5), trained.M)
+        np.testing.assert_allclose(loaded.emulate_batch_with_variance(x_train)[1], trained.emulate_batch_with_variance(x_train)[1])
+
+    def test_given_stored_M_without_L__when_variance_emulated__then_error_and_emulator_unchanged(self):
+        rng = np.random.default_rng(4)
+        x_train = rng.uniform(0, 5, size=(10, 2))
+        D = rng.uniform(1, 5, size=10)
+        trained = BayesianEmulator(2.5, 1, 2, x_train, D)
+        trained.compute_M(kronecker=False)
+
+        loaded = BayesianEmulator(2.5, 1, 2, x_train, D, M=trained.M)
+
+        with self.assertRaises(ValueError):
+            loaded.emulate_batch_with_variance(x_train)
+        self.assertIsNone(loaded.L)
+        self.assertIs(loaded.x_train, x_train)
+
+    def test_given_duplicated_training_points__when_M_computed__then_nugget_added(self):
+        x_train = [[1, 1], [1, 1], [2, 3]]
+        D = [2, 2, 4]
+
+        be = BayesianEmulator(2.5, 1, 1, x_train, D)
+        be.compute_M()
+
+        self.assertGreater(be.nugget, 0)
+        self.assertAlmostEqual(be.emulate([2, 3]), 4, places=4)
+
+
+    def test_given_trained_emulator__when_observations_added__then_matches_full_refit(self):
+        rng = np.random.default_rng(5)
+        x_train = rng.uniform(0, 5, size=(20, 4))
+        D = rng.uniform(1, 5, size=20)
+        X = rng.uniform(0, 5, size=(8, 4))
+
+        incremental = BayesianEmulator(2.5, 1.5, 2, x_train[:14], D[:14])
+        incremental.compute_M()
+        incremental.add_observations(x_train[14:17], D[14:17])
+        incremental.add_observations(x_train[17:], D[17:])
+        refit = BayesianEmulator(2.5, 1.5, 2, x_train, D)
+        refit.compute_M()
+
+        np.testing.assert_allclose(incremental.L, refit.L, atol=1e-8)
+        np.testing.assert_allclose(incremental.M, refit.M, rtol=1e-6, atol=1e-6)
+        np.testing.assert_allclose(incremental.emulate_batch_with_variance(X), refit.emulate_batch_with_variance(X), atol=1e-6)
+
+    def test_given_kronecker_trained_emulator__when_observations_added__then_switches_to_dense_factor(self):
+        rng = np.random.default_rng(6)
+        locations = rng.uniform(0, 4, size=(4, 2))
+        x_train = [[*origin, *destination] for origin in locations for destination in locations]
+        D = rng.uniform(1, 5, size=len(x_train))
+
+        be = BayesianEmulator(2.5, 1.5, 2, x_train, D)
+        be.compute_M()
+        be.add_observations([[0.5, 0.5, 3.5, 3.5]], [4.2])
+
+        self.assertIsNone(be.grid)
+        self.assertEqual(be.L.shape, (len(x_train) + 1, len(x_train) + 1))
+        self.assertAlmostEqual(be.emulate([0.5, 0.5, 3.5, 3.5]), 4.2, places=5)
+
+
+    def test_given_memory_options__when_M_computed__then_matches_default_factorisation(self):
+        rng = np.random.default_rng(7)
+        x_train = rng.uniform(0, 5, size=(60, 4))
+        D = rng.uniform(1, 5, size=60)
+        default = BayesianEmulator(2.5, 1.5, 2, x_train, D)
+        default.compute_M()
+
+        blocked = BayesianEmulator(2.5, 1.5, 2, x_train, D)
+        blocked.compute_M(block_size=7)
+        np.testing.assert_allclose(blocked.M, default.M, rtol=1e-8)
+
+        with tempfile.TemporaryDirectory() as directory:
+            memmapped = BayesianEmulator(2.5, 1.5, 2, x_train, D)
+            memmapped.compute_M(block_size=16, memmap_path=os.path.join(directory, "K.dat"))
+            np.testing.assert_allclose(memmapped.M, default.M, rtol=1e-8)
+            del memmapped
+
+        single = BayesianEmulator(2.5, 1.5, 2, x_train, D)
+        single.compute_M(dtype=np.float32)
+        self.assertEqual(single.L.dtype, np.float32)
+        self.assertEqual(single.peak_memory_bytes, 60 * 60 * 4 + 60 * 60 * 8)
+        np.testing.assert_allclose(single.emulate_batch(x_train), D, atol=1e-2)
+
+
+    def test_given_neighbour_tolerance__when_emulated__then_error_within_tolerance(self):
+        rng = np.random.default_rng(8)
+        x_train = rng.uniform(0, 40, size=(400, 4))
+        D = rng.uniform(1, 5, size=400)
+        X = rng.uniform(0, 40, size=(200, 4))
+        exact = BayesianEmulator(2.5, 1.5, 3, x_train, D)
+        exact.compute_M()
+
+        for tolerance in (1e-2, 1e-6):
+            indexed = BayesianEmulator(2.5, 1.5, 3, x_train, D, M=exact.M, neighbour_tolerance=tolerance)
+
+            self.assertLessEqual(indexed.truncation_error_bound, tolerance)
+            self.assertLess(indexed.neighbour_radius, 40)
+            np.testing.assert_allclose(indexed.emulate_batch(X, chunk_size=50), exact.emulate_batch(X), rtol=0, atol=tolerance)
+
+    def test_given_neighbour_index__when_observations_added__then_index_rebuilt(self):
+        rng = np.random.default_rng(9)
+        x_train = rng.uniform(0, 10, size=(30, 2))
+        D = rng.uniform(1, 5, size=30)
+
+        be = BayesianEmulator(2.5, 1.5, 2, x_train[:25], D[:25], neighbour_tolerance=1e-4, neighbour_cutoff=1)
+        be.compute_M()
+        be.add_observations(x_train[25:], D[25:])
+
+        self.assertEqual(be.neighbour_tree.n, 30)
+        self.assertLessEqual(be.truncation_error_bound, 1e-4)
+        self.assertGreaterEqual(be.neighbour_radius, 2)
+        np.testing.assert_allclose(be.emulate_batch(x_train), D, atol=1e-4)
+
+    def test_given_origins_and_destinations__when_matrix_emulated__then_matches_batch_over_every_pair(self):
+        rng = np.random.default_rng(10)
+        x_train = rng.uniform(0, 5, size=(40, 4))
+        D = rng.uniform(1, 5, size=40)
+        origins = rng.uniform(0, 5, size=(7, 2))
+        destinations = rng.uniform(0, 5, size=(23, 2))
+        pairs = np.array([[*origin, *destination] for origin in origins for destination in destinations])
+
+        be = BayesianEmulator(2.5, 1.5, 2, x_train, D)
+        be.compute_M(kronecker=False)
+
+        expected = be.emulate_batch(pairs).reshape(7, 23)
+        np.testing.assert_allclose(be.emulate_matrix(origins, destinations), expected, rtol=1e-10, atol=1e-10)
+        np.testing.assert_allclose(be.emulate_matrix(origins, destinations, chunk_size=5), expected, rtol=1e-10, atol=1e-10)
+
+    def test_given_origin_destination_grid__when_matrix_emulated__then_matches_batch_over_every_pair(self):
+        rng = np.random.default_rng(11)
+        locations = rng.uniform(0, 4, size=(6, 2))
+        x_train = [[*origin, *destination] for origin in locations for destination in locations]
+        D = rng.uniform(1, 5, size=len(x_train))
+        origins = rng.uniform(0, 4, size=(5, 2))
+        destinations = rng.uniform(0, 4, size=(9, 2))
+        pairs = np.array([[*origin, *destination] for origin in origins for destination in destinations])
+
+        be = BayesianEmulator(2.5, 1.5, 2, x_train, D)
+        be.compute_M()
+
+        self.assertIsNotNone(be.grid)
+        np.testing.assert_allclose(be.emulate_matrix(origins, destinations), be.emulate_batch(pairs).reshape(5, 9), rtol=1e-10, atol=1e-10)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+from algorithms.bayesian_emulation.compact_emulator import CompactBayesianEmulator
+from algorithms.bayesian_emulation.kernels import wendland
+
+class TestCompactBayesianEmulator(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x_train = rng.uniform(0, 20, size=(200, 4))
+        self.D = rng.uniform(1, 5, size=200)
+        self.X = rng.uniform(0, 20, size=(30, 4))
+
+    def dense_wendland(self, A, B, sigma, radius):
+        dists = np.sqrt(np.sum((A[:, None, :] - B[None, :, :]) ** 2, axis=-1))
+        return sigma ** 2 * wendland(dists / radius, A.shape[1])
+
+    def test_given_training_points__when_emulated__then_matches_dense_wendland_solve(self):
+        be = CompactBayesianEmulator(3, 1.5, 6, self.x_train, self.D)
+        be.compute_M()
+
+        K = self.dense_wendland(self.x_train, self.x_train, 1.5, 6)
+        k = self.dense_wendland(self.X, self.x_train, 1.5, 6)
+        M = np.linalg.solve(K, self.D - 3)
+        expected_mean = 3 + k @ M
+        expected_variance = 1.5 ** 2 - np.sum(k * np.linalg.solve(K, k.T).T, axis=1)
+
+        emulated, variance = be.emulate_batch_with_variance(self.X, chunk_size=7)
+        np.testing.assert_allclose(be.M, M, rtol=1e-6, atol=1e-8)
+        np.testing.assert_allclose(emulated, expected_mean, rtol=1e-6)
+        np.testing.assert_allclose(variance, expected_variance, atol=1e-8)
+        np.testing.assert_allclose(be.emulate_batch(self.x_train), self.D, atol=1e-6)
+
+    def test_given_origins_and_destinations__when_matrix_emulated__then_matches_batch_over_every_pair(self):
+        be = CompactBayesianEmulator(3, 1.5, 6, self.x_train, self.D)
+        be.compute_M()
+        origins, destinations = self.X[:4, :2], self.X[:, 2:]
+        pairs = np.array([[*origin, *destination] for origin in origins for destination in destinations])
+
+        np.testing.assert_allclose(be.emulate_matrix(origins, destinations), be.emulate_batch(pairs).reshape(4, 30))
+
+    def test_given_local_kernel__when_factorised__then_covariance_is_sparse(self):
+        be = CompactBayesianEmulator(3, 1.5, 6, self.x_train, self.D)
+        be.compute_M()
+
+        self.assertLess(be.nnz, 0.25 * len(self.D) ** 2)
+
+    def test_given_trained_emulator__when_observations_added__then_matches_full_refit(self):
+        incremental = CompactBayesianEmulator(3, 1.5, 6, self.x_train[:150], self.D[:150])
+        incremental.compute_M()
+        incremental.add_observations(self.x_train[150:], self.D[150:])
+        refit = CompactBayesianEmulator(3, 1.5, 6, self.x_train, self.D)
+        refit.compute_M()
+
+        np.testing.assert_allclose(incremental.M, refit.M, rtol=1e-8, atol=1e-10)
+        np.testing.assert_allclose(incremental.emulate_batch(self.X), refit.emulate_batch(self.X))
+        np.testing.assert_allclose(incremental.emulate_batch(self.x_train[150:]), self.D[150:], atol=1e-6)
+
+    def test_given_dense_only_option__when_factorised__then_raises(self):
+        be = CompactBayesianEmulator(3, 1.5, 6, self.x_train, self.D)
+
+        for options in ({"kronecker": True}, {"dtype": np.float32}, {"memmap_path": "covariance.dat"}):
+            with self.assertRaises(ValueError):
+                be.compute_M(**options)
+
+    def test_given_point_outside_support__when_emulated__then_prior_returned(self):
+        be = CompactBayesianEmulator(3, 1.5, 6, self.x_train, self.D)
+        be.compute_M()
+
+        emulated, variance = be.emulate_with_variance([100, 100, 100, 100])
+        self.assertEqual(emulated, 3)
+        self.assertEqual(variance, 1.5 ** 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import numpy as np
+from algorithms.bayesian_emulation import local_plane_coefficients
+from algorithms.bayesian_emulation.coord_transformer import BASE_LAT, BASE_LNG, LONDON_BOUNDS, CoordTransformer, LocalPlaneTransformer, fit_local_plane, get_coord_transformer
+
+class TestCoordTransformer(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.lats = rng.uniform(51.38, 51.67, size=50)
+        self.lngs = rng.uniform(-0.56, 0.28, size=50)
+        self.transformer = get_coord_transformer()
+
+    def test_given_shared_transformer__when_requested_again__then_same_instance(self):
+        self.assertIs(get_coord_transformer(), self.transformer)
+        self.assertIs(CoordTransformer().transformer, self.transformer.transformer)
+
+    def test_given_big_ben__when_transform__then_origin(self):
+        np.testing.assert_allclose(self.transformer.transform(BASE_LAT, BASE_LNG), (0, 0), atol=1e-6)
+
+    def test_given_arrays__when_transform_many__then_matches_transforming_each_point(self):
+        x, y = self.transformer.transform_many(self.lats, self.lngs)
+
+        expected = np.array([self.transformer.transform(lat, lng) for lat, lng in zip(self.lats, self.lngs)])
+        np.testing.assert_allclose(np.column_stack([x, y]), expected, atol=1e-6)
+
+    def test_given_grid__when_transform_many__then_shape_is_kept(self):
+        x, y = self.transformer.transform_many(self.lats.reshape(5, 10), self.lngs.reshape(5, 10))
+
+        self.assertEqual(x.shape, (5, 10))
+        self.assertEqual(y.shape, (5, 10))
+
+    def test_given_projected_points__when_inverse__then_original_coordinates(self):
+        x, y = self.transformer.transform_many(self.lats, self.lngs)
+
+        lats, lngs = self.transformer.inverse_many(x, y)
+        lat, lng = self.transformer.inverse(x[0], y[0])
+
+        # 1e-7 degrees is about a centimetre
+        np.testing.assert_allclose(lats, self.lats, atol=1e-7)
+        np.testing.assert_allclose(lngs, self.lngs, atol=1e-7)
+        np.testing.assert_allclose((lat, lng), (self.lats[0], self.lngs[0]), atol=1e-7)
+
+class TestLocalPlaneTransformer(unittest.TestCase):
+
+    def setUp(self):
+        (lat_min, lat_max), (lng_min, lng_max) = LONDON_BOUNDS
+        rng = np.random.default_rng(1)
+        self.lats = rng.uniform(lat_min, lat_max, size=20000)
+        self.lngs = rng.uniform(lng_min, lng_max, size=20000)
+        self.exact = get_coord_transformer("pyproj")
+        self.local_plane = get_coord_transformer("local-plane")
+
+    def test_given_backend_name__when_get_coord_transformer__then_that_backend(self):
+        self.assertIsInstance(self.local_plane, LocalPlaneTransformer)
+        self.assertIsInstance(self.exact, CoordTransformer)
+        with self.assertRaises(ValueError):
+            get_coord_transformer("unknown")
+
+    def test_given_points_in_bounds__when_transform_many__then_within_documented_error_of_pyproj(self):
+        x, y = self.local_plane.transform_many(self.lats, self.lngs)
+        x_exact, y_exact = self.exact.transform_many(self.lats, self.lngs)
+
+        self.assertLessEqual(np.hypot(x - x_exact, y - y_exact).max(), local_plane_coefficients.MAX_FORWARD_ERROR_METRES)
+
+    def test_given_projected_points_in_bounds__when_inverse_many__then_within_documented_error_of_pyproj(self):
+        lats, lngs = self.local_plane.inverse_many(*self.exact.transform_many(self.lats, self.lngs))
+
+        self.assertLessEqual(np.abs(lats - self.lats).max(), local_plane_coefficients.MAX_INVERSE_ERROR_DEGREES)
+        self.assertLessEqual(np.abs(lngs - self.lngs).max(), local_plane_coefficients.MAX_INVERSE_ERROR_DEGREES)
+
+    def test_given_single_point__when_transform_and_inverse__then_floats_matching_pyproj(self):
+        x, y = self.local_plane.transform(51.52118, -0.13946)
+        lat, lng = self.local_plane.inverse(x, y)
+
+        self.assertIsInstance(x, float)
+        np.testing.assert_allclose((x, y), self.exact.transform(51.52118, -0.13946), atol=1e-5)
+        np.testing.assert_allclose((lat, lng), (51.52118, -0.13946), atol=1e-9)
+
+    def test_given_points_out_of_bounds__when_transformed__then_fall_back_to_pyproj(self):
+        lats = np.array([51.5, 52.2, 51.45])  # Central London, Milton Keynes, Reading
+        lngs = np.array([-0.1, -0.76, -0.97])
+
+        x, y = self.local_plane.transform_many(lats, lngs)
+        x_exact, y_exact = self.exact.transform_many(lats, lngs)
+        lats_back, lngs_back = self.local_plane.inverse_many(x_exact, y_exact)
+
+        np.testing.assert_allclose(x, x_exact, atol=1e-5)
+        np.testing.assert_allclose(y, y_exact, atol=1e-5)
+        np.testing.assert_allclose(lats_back, lats, atol=1e-9)
+        np.testing.assert_allclose(lngs_back, lngs, atol=1e-9)
+
+    def test_given_stored_coefficients__when_refitted__then_unchanged(self):
+        fit = fit_local_plane(local_plane_coefficients.BOUNDS, local_plane_coefficients.DEGREE)
+
+        for name in ("FORWARD_X", "FORWARD_Y", "INVERSE_LAT", "INVERSE_LNG"):
+            np.testing.assert_allclose(fit[name], getattr(local_plane_coefficients, name), rtol=1e-6, atol=1e-9)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import threading
+import time
+import unittest
+import numpy as np
+from algorithms.bayesian_emulation.bayesian_emulator import BayesianEmulator
+from algorithms.bayesian_emulation.emulator_registry import EmulatorRegistry, emulator_nbytes
+
+class FakeModelStore:
+    def __init__(self, names, n_samples=10):
+        self.versions = {name: 1 for name in names}
+        self.n_samples = n_samples
+        self.loads = []
+        self.rng = np.random.default_rng(0)
+
+    def load(self, name):
+        if name not in self.versions:
+            return None, None
+        self.loads.append(name)
+        x_train = self.rng.uniform(0, 5, size=(self.n_samples, 4))
+        D = self.rng.uniform(1, 5, size=self.n_samples)
+        emulator = BayesianEmulator(2, 1, 2, x_train, D)
+        emulator.compute_M(kronecker=False)
+        return self.versions[name], emulator
+
+    def current_versions(self, names):
+        return {name: self.versions[name] for name in names if name in self.versions}
+
+class TestEmulatorRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.store = FakeModelStore(["a", "b", "c"])
+        self.model_bytes = emulator_nbytes(self.store.load("a")[1])
+        self.store.loads.clear()
+
+    def registry(self, models_in_budget=3):
+        return EmulatorRegistry(self.store.load, self.store.current_versions, models_in_budget * self.model_bytes)
+
+    def test_given_loaded_model__when_get_again__then_same_read_only_emulator_without_reloading(self):
+        registry = self.registry()
+
+        emulator = registry.get("a")
+
+        self.assertIs(registry.get("a"), emulator)
+        self.assertEqual(self.store.loads, ["a"])
+        self.assertFalse(emulator.M.flags.writeable)
+        self.assertFalse(emulator.L.flags.writeable)
+
+    def test_given_unknown_model__when_get__then_none_and_not_cached(self):
+        registry = self.registry()
+
+        self.assertIsNone(registry.get("missing"))
+        self.assertEqual(registry.loaded(), [])
+
+    def test_given_budget_for_two_models__when_third_loaded__then_least_recently_used_evicted(self):
+        registry = self.registry(models_in_budget=2)
+
+        registry.get("a")
+        registry.get("b")
+        registry.get("a")
+        registry.get("c")
+
+        self.assertEqual(registry.loaded(), ["a", "c"])
+        self.assertLessEqual(registry.nbytes(), 2 * self.model_bytes)
+
+    def test_given_model_larger_than_budget__when_get__then_still_kept(self):
+        registry = self.registry(models_in_budget=0.5)
+
+        emulator = registry.get("a")
+
+        self.assertIs(registry.get("a"), emulator)
+        self.assertEqual(self.store.loads, ["a"])
+
+    def test_given_concurrent_misses__when_get__then_loaded_once(self):
+        registry = self.registry()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get("a"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.store.loads, ["a"])
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_given_retrained_model__when_refresh__then_new_version_swapped_in(self):
+        registry = self.registry()
+        old = registry.get("a")
+        registry.get("b")
+
+        self.store.versions["a"] = 2
+        swapped = registry.refresh()
+
+        self.assertEqual(swapped, ["a"])
+        self.assertEqual(registry.version("a"), 2)
+        self.assertEqual(registry.loaded(), ["a", "b"])
+        self.assertIsNot(registry.get("a"), old)
+        # Callers still holding the previous emulator can keep using it
+        old.emulate_batch(old.x_train)
+
+    def test_given_deleted_model__when_refresh__then_evicted(self):
+        registry = self.registry()
+        registry.get("a")
+
+        del self.store.versions["a"]
+        registry.refresh()
+
+        self.assertEqual(registry.loaded(), [])
+
+    def test_given_watcher__when_model_retrained__then_swapped_without_a_get(self):
+        registry = self.registry()
+        registry.get("a")
+
+        registry.start_watcher(0.01)
+        try:
+            self.store.versions["a"] = 2
+            deadline = time.monotonic() + 5
+            while registry.version("a") != 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            registry.stop_watcher()
+
+        self.assertEqual(registry.version("a"), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import math
+import unittest
+import numpy as np
+from algorithms.pub_finder.geohash import EARTH_RADIUS_METRES, cell_size, cells_within, encode
+
+class TestGeohash(unittest.TestCase):
+
+    def test_given_known_point__when_encoded__then_matches_reference(self):
+        # Reference value from the original geohash.org description
+        self.assertEqual(encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+
+    def test_given_point__when_encoded_at_lower_precision__then_prefix_of_higher(self):
+        self.assertTrue(encode(51.5007, -0.1246, 9).startswith(encode(51.5007, -0.1246, 5)))
+
+    def test_given_precision__when_cell_size__then_bits_split_between_lat_and_lng(self):
+        self.assertEqual(cell_size(1), (45.0, 45.0))
+        self.assertEqual(cell_size(2), (180 / 32, 360 / 32))
+
+    def test_given_circle__when_cells_within__then_every_point_in_circle_has_a_prefix(self):
+        lat, lng, radius = 51.5007, -0.1246, 800
+        cells = cells_within(lat, lng, radius)
+        rng = np.random.default_rng(0)
+        metres_per_degree = math.pi * EARTH_RADIUS_METRES / 180
+
+        for angle, distance in zip(rng.uniform(0, 2 * math.pi, 500), radius * np.sqrt(rng.uniform(0, 1, 500))):
+            point_lat = lat + distance * math.sin(angle) / metres_per_degree
+            point_lng = lng + distance * math.cos(angle) / (metres_per_degree * math.cos(math.radians(lat)))
+            self.assertTrue(any(encode(point_lat, point_lng).startswith(cell) for cell in cells))
+        self.assertLessEqual(len(cells), 9)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import numpy as np
+from algorithms.bayesian_emulation.bayesian_emulator import BayesianEmulator
+from algorithms.bayesian_emulation.hyperparameters import fit_hyperparameters, log_marginal_likelihood
+from algorithms.bayesian_emulation.kernels import squared_distances
+
+class TestHyperparameters(unittest.TestCase):
+
+    def setUp(self):
+        # Sample D from a Gaussian Process with beta=30, sigma=4, theta=3
+        rng = np.random.default_rng(0)
+        self.x_train = rng.uniform(0, 10, size=(60, 2))
+        self.sq_dists = squared_distances(self.x_train, self.x_train)
+        K = 16 * np.exp(-self.sq_dists / 9) + 1e-8 * np.eye(60)
+        self.D = 30 + np.linalg.cholesky(K) @ rng.standard_normal(60)
+
+    def test_given_parameters__when_likelihood_evaluated__then_gradient_matches_finite_differences(self):
+        params = np.array([28.0, np.log(3.0), np.log(2.5)])
+
+        _, gradient = log_marginal_likelihood(params, self.sq_dists, self.D, nugget=1e-6)
+
+        step = 1e-6
+        for i in range(3):
+            shift = np.zeros(3)
+            shift[i] = step
+            upper, _ = log_marginal_likelihood(params + shift, self.sq_dists, self.D, nugget=1e-6)
+            lower, _ = log_marginal_likelihood(params - shift, self.sq_dists, self.D, nugget=1e-6)
+            self.assertAlmostEqual(gradient[i], (upper - lower) / (2 * step), delta=1e-3 * max(1, abs(gradient[i])))
+
+    def test_given_poor_guess__when_fitted__then_likelihood_improves_and_parameters_recovered(self):
+        guess = np.array([45.0, np.log(1.0), np.log(0.5)])
+        guess_lml, _ = log_marginal_likelihood(guess, self.sq_dists, self.D, nugget=1e-6)
+
+        fitted = fit_hyperparameters(self.x_train, self.D, initial=(45, 1, 0.5), n_starts=4, n_workers=1, nugget=1e-6)
+
+        self.assertGreater(fitted["log_marginal_likelihood"], guess_lml)
+        self.assertTrue(1.5 < fitted["theta"] < 6)
+        self.assertTrue(1.5 < fitted["sigma"] < 10)
+
+    def test_given_nugget_too_small__when_likelihood_evaluated__then_raises_rather_than_adding_jitter(self):
+        duplicated = np.vstack((self.x_train, self.x_train[:1]))
+        sq_dists = squared_distances(duplicated, duplicated)
+
+        with self.assertRaises(np.linalg.LinAlgError):
+            log_marginal_likelihood(np.array([30.0, np.log(4.0), np.log(3.0)]), sq_dists, np.append(self.D, self.D[0]), nugget=0.0)
+
+    def test_given_duplicated_training_point__when_fitted__then_likelihood_reported_for_the_returned_nugget(self):
+        x_train, D = np.vstack((self.x_train, self.x_train[:1])), np.append(self.D, self.D[0])
+
+        fitted = fit_hyperparameters(x_train, D, n_starts=2, n_workers=1, nugget=0.0)
+
+        self.assertGreater(fitted["nugget"], 0)
+        params = np.array([fitted["beta"], np.log(fitted["sigma"]), np.log(fitted["theta"])])
+        lml, _ = log_marginal_likelihood(params, squared_distances(x_train, x_train), D, fitted["nugget"])
+        self.assertAlmostEqual(lml, fitted["log_marginal_likelihood"], places=6)
+
+    def test_given_process_pool__when_fitted__then_matches_serial_fit(self):
+        serial = fit_hyperparameters(self.x_train, self.D, n_starts=3, n_workers=1, nugget=1e-6)
+        parallel = fit_hyperparameters(self.x_train, self.D, n_starts=3, n_workers=2, nugget=1e-6)
+
+        for key in serial:
+            self.assertAlmostEqual(serial[key], parallel[key], places=6)
+
+    def test_given_emulator__when_fitted__then_parameters_replaced_and_M_cleared(self):
+        be = BayesianEmulator(45, 1, 0.5, self.x_train, self.D, nugget=1e-6)
+        be.compute_M()
+
+        fitted = be.fit_hyperparameters(n_starts=2, n_workers=1)
+
+        self.assertIsNone(be.M)
+        self.assertEqual(float(be.theta), fitted["theta"])
+        be.compute_M()
+        np.testing.assert_allclose(be.emulate_batch(self.x_train), self.D, atol=1e-3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+from algorithms.bayesian_emulation.kernels import estimate_covariance_memory, squared_distances, squared_exponential_covariance, wendland, wendland_covariance
+
+class TestKernels(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = rng.uniform(-15000, 15000, size=(70, 4))
+        self.naive_sq_dists = np.sum((self.X[:, None, :] - self.X[None, :, :]) ** 2, axis=-1)
+
+    def test_given_points__when_squared_distances_computed__then_matches_naive_differences(self):
+        sq_dists = squared_distances(self.X, self.X)
+
+        np.testing.assert_allclose(sq_dists, self.naive_sq_dists, rtol=1e-9, atol=1e-3)
+        self.assertTrue(np.all(sq_dists >= 0))
+
+    def test_given_block_sizes__when_covariance_assembled__then_matches_unblocked_covariance(self):
+        expected = 4 * np.exp(-self.naive_sq_dists / 5000 ** 2)
+
+        for block_size in (1, 16, 70, 1000):
+            K = squared_exponential_covariance(self.X, 2, 5000, block_size=block_size)
+            np.testing.assert_allclose(K, expected, rtol=1e-9)
+
+    def test_given_preallocated_float32_output__when_covariance_assembled__then_written_in_place(self):
+        out = np.zeros((70, 70), dtype=np.float32)
+
+        K = squared_exponential_covariance(self.X, 2, 5000, block_size=8, out=out)
+
+        self.assertIs(K, out)
+        np.testing.assert_allclose(out, 4 * np.exp(-self.naive_sq_dists / 5000 ** 2), rtol=1e-5, atol=1e-30)
+
+    def test_given_problem_size__when_memory_estimated__then_covariance_plus_one_block(self):
+        self.assertEqual(estimate_covariance_memory(10000, block_size=500), 10000 * 10000 * 8 + 500 * 10000 * 8)
+        self.assertEqual(estimate_covariance_memory(100, block_size=500, dtype=np.float32), 100 * 100 * 4 + 100 * 100 * 8)
+
+
+    def test_given_distances__when_wendland_evaluated__then_one_at_zero_and_zero_beyond_support(self):
+        self.assertEqual(wendland(0, 4), 1)
+        np.testing.assert_array_equal(wendland([1, 1.5, 10], 4), [0, 0, 0])
+        self.assertTrue(np.all(np.diff(wendland(np.linspace(0, 1, 50), 4)) < 0))
+
+    def test_given_points__when_wendland_covariance_assembled__then_sparse_matches_dense(self):
+        dists = np.sqrt(self.naive_sq_dists)
+
+        K = wendland_covariance(self.X, 2, 8000)
+
+        np.testing.assert_allclose(K.toarray(), 4 * wendland(dists / 8000, 4), rtol=1e-9, atol=1e-12)
+        self.assertLess(K.nnz, 70 * 70)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from algorithms.bayesian_emulation.bayesian_emulator import BayesianEmulator
+from algorithms.bayesian_emulation.model_artifact import ALIGNMENT, artifact_to_emulator, load_model_artifact, pack_model_artifact, read_model_artifact, write_model_artifact
+
+class TestModelArtifact(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x_train = rng.uniform(0, 5, size=(12, 4))
+        self.D = rng.uniform(1, 5, size=12)
+        self.emulator = BayesianEmulator(2, 1, 2, self.x_train, self.D)
+        self.emulator.compute_M(kronecker=False)
+
+    def pack(self, with_factor=True):
+        L = self.emulator.L if with_factor else None
+        return pack_model_artifact(2, 1, 2, self.x_train, self.D, self.emulator.M, L, self.emulator.nugget)
+
+    def test_given_packed_model__when_read__then_arrays_and_hyperparameters_round_trip(self):
+        artifact = read_model_artifact(self.pack())
+
+        self.assertEqual((artifact["beta"], artifact["sigma"], artifact["theta"]), (2, 1, 2))
+        np.testing.assert_array_equal(artifact["x_train"], self.x_train)
+        np.testing.assert_array_equal(artifact["D"], self.D)
+        np.testing.assert_array_equal(artifact["M"], self.emulator.M)
+        np.testing.assert_array_equal(artifact["L"], self.emulator.L)
+
+    def test_given_packed_model__when_read__then_arrays_are_aligned_read_only_views(self):
+        data = self.pack()
+        artifact = read_model_artifact(data)
+        start = np.frombuffer(data, np.uint8).ctypes.data
+
+        for name in ("x_train", "D", "M", "L"):
+            self.assertFalse(artifact[name].flags.writeable)
+            self.assertFalse(artifact[name].flags.owndata)
+            self.assertEqual((artifact[name].ctypes.data - start) % ALIGNMENT, 0)
+
+    def test_given_model_without_factor__when_read__then_L_is_none(self):
+        self.assertIsNone(read_model_artifact(self.pack(with_factor=False))["L"])
+
+    def test_given_corrupted_payload__when_read__then_raises_unless_unverified(self):
+        data = bytearray(self.pack())
+        data[-1] ^= 0xFF
+
+        with self.assertRaises(ValueError):
+            read_model_artifact(bytes(data))
+        read_model_artifact(bytes(data), verify=False)
+
+    def test_given_other_bytes__when_read__then_raises(self):
+        with self.assertRaises(ValueError):
+            read_model_artifact(b"not a model artifact")
+
+    def test_given_artifact_on_disk__when_loaded__then_emulator_matches_original(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "model.emu")
+            checksum = write_model_artifact(path, 2, 1, 2, self.x_train, self.D, self.emulator.M, self.emulator.L, self.emulator.nugget)
+            artifact = load_model_artifact(path)
+            emulator = artifact_to_emulator(artifact)
+
+            self.assertEqual(artifact["checksum"], checksum)
+            self.assertIs(emulator.L, artifact["L"])
+            X = np.random.default_rng(1).uniform(0, 5, size=(20, 4))
+            np.testing.assert_allclose(emulator.emulate_batch_with_variance(X), self.emulator.emulate_batch_with_variance(X))
+            del emulator, artifact
+
+if __name__ == '__main__':
+    unittest.main()
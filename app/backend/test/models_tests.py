@@ -0,0 +1,67 @@
+import unittest
+from flask import Flask
+from algorithms.bayesian_emulation.coord_transformer import get_coord_transformer
+from models import Pub, User, db
+
+class TestProjectedCoords(unittest.TestCase):
+
+    def setUp(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+        db.init_app(app)
+        self.context = app.app_context()
+        self.context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def assertProjected(self, row, lat, lng):
+        x, y = get_coord_transformer().transform(lat, lng)
+        self.assertAlmostEqual(row.x, x, places=6)
+        self.assertAlmostEqual(row.y, y, places=6)
+
+    def test_given_new_row__when_inserted__then_x_y_projected_from_lat_lng(self):
+        pub = Pub(name="The Anchor", address="34 Park St", lat=51.5073, lng=-0.0915)
+        db.session.add(pub)
+        db.session.commit()
+
+        self.assertProjected(pub, 51.5073, -0.0915)
+
+    def test_given_stored_row__when_lat_lng_changed__then_x_y_refreshed(self):
+        user = User(address="Somewhere", first_name="A", second_name="B", lat=51.5073, lng=-0.0915)
+        db.session.add(user)
+        db.session.commit()
+        before = (user.x, user.y)
+
+        user.lat, user.lng = 51.5194, -0.1270
+        db.session.commit()
+
+        self.assertNotEqual((user.x, user.y), before)
+        self.assertProjected(user, 51.5194, -0.1270)
+
+    def test_given_stored_row__when_other_field_changed__then_x_y_kept(self):
+        pub = Pub(name="The Anchor", address="34 Park St", lat=51.5073, lng=-0.0915)
+        db.session.add(pub)
+        db.session.commit()
+
+        pub.name = "The Anchor Bankside"
+        db.session.commit()
+
+        self.assertProjected(pub, 51.5073, -0.0915)
+
+    def test_given_stored_row__when_location_cleared__then_x_y_cleared(self):
+        pub = Pub(name="The Anchor", address="34 Park St", lat=51.5073, lng=-0.0915)
+        db.session.add(pub)
+        db.session.commit()
+
+        pub.lat = pub.lng = None
+        db.session.commit()
+
+        self.assertIsNone(pub.x)
+        self.assertIsNone(pub.y)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import numpy as np
+from algorithms.bayesian_emulation.bayesian_emulator import BayesianEmulator
+from algorithms.pub_finder.centre import geometric_median
+from algorithms.pub_finder.pruning import SPEED_SAFETY_FACTOR, branch_and_bound, journey_time_bound, stream_by_distance
+from algorithms.pub_finder.pub_catalog import PubCatalog
+from algorithms.pub_finder.suggest_pub import OBJECTIVES
+from algorithms.pub_finder.synthetic import JOURNEY_OVERHEAD_SECONDS, SECONDS_PER_METRE, journey_time_matrix
+
+# The synthetic journeys are never faster than this, so their bound is exact
+SPEED = 1 / SECONDS_PER_METRE
+BOUND = (JOURNEY_OVERHEAD_SECONDS, SPEED)
+
+class TestPruning(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.pubs_xy = rng.uniform(-25000, 25000, size=(10000, 2))
+        self.pubs = PubCatalog.from_xy(self.pubs_xy)
+        self.users = rng.uniform(-10000, 10000, size=(20, 2))
+        self.centre = geometric_median(self.users)
+        self.scored = []
+
+    def score(self, rows):
+        self.scored.extend(rows.tolist())
+        return journey_time_matrix(self.users, self.pubs_xy[rows])
+
+    def test_given_each_objective__when_branch_and_bound__then_matches_exhaustive_search(self):
+        times = journey_time_matrix(self.users, self.pubs_xy)
+
+        for objective, reduce in OBJECTIVES.items():
+            best = branch_and_bound(self.users, self.pubs, self.score, reduce, BOUND, self.centre)["ranked"][0]
+            scores = reduce(times)
+
+            self.assertEqual(best["row"], int(np.argmin(scores)), objective)
+            self.assertAlmostEqual(best["score"], scores.min(), places=6)
+            np.testing.assert_allclose(best["member_times"], times[:, best["row"]])
+
+    def test_given_tight_bound__when_branch_and_bound__then_most_pubs_pruned_and_counted(self):
+        best = branch_and_bound(self.users, self.pubs, self.score, OBJECTIVES["sum"], BOUND, self.centre)
+
+        self.assertEqual(best["evaluated"], len(self.scored))
+        self.assertEqual(len(set(self.scored)), len(self.scored))
+        self.assertEqual(best["evaluated"] + best["pruned"], len(self.pubs_xy))
+        self.assertGreater(best["pruned"], 0.9 * len(self.pubs_xy))
+
+    def test_given_loose_bound__when_branch_and_bound__then_still_exact(self):
+        best = branch_and_bound(self.users, self.pubs, self.score, OBJECTIVES["max"], (0, SPEED * 10), self.centre)["ranked"][0]
+
+        self.assertEqual(best["row"], int(np.argmin(journey_time_matrix(self.users, self.pubs_xy).max(axis=0))))
+
+    def test_given_k__when_branch_and_bound__then_k_best_in_order(self):
+        scores = OBJECTIVES["sum"](journey_time_matrix(self.users, self.pubs_xy))
+
+        found = branch_and_bound(self.users, self.pubs, self.score, OBJECTIVES["sum"], BOUND, self.centre, k=10)
+
+        self.assertEqual([best["row"] for best in found["ranked"]], np.argsort(scores, kind="stable")[:10].tolist())
+        np.testing.assert_allclose([best["score"] for best in found["ranked"]], np.sort(scores)[:10])
+        self.assertGreater(found["pruned"], 0.9 * len(self.pubs_xy))
+
+    def test_given_k_beyond_catalog__when_branch_and_bound__then_every_pub_ranked(self):
+        pubs = PubCatalog.from_xy([[0.0, 0.0], [500.0, 0.0], [-2000.0, 0.0]])
+        score = lambda rows: journey_time_matrix(self.users[:3], pubs.xy[rows])
+
+        found = branch_and_bound(self.users[:3], pubs, score, OBJECTIVES["sum"], BOUND, (0.0, 0.0), k=5)
+
+        self.assertEqual(sorted(best["row"] for best in found["ranked"]), [0, 1, 2])
+        self.assertEqual(found["pruned"], 0)
+
+    def test_given_centre_off_the_group__when_branch_and_bound__then_still_exact(self):
+        best = branch_and_bound(self.users, self.pubs, self.score, OBJECTIVES["sum"], BOUND, (30000.0, -30000.0))["ranked"][0]
+
+        self.assertEqual(best["row"], int(np.argmin(journey_time_matrix(self.users, self.pubs_xy).sum(axis=0))))
+
+    def test_given_pubs_at_the_same_distance__when_streamed__then_each_once_nearest_first(self):
+        angles = np.linspace(0, 2 * np.pi, 200, endpoint=False)
+        xy = np.vstack([radius * np.column_stack((np.cos(angles), np.sin(angles))) for radius in (100.0, 200.0)])
+        pubs = PubCatalog.from_xy(np.round(xy, 6))
+
+        batches = list(stream_by_distance(pubs.spatial_index, (0.0, 0.0), first_batch_size=7))
+        rows = np.concatenate([rows for rows, _ in batches])
+        distances = np.concatenate([distances for _, distances in batches])
+
+        self.assertEqual(sorted(rows.tolist()), list(range(len(xy))))
+        self.assertTrue(np.all(np.diff(distances) >= 0))
+
+    def test_given_emulator__when_journey_time_bound__then_under_every_training_journey(self):
+        x_train = np.array([[0, 0, 1000, 0], [0, 0, 0, 3000], [0, 0, 0, 200]], dtype=np.float64)
+        D = np.array([100, 600, 60], dtype=np.float64)
+        emulator = BayesianEmulator(200, 100, 1000, x_train, D)
+
+        overhead, speed = journey_time_bound(emulator)
+
+        self.assertAlmostEqual(speed, 10 * SPEED_SAFETY_FACTOR)
+        self.assertAlmostEqual(overhead, 100 - 1000 / speed)
+        self.assertTrue(np.all(overhead + np.array([1000, 3000, 200]) / speed <= D + 1e-9))
+
+if __name__ == '__main__':
+    unittest.main()
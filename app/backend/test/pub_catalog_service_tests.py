@@ -0,0 +1,68 @@
+from datetime import datetime
+import unittest
+from flask import Flask
+from models import Pub, db
+from services import pub_catalog_service
+from services.pub_catalog_service import refresh_pub_catalog
+
+class TestPubCatalogService(unittest.TestCase):
+
+    def setUp(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+        db.init_app(app)
+        self.context = app.app_context()
+        self.context.push()
+        db.create_all()
+        pub_catalog_service._state.update(catalog=None, checked_at=0.0, ids_checked_at=0.0, stale=False)
+        self.id_check_seconds, self.ids = pub_catalog_service.PUB_CATALOG_ID_CHECK_SECONDS, pub_catalog_service._ids
+
+    def tearDown(self):
+        pub_catalog_service.PUB_CATALOG_ID_CHECK_SECONDS, pub_catalog_service._ids = self.id_check_seconds, self.ids
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def add_pub(self, pub_id, name, lat, lng, updated_at=None):
+        db.session.add(Pub(id=pub_id, name=name, address=f"{name}, London", lat=lat, lng=lng, updated_at=updated_at))
+        db.session.commit()
+
+    def test_given_changed_pub__when_refreshed__then_catalog_has_its_new_location(self):
+        self.add_pub("a", "The Anchor", 51.5073, -0.0915)
+        refresh_pub_catalog(full=True)
+
+        pub = db.session.get(Pub, "a")
+        pub.lat, pub.lng = 51.5194, -0.1270
+        db.session.commit()
+        catalog = refresh_pub_catalog()
+
+        self.assertAlmostEqual(catalog.lat_lng[catalog.index_of("a")][0], 51.5194)
+
+    def test_given_pub_deleted__when_refreshed__then_count_catches_it_without_comparing_ids(self):
+        self.add_pub("a", "The Anchor", 51.5073, -0.0915)
+        self.add_pub("b", "The Bell", 51.5194, -0.1270)
+        refresh_pub_catalog(full=True)
+        pub_catalog_service._ids = None
+
+        db.session.delete(db.session.get(Pub, "a"))
+        db.session.commit()
+        catalog = refresh_pub_catalog()
+
+        self.assertEqual(catalog.ids.tolist(), ["b"])
+
+    def test_given_pub_deleted_and_another_added__when_ids_compared__then_catalog_matches_the_table(self):
+        self.add_pub("a", "The Anchor", 51.5073, -0.0915)
+        self.add_pub("b", "The Bell", 51.5194, -0.1270)
+        refresh_pub_catalog(full=True)
+        pub_catalog_service.PUB_CATALOG_ID_CHECK_SECONDS = 0
+
+        # Another process, so no invalidate_pub_catalog, with a clock behind the watermark. The number of pubs is unchanged
+        db.session.delete(db.session.get(Pub, "a"))
+        db.session.commit()
+        self.add_pub("c", "The Crown", 51.5136, -0.1365, updated_at=datetime(2000, 1, 1))
+        catalog = refresh_pub_catalog()
+
+        self.assertEqual(sorted(catalog.ids.tolist()), ["b", "c"])
+
+if __name__ == '__main__':
+    unittest.main()
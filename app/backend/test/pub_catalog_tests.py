@@ -0,0 +1,65 @@
+import unittest
+import numpy as np
+from algorithms.pub_finder.pub_catalog import PubCatalog
+
+ROWS = [
+    ("a", "The Anchor", 51.50, -0.10, 1700.0, -50.0),
+    ("b", "The Bell", 51.52, -0.14, -1100.0, 2100.0),
+    ("c", "The Crown", 51.51, -0.12, 300.0, 1000.0),
+]
+
+class TestPubCatalog(unittest.TestCase):
+
+    def test_given_rows__when_built__then_columns_line_up_and_are_read_only(self):
+        catalog = PubCatalog.from_rows(ROWS, watermark=1)
+
+        self.assertEqual(len(catalog), 3)
+        self.assertEqual(catalog.index_of("b"), 1)
+        self.assertEqual(catalog.names[1], "The Bell")
+        np.testing.assert_array_equal(catalog.xy[1], [-1100.0, 2100.0])
+        np.testing.assert_array_equal(catalog.lat_lng[1], [51.52, -0.14])
+        self.assertTrue(np.shares_memory(catalog.x, catalog.xy))
+        for array in (catalog.ids, catalog.names, catalog.lat_lng, catalog.xy, catalog.x):
+            self.assertFalse(array.flags.writeable)
+
+    def test_given_rows_without_projection__when_built__then_left_out(self):
+        catalog = PubCatalog.from_rows(ROWS + [("d", "The Dog", None, None, None, None)])
+
+        self.assertNotIn("d", catalog)
+        self.assertEqual(len(catalog), 3)
+
+    def test_given_no_rows__when_built__then_empty_with_right_shapes(self):
+        catalog = PubCatalog.from_rows([])
+
+        self.assertEqual(len(catalog), 0)
+        self.assertEqual(catalog.xy.shape, (0, 2))
+
+    def test_given_changed_rows__when_updated__then_new_snapshot_and_original_unchanged(self):
+        catalog = PubCatalog.from_rows(ROWS, watermark=1)
+
+        updated = catalog.updated([("b", "The Bell", 51.53, -0.15, -1500.0, 3200.0), ("e", "The Eagle", 51.49, -0.09, 2400.0, -1200.0)], watermark=2)
+
+        self.assertEqual(len(updated), 4)
+        self.assertEqual(updated.watermark, 2)
+        np.testing.assert_array_equal(updated.xy[updated.index_of("b")], [-1500.0, 3200.0])
+        np.testing.assert_array_equal(catalog.xy[catalog.index_of("b")], [-1100.0, 2100.0])
+        self.assertEqual(catalog.watermark, 1)
+
+    def test_given_row_that_lost_its_location__when_updated__then_removed(self):
+        catalog = PubCatalog.from_rows(ROWS)
+
+        updated = catalog.updated([("a", "The Anchor", None, None, None, None)])
+
+        self.assertNotIn("a", updated)
+        self.assertEqual(len(updated), 2)
+
+    def test_given_deleted_pubs__when_without__then_removed(self):
+        catalog = PubCatalog.from_rows(ROWS)
+
+        updated = catalog.without(["a", "c"])
+
+        self.assertEqual(updated.ids.tolist(), ["b"])
+        self.assertIs(catalog.without(["missing"]), catalog)
+
+if __name__ == '__main__':
+    unittest.main()
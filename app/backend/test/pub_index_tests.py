@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+from algorithms.pub_finder.pub_catalog import PubCatalog
+from algorithms.pub_finder.pub_index import PubIndex
+
+class TestPubIndex(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.xy = rng.uniform(-20000, 20000, size=(5000, 2))
+        self.index = PubIndex(self.xy)
+
+    def brute_force(self, x, y):
+        distances = np.hypot(self.xy[:, 0] - x, self.xy[:, 1] - y)
+        return np.argsort(distances), np.sort(distances)
+
+    def test_given_point__when_nearest__then_matches_brute_force(self):
+        rows, distances = self.index.nearest(120.0, -340.0, k=10)
+        expected_rows, expected_distances = self.brute_force(120.0, -340.0)
+
+        np.testing.assert_array_equal(rows, expected_rows[:10])
+        np.testing.assert_allclose(distances, expected_distances[:10])
+
+    def test_given_max_distance__when_nearest__then_only_pubs_within_it(self):
+        rows, distances = self.index.nearest(0.0, 0.0, k=50, max_distance=500)
+        _, expected_distances = self.brute_force(0.0, 0.0)
+
+        self.assertEqual(len(rows), np.sum(expected_distances[:50] < 500))
+        self.assertTrue(np.all(distances < 500))
+
+    def test_given_radius__when_within__then_matches_brute_force_nearest_first(self):
+        rows, distances = self.index.within(0.0, 0.0, 1000)
+        expected_rows, expected_distances = self.brute_force(0.0, 0.0)
+        n = np.sum(expected_distances <= 1000)
+
+        np.testing.assert_array_equal(rows, expected_rows[:n])
+        self.assertTrue(np.all(np.diff(distances) >= 0))
+
+    def test_given_several_points__when_nearest_many__then_matches_nearest(self):
+        points = np.array([[0.0, 0.0], [5000.0, -3000.0]])
+
+        rows, distances = self.index.nearest_many(points, k=3)
+
+        for point, point_rows in zip(points, rows):
+            np.testing.assert_array_equal(point_rows, self.index.nearest(*point, k=3)[0])
+        self.assertEqual(distances.shape, (2, 3))
+
+    def test_given_empty_catalog__when_queried__then_nothing_found(self):
+        index = PubCatalog.empty().spatial_index
+
+        self.assertEqual(len(index.nearest(0.0, 0.0, k=5)[0]), 0)
+        self.assertEqual(len(index.within(0.0, 0.0, 100)[0]), 0)
+
+if __name__ == '__main__':
+    unittest.main()
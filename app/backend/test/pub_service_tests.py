@@ -0,0 +1,81 @@
+import unittest
+import numpy as np
+from flask import Flask
+from algorithms.pub_finder.pub_catalog import PubCatalog
+from algorithms.pub_finder.synthetic import make_emulator
+from models import Pub, db
+from services import pub_catalog_service, pub_service
+from services.pub_service import _refined_suggestions, find_nearby_pubs
+
+PUBS = [("a", "The Anchor", 51.5073, -0.0915), ("b", "The Bell", 51.5080, -0.0930), ("c", "The Crown", 51.5194, -0.1270)]
+
+class TestFindNearbyPubs(unittest.TestCase):
+
+    def setUp(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+        db.init_app(app)
+        self.context = app.app_context()
+        self.context.push()
+        db.create_all()
+        for pub_id, name, lat, lng in PUBS:
+            db.session.add(Pub(id=pub_id, name=name, address=f"{name}, London", lat=lat, lng=lng))
+        db.session.commit()
+        pub_catalog_service._state.update(catalog=None, checked_at=0.0, stale=False)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def test_given_first_catalog_being_built__when_nearby_within_radius__then_database_gives_same_pubs_as_catalog(self):
+        with pub_catalog_service._refresh_lock:
+            from_database = find_nearby_pubs(51.5073, -0.0915, k=5, radius_metres=500)
+        self.assertIsNone(pub_catalog_service._state["catalog"])
+
+        from_catalog = find_nearby_pubs(51.5073, -0.0915, k=5, radius_metres=500)
+
+        self.assertEqual([pub.id for pub, _ in from_database], ["a", "b"])
+        self.assertEqual([pub.id for pub, _ in from_database], [pub.id for pub, _ in from_catalog])
+        for (_, expected), (_, distance) in zip(from_catalog, from_database):
+            self.assertAlmostEqual(distance, expected, places=6)
+
+class TestRefinedSuggestions(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.emulator = make_emulator(np.random.default_rng(0), n_training=150)
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.pubs = PubCatalog.from_xy(rng.uniform(-15000, 15000, size=(400, 2)))
+        self.users = rng.uniform(-10000, 10000, size=(4, 2))
+        self.members = [(f"user-{i}", x, y, 51.5, -0.1) for i, (x, y) in enumerate(self.users)]
+
+        self.requested = []
+        self.get_journey_times, self.max_elements = pub_service.get_journey_times, pub_service.ROUTE_MATRIX_MAX_ELEMENTS
+        pub_service.get_journey_times = self.fake_journey_times
+
+    def tearDown(self):
+        pub_service.get_journey_times, pub_service.ROUTE_MATRIX_MAX_ELEMENTS = self.get_journey_times, self.max_elements
+
+    def fake_journey_times(self, origins, destinations, timeout=None, fetch=True):
+        self.requested.append([name for name, _, _ in destinations])
+        return np.full((len(origins), len(destinations)), 600.0)
+
+    def test_given_k_beyond_one_request__when_refined__then_k_suggestions_rest_in_emulator_order(self):
+        pub_service.ROUTE_MATRIX_MAX_ELEMENTS = 10
+
+        suggestions = _refined_suggestions(self.members, self.users, self.pubs, self.emulator, "min-total-time", k=5)
+
+        self.assertEqual(len(suggestions), 5)
+        self.assertEqual(len({suggestion.row for suggestion in suggestions}), 5)
+        # 10 elements hold the 4 members' journeys to 2 pubs
+        self.assertEqual(len(self.requested), 1)
+        self.assertEqual(self.requested[0], [f"pub {self.pubs.ids[suggestion.row]}" for suggestion in suggestions[:2]])
+        self.assertTrue(all(suggestion.score == 2400.0 for suggestion in suggestions[:2]))
+        unrouted = [suggestion.score for suggestion in suggestions[2:]]
+        self.assertEqual(unrouted, sorted(unrouted))
+
+if __name__ == '__main__':
+    unittest.main()
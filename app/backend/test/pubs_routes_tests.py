@@ -0,0 +1,61 @@
+import unittest
+from http import HTTPStatus
+from flask import Flask
+from api.routes.pubs_routes import api_url_prefix, pubs_routes
+from models import Pub, db
+from services import pub_catalog_service
+
+NEARBY_URL = f"{api_url_prefix}/pubs/nearby"
+
+class TestNearbyPubsRoute(unittest.TestCase):
+
+    def setUp(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+        db.init_app(app)
+        app.register_blueprint(pubs_routes, url_prefix=api_url_prefix)
+        self.context = app.app_context()
+        self.context.push()
+        db.create_all()
+        db.session.add(Pub(id="a", name="The Anchor", address="34 Park St", lat=51.5073, lng=-0.0915))
+        db.session.commit()
+        pub_catalog_service._state.update(catalog=None, checked_at=0.0, stale=False)
+        self.client = app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def assertInvalidField(self, query, parameter):
+        response = self.client.get(NEARBY_URL, query_string=query)
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        error = response.get_json()["errors"][0]
+        self.assertEqual(error["code"], "INVALID_FIELD")
+        self.assertEqual(error["source"], {"parameter": parameter})
+
+    def test_given_valid_query__when_nearby__then_pubs_within_radius(self):
+        response = self.client.get(NEARBY_URL, query_string={"lat": 51.5074, "lng": -0.0915, "radius": 100})
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual([pub["id"] for pub in response.get_json()["data"]], ["a"])
+
+    def test_given_lat_lng_out_of_range_or_not_numbers__when_nearby__then_invalid_field(self):
+        self.assertInvalidField({"lat": 91, "lng": -0.0915}, "lat")
+        self.assertInvalidField({"lat": 51.5074, "lng": "west"}, "lng")
+        self.assertInvalidField({"lat": "nan", "lng": -0.0915}, "lat")
+        self.assertInvalidField({"lat": 51.5074, "lng": "inf"}, "lng")
+
+    def test_given_radius_not_positive_or_not_finite__when_nearby__then_invalid_field(self):
+        for radius in ["0", "-50", "nan", "inf", "far"]:
+            with self.subTest(radius=radius):
+                self.assertInvalidField({"lat": 51.5074, "lng": -0.0915, "radius": radius}, "radius")
+
+    def test_given_missing_lat__when_nearby__then_bad_request(self):
+        response = self.client.get(NEARBY_URL, query_string={"lng": -0.0915})
+
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(response.get_json()["errors"][0]["code"], "INVALID_QUERY_PARAMETERS")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import numpy as np
+from algorithms.pub_finder.pub_catalog import PubCatalog
+from algorithms.pub_finder.refine import SHORTLIST_FACTOR, rerank, shortlist
+from algorithms.pub_finder.suggest_pub import PubSuggestion, suggest_pub
+from algorithms.pub_finder.synthetic import make_emulator
+
+class TestRefine(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Sparse enough that the variance varies
+        cls.emulator = make_emulator(np.random.default_rng(0), n_training=150)
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.pubs = PubCatalog.from_xy(rng.uniform(-15000, 15000, size=(400, 2)))
+        self.users = rng.uniform(-10000, 10000, size=(4, 2))
+
+    def test_given_no_confidence__when_shortlist__then_emulators_best(self):
+        finalists = shortlist(self.users, self.pubs, self.emulator, "sum", n_finalists=5, confidence_z=0)
+
+        best = suggest_pub(self.users, self.pubs, "min-total-time", self.emulator, k=5)
+        self.assertEqual([finalist.row for finalist in finalists], [suggestion.row for suggestion in best])
+
+    def test_given_confidence__when_shortlist__then_lowest_optimistic_scores_of_the_emulators_best(self):
+        finalists = shortlist(self.users, self.pubs, self.emulator, "sum", n_finalists=5, confidence_z=2.0)
+
+        candidates = suggest_pub(self.users, self.pubs, "min-total-time", self.emulator, k=5 * SHORTLIST_FACTOR)
+        optimistic = {}
+        for candidate in candidates:
+            pairs = np.hstack((self.users, np.tile(self.pubs.xy[candidate.row], (len(self.users), 1))))
+            _, variances = self.emulator.emulate_batch_with_variance(pairs)
+            optimistic[candidate.row] = np.maximum(candidate.member_times - 2.0 * np.sqrt(np.maximum(variances, 0)), 0).sum()
+        expected = sorted(optimistic, key=optimistic.get)[:5]
+        self.assertEqual([finalist.row for finalist in finalists], expected)
+
+    def test_given_route_times__when_rerank__then_ordered_on_real_times_keeping_emulated_score(self):
+        finalists = [PubSuggestion(row, member_times=np.array([100.0, 200.0]) + row, score=300.0 + 2 * row) for row in range(3)]
+        route_times = np.array([[500.0, 300.0, 100.0], [500.0, 300.0, 100.0]])
+
+        refined = rerank(finalists, route_times, "sum", k=2)
+
+        self.assertEqual([suggestion.row for suggestion in refined], [2, 1])
+        self.assertEqual([suggestion.score for suggestion in refined], [200.0, 600.0])
+        self.assertEqual([suggestion.emulated_score for suggestion in refined], [304.0, 302.0])
+
+    def test_given_unknown_route__when_rerank__then_emulated_time_stands_in(self):
+        finalists = [PubSuggestion(0, member_times=np.array([100.0, 200.0]), score=300.0)]
+
+        refined = rerank(finalists, np.array([[np.nan], [50.0]]), "max")
+
+        np.testing.assert_array_equal(refined[0].member_times, [100.0, 50.0])
+        self.assertEqual(refined[0].score, 100.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import threading
+import unittest
+import numpy as np
+from flask import Flask
+from models import Distance, db
+from services import route_matrix_service
+from services.route_matrix_service import get_journey_times
+
+ORIGINS = [("user a", 51.5073, -0.0915), ("user b", 51.5194, -0.1270)]
+DESTINATIONS = [("pub c", 51.5136, -0.1365)]
+
+class FakeRoutesApi:
+    # Stands in for GoogleRoutesApi, answering every journey in 600 s once released
+    released = threading.Event()
+    requests = 0
+    elements = 0
+
+    def __init__(self, api_key):
+        pass
+
+    def matrix(self, rqst, timeout=None):
+        FakeRoutesApi.requests += 1
+        FakeRoutesApi.elements = len(rqst.origins) * len(rqst.destinations)
+        FakeRoutesApi.released.wait()
+        return [
+            {"originIndex": i, "destinationIndex": j, "condition": "ROUTE_EXISTS", "distanceMeters": 2000, "staticDuration": "600s"}
+            for i in range(len(rqst.origins))
+            for j in range(len(rqst.destinations))
+        ]
+
+class TestRouteMatrixService(unittest.TestCase):
+
+    def setUp(self):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+        db.init_app(app)
+        self.context = app.app_context()
+        self.context.push()
+        db.create_all()
+
+        self.routes_api = route_matrix_service.GoogleRoutesApi
+        route_matrix_service.GoogleRoutesApi = FakeRoutesApi
+        FakeRoutesApi.released.clear()
+        FakeRoutesApi.requests = 0
+
+    def tearDown(self):
+        FakeRoutesApi.released.set()
+        route_matrix_service.GoogleRoutesApi = self.routes_api
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def test_given_answered_request__when_journey_times__then_returned_and_cached(self):
+        FakeRoutesApi.released.set()
+
+        times = get_journey_times(ORIGINS, DESTINATIONS, timeout=5)
+        cached = get_journey_times(ORIGINS, DESTINATIONS, timeout=5)
+
+        np.testing.assert_array_equal(times, [[600.0], [600.0]])
+        np.testing.assert_array_equal(cached, times)
+        self.assertEqual(FakeRoutesApi.requests, 1)
+        self.assertEqual(Distance.query.count(), 2)
+
+    def test_given_request_past_its_deadline__when_journey_times__then_unknown_without_waiting_for_it(self):
+        times = get_journey_times(ORIGINS, DESTINATIONS, timeout=0.05)
+
+        # Returned while the request is still held
+        self.assertFalse(FakeRoutesApi.released.is_set())
+        self.assertTrue(np.isnan(times).all())
+        self.assertEqual(Distance.query.count(), 0)
+
+    def test_given_members_sharing_a_location__when_journey_times__then_requested_once_and_every_row_filled(self):
+        FakeRoutesApi.released.set()
+        origins = [ORIGINS[0], ORIGINS[1], ORIGINS[0]]
+
+        times = get_journey_times(origins, DESTINATIONS, timeout=5)
+        cached = get_journey_times(origins, DESTINATIONS, timeout=5)
+
+        np.testing.assert_array_equal(times, [[600.0], [600.0], [600.0]])
+        np.testing.assert_array_equal(cached, times)
+        self.assertEqual((FakeRoutesApi.requests, FakeRoutesApi.elements), (1, 2))
+        self.assertEqual(Distance.query.count(), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import numpy as np
+from algorithms.bayesian_emulation.bayesian_emulator import BayesianEmulator
+from algorithms.bayesian_emulation.sparse_emulator import SparseBayesianEmulator, select_inducing_points
+
+class TestSparseBayesianEmulator(unittest.TestCase):
+
+    def setUp(self):
+        # Smooth function of four inputs, like [x_o, y_o, x_d, y_d]
+        rng = np.random.default_rng(0)
+        self.x_train = rng.uniform(0, 10, size=(300, 4))
+        self.D = self.true_function(self.x_train)
+        self.X = rng.uniform(1, 9, size=(50, 4))
+
+    @staticmethod
+    def true_function(X):
+        return 20 + 3 * np.sqrt(np.sum((X[:, :2] - X[:, 2:]) ** 2, axis=1))
+
+    def test_given_every_training_point_inducing__when_emulated__then_matches_exact_emulator(self):
+        x_train, D = self.x_train[:40], self.D[:40]
+        exact = BayesianEmulator(20, 5, 6, x_train, D, nugget=1e-4)
+        exact.compute_M(kronecker=False)
+
+        for approximation in ("sor", "fitc"):
+            sparse = SparseBayesianEmulator(20, 5, 6, x_train, D, approximation=approximation, inducing_points=x_train, nugget=1e-4)
+            sparse.compute_M()
+
+            np.testing.assert_allclose(sparse.emulate_batch(self.X), exact.emulate_batch(self.X), rtol=1e-4, atol=1e-3)
+
+    def test_given_inducing_subset__when_emulated__then_accuracy_comparable_to_exact_emulator(self):
+        exact = BayesianEmulator(20, 5, 6, self.x_train, self.D)
+        exact.compute_M()
+        sparse = SparseBayesianEmulator(20, 5, 6, self.x_train, self.D, n_inducing=60)
+        sparse.compute_M()
+
+        emulated, variance = sparse.emulate_batch_with_variance(self.X, chunk_size=16)
+        sparse_rmse = np.sqrt(np.mean((emulated - self.true_function(self.X)) ** 2))
+        exact_rmse = np.sqrt(np.mean((exact.emulate_batch(self.X) - self.true_function(self.X)) ** 2))
+
+        self.assertEqual(sparse.M.shape, (60,))
+        self.assertLess(sparse_rmse, 2 * exact_rmse)
+        self.assertTrue(np.all(variance >= 0))
+        self.assertAlmostEqual(sparse.emulate_with_variance([100, 100, 100, 100])[1], 25, places=4)
+
+    def test_given_inducing_subset__when_matrix_emulated__then_matches_batch_over_every_pair(self):
+        sparse = SparseBayesianEmulator(20, 5, 6, self.x_train, self.D, n_inducing=30, nugget=1e-4)
+        sparse.compute_M()
+        origins, destinations = self.X[:5, :2], self.X[:, 2:]
+        pairs = np.array([[*origin, *destination] for origin in origins for destination in destinations])
+
+        np.testing.assert_allclose(sparse.emulate_matrix(origins, destinations), sparse.emulate_batch(pairs).reshape(5, 50), rtol=1e-10, atol=1e-10)
+
+    def test_given_trained_approximation__when_observations_added__then_matches_full_refit(self):
+        Z = select_inducing_points(self.x_train, 30)
+
+        for approximation in ("sor", "fitc"):
+            incremental = SparseBayesianEmulator(20, 5, 6, self.x_train[:250], self.D[:250], approximation=approximation, inducing_points=Z, nugget=1e-4)
+            incremental.compute_M()
+            incremental.add_observations(self.x_train[250:280], self.D[250:280])
+            incremental.add_observations(self.x_train[280:], self.D[280:])
+            refit = SparseBayesianEmulator(20, 5, 6, self.x_train, self.D, approximation=approximation, inducing_points=Z, nugget=1e-4)
+            refit.compute_M()
+
+            np.testing.assert_allclose(incremental.M, refit.M, rtol=1e-6, atol=1e-8)
+            np.testing.assert_allclose(incremental.emulate_batch_with_variance(self.X), refit.emulate_batch_with_variance(self.X), rtol=1e-6, atol=1e-6)
+
+    def test_given_dense_only_option__when_factorised__then_raises(self):
+        sparse = SparseBayesianEmulator(20, 5, 6, self.x_train, self.D, n_inducing=10)
+
+        for options in ({"kronecker": True}, {"dtype": np.float32}, {"memmap_path": "covariance.dat"}):
+            with self.assertRaises(ValueError):
+                sparse.compute_M(**options)
+
+    def test_given_trained_approximation__when_neighbour_index_built__then_raises(self):
+        sparse = SparseBayesianEmulator(20, 5, 6, self.x_train, self.D, n_inducing=10)
+        sparse.compute_M()
+
+        with self.assertRaises(ValueError):
+            sparse.build_neighbour_index(tolerance=1e-3)
+        self.assertIsNone(sparse.neighbour_tree)
+
+    def test_given_unknown_approximation__when_created__then_raises(self):
+        with self.assertRaises(ValueError):
+            SparseBayesianEmulator(20, 5, 6, self.x_train, self.D, approximation="vfe", n_inducing=10)
+
+    def test_given_training_points__when_inducing_points_selected__then_distinct_training_points_chosen(self):
+        Z = select_inducing_points(self.x_train, 25)
+
+        self.assertEqual(Z.shape, (25, 4))
+        self.assertEqual(len(np.unique(Z, axis=0)), 25)
+        self.assertTrue(all(any(np.array_equal(z, x) for x in self.x_train) for z in Z))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import unittest
+import numpy as np
+from algorithms.pub_finder.centre import centroid, geometric_median
+from algorithms.pub_finder.pruning import journey_time_bound, lower_bound_times
+from algorithms.pub_finder.pub_catalog import PubCatalog
+from algorithms.pub_finder.suggest_pub import BATCH_SHARED_MATRIX_MIN_GROUPS, suggest_pub, suggest_pubs
+from algorithms.pub_finder.synthetic import make_emulator
+
+# Roughly every pub in London
+N_PUBS = 10000
+
+def sum_of_distances(centre, points):
+    return np.hypot(points[:, 0] - centre[0], points[:, 1] - centre[1]).sum()
+
+class TestGeoCentre(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.pub_xy = self.rng.uniform(-25000, 25000, size=(N_PUBS, 2))
+        self.pubs = PubCatalog.from_xy(self.pub_xy)
+
+    def test_given_points__when_geometric_median__then_no_nearby_point_is_better(self):
+        users = self.rng.uniform(-10000, 10000, size=(12, 2))
+
+        median = geometric_median(users, tolerance=1e-3)
+
+        best = sum_of_distances(median, users)
+        for offset in ([1, 0], [-1, 0], [0, 1], [0, -1]):
+            self.assertLessEqual(best, sum_of_distances(median + np.array(offset), users) + 1e-6)
+
+    def test_given_outlying_member__when_geometric_median__then_closer_to_the_group_than_centroid(self):
+        users = np.vstack((self.rng.normal(0, 200, size=(5, 2)), [[20000, 20000]]))
+
+        self.assertLess(np.hypot(*geometric_median(users)), np.hypot(*centroid(users)))
+
+    def test_given_member_on_the_median__when_geometric_median__then_converges(self):
+        users = np.array([[0.0, 0.0], [1000.0, 0.0], [-1000.0, 0.0], [0.0, 1000.0], [0.0, -1000.0]])
+
+        np.testing.assert_allclose(geometric_median(users), [0.0, 0.0], atol=1.0)
+
+    def test_given_group__when_geo_centre__then_pub_nearest_the_median(self):
+        users = self.rng.uniform(-5000, 5000, size=(8, 2))
+
+        suggestion = suggest_pub(users, self.pubs, "geo-centre")[0]
+
+        distances = np.hypot(*(self.pub_xy - geometric_median(users)).T)
+        self.assertEqual(suggestion.row, int(np.argmin(distances)))
+
+    def test_given_k__when_geo_centre__then_k_nearest_the_median_nearest_first(self):
+        users = self.rng.uniform(-5000, 5000, size=(8, 2))
+
+        suggestions = suggest_pub(users, self.pubs, "geo-centre", k=5)
+
+        distances = np.hypot(*(self.pub_xy - geometric_median(users)).T)
+        self.assertEqual([suggestion.row for suggestion in suggestions], np.argsort(distances)[:5].tolist())
+        np.testing.assert_allclose([suggestion.score for suggestion in suggestions], np.sort(distances)[:5])
+
+    def test_given_no_pubs__when_geo_centre__then_empty(self):
+        self.assertEqual(suggest_pub(np.zeros((2, 2)), PubCatalog.empty(), "geo-centre"), [])
+
+    def test_given_k_below_one__when_suggest_pub__then_raises(self):
+        with self.assertRaises(ValueError):
+            suggest_pub(np.zeros((2, 2)), self.pubs, "geo-centre", k=0)
+
+    def test_given_no_members__when_geo_centre__then_raises(self):
+        with self.assertRaises(ValueError):
+            suggest_pub(np.empty((0, 2)), self.pubs, "geo-centre")
+
+class TestTravelTime(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.emulator = make_emulator(np.random.default_rng(0))
+
+    def setUp(self):
+        self.rng = np.random.default_rng(1)
+        self.pubs = PubCatalog.from_xy(self.rng.uniform(-15000, 15000, size=(300, 2)))
+        self.users = self.rng.uniform(-10000, 10000, size=(6, 2))
+
+    def pair_times(self, users=None):
+        users = self.users if users is None else users
+        pairs = np.array([[*user, *pub] for user in users for pub in self.pubs.xy])
+        overhead, speed = journey_time_bound(self.emulator)
+        times = self.emulator.emulate_batch(pairs).reshape(len(users), len(self.pubs))
+        return np.maximum(times, lower_bound_times(users, self.pubs.xy, speed, overhead))
+
+    def test_given_group__when_each_objective__then_pub_minimising_it_over_every_pair(self):
+        times = self.pair_times()
+
+        for algorithm, scores in (("min-total-time", times.sum(axis=0)), ("minimax-time", times.max(axis=0)), ("percentile-time", np.percentile(times, 90, axis=0))):
+            suggestion = suggest_pub(self.users, self.pubs, algorithm, self.emulator)[0]
+
+            self.assertEqual(suggestion.row, int(np.argmin(scores)))
+            self.assertAlmostEqual(suggestion.score, scores.min(), places=6)
+            np.testing.assert_allclose(suggestion.member_times, times[:, suggestion.row], rtol=1e-10)
+
+    def test_given_emulator_under_the_bound__when_each_objective__then_pub_minimising_the_clamped_times(self):
+        users = self.rng.uniform(-10000, 10000, size=(6, 2))
+        pubs = PubCatalog.from_xy(self.rng.uniform(-20000, 20000, size=(300, 2)))
+        overhead, speed = journey_time_bound(self.emulator)
+        emulated, bound = self.emulator.emulate_matrix(users, pubs.xy), lower_bound_times(users, pubs.xy, speed, overhead)
+        # Towards the edge of the training data some emulated times fall below the bound pruning relies on
+        self.assertTrue(np.any(emulated < bound))
+        times = np.maximum(emulated, bound)
+
+        for algorithm, scores in (("min-total-time", times.sum(axis=0)), ("minimax-time", times.max(axis=0))):
+            suggestions = suggest_pub(users, pubs, algorithm, self.emulator, k=3)
+
+            self.assertEqual([suggestion.row for suggestion in suggestions], np.argsort(scores, kind="stable")[:3].tolist())
+            self.assertTrue(np.all(suggestions[0].member_times >= lower_bound_times(users, pubs.xy[[suggestions[0].row]], speed, overhead)[:, 0]))
+
+    def test_given_group__when_minimax__then_longest_journey_no_worse_than_min_total(self):
+        total = suggest_pub(self.users, self.pubs, "min-total-time", self.emulator)[0]
+        minimax = suggest_pub(self.users, self.pubs, "minimax-time", self.emulator)[0]
+
+        self.assertLessEqual(minimax.member_times.max(), total.member_times.max())
+
+    def test_given_group__when_simulated_annealing__then_matches_min_total_time(self):
+        exhaustive = suggest_pub(self.users, self.pubs, "min-total-time", self.emulator)[0]
+        annealed = suggest_pub(self.users, self.pubs, "simulated_annealing", self.emulator)[0]
+
+        self.assertEqual(annealed.row, exhaustive.row)
+        np.testing.assert_allclose(annealed.member_times, exhaustive.member_times)
+
+    def test_given_k__when_each_objective__then_k_best_pubs_in_order(self):
+        times = self.pair_times()
+
+        for algorithm, scores in (("min-total-time", times.sum(axis=0)), ("minimax-time", times.max(axis=0))):
+            suggestions = suggest_pub(self.users, self.pubs, algorithm, self.emulator, k=5)
+
+            self.assertEqual([suggestion.row for suggestion in suggestions], np.argsort(scores, kind="stable")[:5].tolist())
+            np.testing.assert_allclose([suggestion.score for suggestion in suggestions], np.sort(scores)[:5], rtol=1e-9)
+
+    def test_given_k__when_simulated_annealing__then_distinct_pubs_best_first(self):
+        suggestions = suggest_pub(self.users, self.pubs, "simulated_annealing", self.emulator, k=3)
+
+        rows = [suggestion.row for suggestion in suggestions]
+        self.assertEqual(len(rows), len(set(rows)))
+        self.assertEqual([suggestion.score for suggestion in suggestions], sorted(suggestion.score for suggestion in suggestions))
+
+    def test_given_no_emulator__when_travel_time_algorithm__then_raises(self):
+        with self.assertRaises(ValueError):
+            suggest_pub(self.users, self.pubs, "min-total-time")
+
+    def test_given_many_groups__when_suggest_pubs__then_each_group_scored_over_every_pair(self):
+        groups = [self.rng.uniform(-10000, 10000, size=(n, 2)) for n in self.rng.integers(1, 8, size=BATCH_SHARED_MATRIX_MIN_GROUPS + 3)]
+        groups.append(groups[0][:2])
+
+        for algorithm, reduce in (("min-total-time", lambda times: times.sum(axis=0)), ("minimax-time", lambda times: times.max(axis=0))):
+            batched = suggest_pubs(groups, self.pubs, algorithm, self.emulator, k=3, max_members=12)
+
+            self.assertEqual(len(batched), len(groups))
+            for users, suggestions in zip(groups, batched):
+                times = self.pair_times(users)
+                scores = reduce(times)
+                self.assertEqual([suggestion.row for suggestion in suggestions], np.argsort(scores, kind="stable")[:3].tolist())
+                np.testing.assert_allclose([suggestion.score for suggestion in suggestions], np.sort(scores)[:3], rtol=1e-9)
+                np.testing.assert_allclose(suggestions[0].member_times, times[:, suggestions[0].row], rtol=1e-9)
+
+    def test_given_few_groups__when_suggest_pubs__then_each_searched_with_pruning(self):
+        groups = [self.rng.uniform(-10000, 10000, size=(4, 2)) for _ in range(2)]
+
+        batched = suggest_pubs(groups, self.pubs, "min-total-time", self.emulator)
+
+        for users, suggestions in zip(groups, batched):
+            self.assertEqual(suggestions[0].row, suggest_pub(users, self.pubs, "min-total-time", self.emulator)[0].row)
+            self.assertGreater(suggestions[0].pruned, 0)
+
+    def test_given_group_without_members__when_suggest_pubs__then_raises(self):
+        with self.assertRaises(ValueError):
+            suggest_pubs([self.users, np.empty((0, 2))], self.pubs, "min-total-time", self.emulator)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import numpy as np
+from algorithms.bayesian_emulation.bayesian_emulator import BayesianEmulator
+from algorithms.bayesian_emulation.sparse_emulator import SparseBayesianEmulator
+from algorithms.bayesian_emulation.validation import cheapest_within_budget, format_reports, leave_one_out, score, validate
+
+class TestValidation(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        locations = rng.uniform(0, 4, size=(5, 2))
+        self.x_train = np.array([[*origin, *destination] for origin in locations for destination in locations])
+        self.D = 10 + np.sum((self.x_train[:, :2] - self.x_train[:, 2:]) ** 2, axis=1)
+        self.x_test = rng.uniform(0, 4, size=(15, 4))
+        self.d_test = 10 + np.sum((self.x_test[:, :2] - self.x_test[:, 2:]) ** 2, axis=1)
+
+    def brute_force_leave_one_out(self, kronecker):
+        means, variances = [], []
+        for i in range(len(self.D)):
+            keep = np.arange(len(self.D)) != i
+            be = BayesianEmulator(10, 3, 2, self.x_train[keep], self.D[keep], nugget=1e-6)
+            be.compute_M(kronecker=kronecker)
+            mean, variance = be.emulate_with_variance(self.x_train[i])
+            means.append(mean)
+            variances.append(variance)
+        return np.array(means), np.array(variances)
+
+    def test_given_dense_emulator__when_leave_one_out__then_matches_refitting_without_each_point(self):
+        be = BayesianEmulator(10, 3, 2, self.x_train, self.D, nugget=1e-6)
+        be.compute_M(kronecker=False)
+
+        means, variances = leave_one_out(be)
+        expected_means, expected_variances = self.brute_force_leave_one_out(kronecker=False)
+
+        np.testing.assert_allclose(means, expected_means, rtol=1e-5, atol=1e-5)
+        np.testing.assert_allclose(variances, expected_variances, rtol=1e-4, atol=1e-6)
+
+    def test_given_kronecker_emulator__when_leave_one_out__then_matches_dense_closed_form(self):
+        dense = BayesianEmulator(10, 3, 2, self.x_train, self.D, nugget=1e-6)
+        dense.compute_M(kronecker=False)
+        kronecker = BayesianEmulator(10, 3, 2, self.x_train, self.D, nugget=1e-6)
+        kronecker.compute_M()
+
+        self.assertIsNotNone(kronecker.kronecker_factors)
+        for expected, actual in zip(leave_one_out(dense), leave_one_out(kronecker)):
+            np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-6)
+
+    def test_given_unfactorised_emulator_needing_jitter__when_leave_one_out__then_m_recomputed_under_the_raised_nugget(self):
+        # Repeated training points make Var[D] singular without a nugget
+        x_train, D = np.vstack([self.x_train, self.x_train[:3]]), np.concatenate([self.D, self.D[:3]])
+        loaded = BayesianEmulator(10, 3, 2, x_train, D, nugget=1e-6)
+        loaded.compute_M(kronecker=False)
+        be = BayesianEmulator(10, 3, 2, x_train, D, M=loaded.M, nugget=0.0)
+
+        means, variances = leave_one_out(be)
+        self.assertGreater(be.nugget, 0.0)
+        refit = BayesianEmulator(10, 3, 2, x_train, D, nugget=be.nugget)
+        refit.compute_M(kronecker=False)
+
+        np.testing.assert_allclose(be.M, refit.M, rtol=1e-6)
+        for expected, actual in zip(leave_one_out(refit), (means, variances)):
+            np.testing.assert_allclose(actual, expected, rtol=1e-6, atol=1e-8)
+
+    def test_given_predictions__when_scored__then_rmse_and_calibration_reported(self):
+        scores = score([1, 2, 6], [1, 1, 1], [1, 3, 3])
+
+        self.assertAlmostEqual(scores["rmse"], np.sqrt(10 / 3))
+        self.assertEqual(scores["max_abs_error"], 3)
+        self.assertAlmostEqual(scores["coverage_2sd"], 2 / 3)
+        self.assertAlmostEqual(scores["mean_sq_z"], 10 / 3)
+        self.assertIsNone(score([1], None, [1])["coverage_2sd"])
+
+    def test_given_configurations__when_validated__then_cheapest_within_budget_chosen(self):
+        exact = validate("exact", BayesianEmulator(10, 3, 2, self.x_train, self.D, nugget=1e-6), self.x_test, self.d_test)
+        sparse = validate("sparse", SparseBayesianEmulator(10, 3, 2, self.x_train, self.D, n_inducing=5), self.x_test, self.d_test)
+
+        self.assertIsNotNone(exact["loo"])
+        self.assertIsNone(sparse["loo"])
+        self.assertGreater(exact["train_seconds"], 0)
+        self.assertIn("sparse", format_reports([exact, sparse]))
+        fastest = min([exact, sparse], key=lambda report: report["predict_seconds_per_point"])
+        self.assertIs(cheapest_within_budget([exact, sparse], np.inf), fastest)
+        self.assertIsNone(cheapest_within_budget([exact, sparse], 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,3 @@
+#!/bin/sh
+
+python /app/api/utils/backfill_coordinates.py
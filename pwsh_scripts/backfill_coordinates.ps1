@@ -0,0 +1,4 @@
+#!/bin/bash
+
+$BACKEND_CONTAINER_NAME=pubpoint-backend-1 # Update as required
+docker exec -it $BACKEND_CONTAINER_NAME env PYTHONPATH=/app python3 api/utils/backfill_coordinates.py